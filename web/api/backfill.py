@@ -0,0 +1,194 @@
+"""
+Historical backfill - resumable, checkpointed OHLC download of many (symbol, interval) pairs
+
+Every pair pages through Kraken OHLC with the `since` cursor; each page is written with
+upsert_ohlc and its cursor is stored in qt_backfill_checkpoint (BackfillCheckpoint) in
+the same transaction. A job that crashes or is stopped continues from the stored cursors
+on the next run; pairs that reached the present ('done') resume from their cursor too
+and only fetch the bars added since.
+
+Pairs run concurrently on one AsyncKrakenProvider, so they share its connection pool and
+rate limit budget. A job is bounded: at most `max_pages` pages per pair per run (the
+pair is left `paused` and continues next run), and it reports throughput and an ETA
+while it runs.
+
+    python manage.py backfill_ohlc --symbols=SOL/USD --since=2020-01-01
+"""
+import asyncio
+import math
+import time
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+from api.models import BackfillCheckpoint
+from api.ohlc_writer import kraken_ohlc_rows, upsert_ohlc
+from api.pipeline.constants import INTERVAL_NAMES, KRAKEN_PAIRS
+from api.providers.kraken_async import KRAKEN_PUBLIC_LIMIT, get_async_kraken_provider
+
+BACKFILL_SOURCE = 'kraken'
+KRAKEN_PAGE_SIZE = 720  # Bars per Kraken OHLC response
+
+
+def load_checkpoints(pairs, since=None, restart=False):
+    """
+    Checkpoint of every pair, created for pairs seen for the first time
+
+    Args:
+        since: unix timestamp new (or restarted) pairs start from (None = earliest available)
+        restart: start all pairs again from `since`
+
+    Returns: [BackfillCheckpoint] in the order of pairs
+    """
+    checkpoints = []
+    for symbol, interval in pairs:
+        checkpoint, created = BackfillCheckpoint.objects.get_or_create(
+            source=BACKFILL_SOURCE, symbol=symbol, interval=interval,
+            defaults={'cursor': since},
+        )
+        if restart and not created:
+            checkpoint.cursor = since
+            checkpoint.status = 'running'
+            checkpoint.pages = 0
+            checkpoint.rows = 0
+            checkpoint.error = None
+            checkpoint.save()
+        checkpoints.append(checkpoint)
+    return checkpoints
+
+
+def save_page(checkpoint, candles, cursor):
+    """Write one page and move the checkpoint past it - one transaction"""
+    with transaction.atomic():
+        inserted, updated = upsert_ohlc(kraken_ohlc_rows(candles, checkpoint.symbol, checkpoint.interval))
+        checkpoint.cursor = cursor
+        checkpoint.pages += 1
+        checkpoint.rows += inserted + updated
+        checkpoint.error = None
+        checkpoint.save()
+    return inserted, updated
+
+
+def save_status(checkpoint, status, error=None):
+    checkpoint.status = status
+    checkpoint.error = error
+    checkpoint.save(update_fields=['status', 'error', 'updated_at'])
+
+
+class BackfillJob:
+    """
+    Backfill of several (symbol, interval) pairs from their checkpoints
+
+    Args:
+        pairs: (display name, interval in seconds) tuples with a Kraken mapping
+        since: unix timestamp pairs without a checkpoint start from (None = earliest available)
+        restart: ignore the stored checkpoints
+        max_pages: page limit per pair for this run
+        concurrency: pairs downloading at the same time
+        report_every: seconds between progress lines
+    """
+
+    def __init__(self, pairs, since=None, restart=False, max_pages=50,
+                 concurrency=KRAKEN_PUBLIC_LIMIT[0], report_every=10, stdout=print):
+        self.pairs = list(pairs)
+        self.since = since
+        self.restart = restart
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.report_every = report_every
+        self.write = stdout
+
+        self.pages = 0
+        self.rows = 0
+        self.started = None
+        self.pending = {}  # (symbol, interval) -> checkpoint of the pairs still downloading
+
+    def run(self):
+        """Run the job to completion (or the page limit) - returns the checkpoints"""
+        checkpoints = load_checkpoints(self.pairs, since=self.since, restart=self.restart)
+        # Complete pairs continue from their cursor too: only the bars since the last run
+        caught_up = sum(checkpoint.status == 'done' for checkpoint in checkpoints)
+        self.write(f"📥 Backfill: {len(checkpoints)} pairs"
+                   + (f", {caught_up} complete - fetching only their new bars" if caught_up else ""))
+        if checkpoints:
+            asyncio.run(self._run(checkpoints))
+        return checkpoints
+
+    async def _run(self, checkpoints):
+        self.started = time.monotonic()
+        self.pending = {(c.symbol, c.interval): c for c in checkpoints}
+        semaphore = asyncio.Semaphore(self.concurrency)
+        reporter = asyncio.create_task(self._report_progress())
+
+        async with get_async_kraken_provider() as provider:
+            async def run_pair(checkpoint):
+                async with semaphore:
+                    await self._backfill_pair(provider, checkpoint)
+
+            try:
+                await asyncio.gather(*(run_pair(checkpoint) for checkpoint in checkpoints))
+            finally:
+                reporter.cancel()
+
+        elapsed = time.monotonic() - self.started
+        self.write(f"✅ Backfill finished: {self.pages} pages, {self.rows:,} bars in {elapsed:.0f}s "
+                   f"({self.rows / elapsed if elapsed else 0:,.0f} bars/s)")
+
+    async def _backfill_pair(self, provider, checkpoint):
+        pair = f"{checkpoint.symbol} @ {INTERVAL_NAMES.get(checkpoint.interval, checkpoint.interval)}"
+        kraken_pair = KRAKEN_PAIRS[checkpoint.symbol]
+        interval_minutes = checkpoint.interval // 60
+
+        if checkpoint.status != 'running':
+            await sync_to_async(save_status)(checkpoint, 'running')
+
+        try:
+            for _ in range(self.max_pages):
+                result = await provider.get_ohlc_data(kraken_pair, interval=interval_minutes, since=checkpoint.cursor)
+                candles = result.get(kraken_pair) or []
+                cursor = int(result.get('last') or 0)
+                if not candles or cursor <= (checkpoint.cursor or 0):
+                    break  # Nothing after the cursor
+
+                inserted, updated = await sync_to_async(save_page)(checkpoint, candles, cursor)
+                self.pages += 1
+                self.rows += inserted + updated
+
+                # The newest bar is the one still forming: the pair reached the present
+                if int(candles[-1][0]) + checkpoint.interval > time.time() or len(candles) < KRAKEN_PAGE_SIZE:
+                    break
+            else:
+                await sync_to_async(save_status)(checkpoint, 'paused')
+                self.write(f"  ⏸️  {pair}: page limit reached at cursor {checkpoint.cursor}, resume with the next run")
+                return
+        except Exception as e:
+            await sync_to_async(save_status)(checkpoint, 'error', str(e))
+            self.write(f"  ❌ {pair}: {e} (resumes from cursor {checkpoint.cursor})")
+            return
+        finally:
+            self.pending.pop((checkpoint.symbol, checkpoint.interval), None)
+
+        await sync_to_async(save_status)(checkpoint, 'done')
+        self.write(f"  ✅ {pair}: complete ({checkpoint.pages} pages, {checkpoint.rows:,} bars)")
+
+    def remaining_pages(self):
+        """Pages still to download, estimated from the cursors of the pending pairs"""
+        now = time.time()
+        remaining = 0
+        for checkpoint in self.pending.values():
+            if checkpoint.cursor:
+                bars = max(0, now - checkpoint.cursor) / checkpoint.interval
+                remaining += min(self.max_pages, math.ceil(bars / KRAKEN_PAGE_SIZE))
+            else:
+                remaining += 1  # Unknown history length: at least one page
+        return remaining
+
+    async def _report_progress(self):
+        while True:
+            await asyncio.sleep(self.report_every)
+            elapsed = time.monotonic() - self.started
+            page_rate = self.pages / elapsed if elapsed else 0
+            remaining = self.remaining_pages()
+            eta = f"{remaining / page_rate:.0f}s" if page_rate else "-"
+            self.write(f"  📊 {self.pages} pages, {self.rows:,} bars ({self.rows / elapsed:,.0f} bars/s), "
+                       f"{len(self.pending)} pairs left, ETA {eta}")
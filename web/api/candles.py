@@ -0,0 +1,262 @@
+"""
+Streaming candle builder - aggregates live trades into OHLC bars in real time
+
+CandleAggregator keeps the open 1m/5m/15m/1H/4H/1D bar of every symbol in memory and
+updates it with each trade of the exchange stream (Bitstamp live_trades / Kraken trade
+channel). Bars are closed by the first trade of the next period, or by the clock when
+no trade arrives, and written in batches through upsert_ohlc: minute bars to
+OhlcPriceMinute (qt_ohlc_m), hourly and daily bars to OhlcPrice (qt_ohlc).
+
+The open bars are published to Redis (live_candle:<symbol>:<interval>) so the dashboard
+can show the intrabar state; on_close callbacks see every batch of closed bars.
+
+Only bars that were watched from their first second are written - the bar in progress
+when the stream (re)connects misses earlier trades and is left to the REST fetchers.
+"""
+import asyncio
+import json
+import logging
+import time
+
+import redis
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from api.models import OhlcPrice, OhlcPriceMinute
+from api.ohlc_writer import KRAKEN_MARKET_ID, ohlc_row, upsert_ohlc
+from api.redis_client import get_async_redis, get_redis
+
+logger = logging.getLogger(__name__)
+
+STREAM_INTERVALS = [60, 300, 900, 3600, 14400, 86400]
+MINUTE_INTERVALS = {60, 300, 900}  # stored in qt_ohlc_m, the rest in qt_ohlc
+
+LIVE_CANDLE_KEY = 'live_candle:{symbol}:{interval}'
+LIVE_CANDLE_TTL = 120  # seconds - stale when the stream stops
+
+# Kraken websocket pair names (XBT / XDG instead of BTC / DOGE)
+KRAKEN_WS_PAIRS = {
+    'BTC/USD': 'XBT/USD',
+    'ETH/USD': 'ETH/USD',
+    'SOL/USD': 'SOL/USD',
+    'DOGE/USD': 'XDG/USD',
+    'BCH/USD': 'BCH/USD',
+    'LTC/USD': 'LTC/USD',
+    'XRP/USD': 'XRP/USD',
+    'LINK/USD': 'LINK/USD',
+    'ETH/BTC': 'ETH/XBT',
+}
+KRAKEN_WS_SYMBOLS = {pair: symbol for symbol, pair in KRAKEN_WS_PAIRS.items()}
+
+
+def bitstamp_channel(symbol):
+    """'BTC/USD' -> 'live_trades_btcusd'"""
+    return 'live_trades_' + symbol.replace('/', '').lower()
+
+
+def live_candle_key(symbol, interval):
+    return LIVE_CANDLE_KEY.format(symbol=symbol, interval=interval)
+
+
+def get_live_candle(symbol, interval, redis_client=None):
+    """Open (intrabar) candle of a symbol published by the stream, or None"""
+    try:
+        client = redis_client or get_redis(decode_responses=True)
+        value = client.get(live_candle_key(symbol, interval))
+    except redis.RedisError as e:
+        logger.warning(f"Live candle lookup failed: {e}")
+        return None
+    return json.loads(value) if value else None
+
+
+def write_candles(bars, market_id=KRAKEN_MARKET_ID):
+    """
+    Upsert closed bars - one statement per table
+    Returns: {table: (inserted, updated)}
+    """
+    close_old_connections()
+    results = {}
+    for model, minute in ((OhlcPriceMinute, True), (OhlcPrice, False)):
+        rows = [
+            ohlc_row(bar['unix'], bar['symbol'], bar['interval'], bar['open'], bar['high'], bar['low'],
+                     bar['close'], bar['volume'], market_id=market_id)
+            for bar in bars if (bar['interval'] in MINUTE_INTERVALS) == minute
+        ]
+        if rows:
+            results[model._meta.db_table] = upsert_ohlc(rows, model=model)
+    return results
+
+
+class CandleAggregator:
+    """
+    Rolling OHLC bars built from a trade stream
+
+    Trades come in through add_trade (inside the event loop) or submit_trade (thread-safe,
+    for the websocket client threads); run() consumes them and flushes / publishes the bars.
+    """
+
+    def __init__(self, intervals=None, market_id=KRAKEN_MARKET_ID, flush_interval=5.0,
+                 publish_interval=1.0, grace=2.0, redis_client=None, on_close=None):
+        """
+        Args:
+            intervals: bar sizes in seconds (default STREAM_INTERVALS)
+            market_id: market_id of the written bars (1 Bitstamp, 2 Kraken)
+            flush_interval: seconds between database flushes of the closed bars
+            publish_interval: seconds between Redis updates of the open bars (0 = no publishing)
+            grace: seconds after the end of a period before a bar without new trades is closed
+            redis_client: redis.asyncio client for publishing (default: the shared pool of api.redis_client)
+            on_close: optional callables (or coroutine functions) called with each flushed batch
+        """
+        self.intervals = list(intervals or STREAM_INTERVALS)
+        self.market_id = market_id
+        self.flush_interval = flush_interval
+        self.publish_interval = publish_interval
+        self.grace = grace
+        self.redis_client = redis_client
+        self.on_close = list(on_close or [])
+
+        self.bars = {}       # (symbol, interval) -> open bar
+        self.last_closed = {}  # (symbol, interval) -> start of the last closed bar
+        self.closed = []     # closed bars waiting for the next flush
+        self.queue = asyncio.Queue()
+        self.loop = None
+        self.complete_from = time.time()  # bars starting earlier missed trades
+        self.stats = {'trades': 0, 'late': 0, 'closed': 0, 'partial': 0, 'written': 0}
+
+    # --- trades ---
+
+    def add_trade(self, symbol, price, volume, timestamp):
+        """Apply one trade to the open bar of every interval"""
+        price, volume, timestamp = float(price), float(volume), float(timestamp)
+        self.stats['trades'] += 1
+        for interval in self.intervals:
+            start = int(timestamp) - int(timestamp) % interval
+            key = (symbol, interval)
+            bar = self.bars.get(key)
+
+            if bar is not None and start > bar['unix']:
+                self._close(key)
+                bar = None
+
+            if bar is None and start <= self.last_closed.get(key, -1):
+                # Its bar was closed by the clock already - never open a second bar for that start
+                self.stats['late'] += 1
+            elif bar is None:
+                self.bars[key] = {
+                    'symbol': symbol,
+                    'interval': interval,
+                    'unix': start,
+                    'open': price,
+                    'high': price,
+                    'low': price,
+                    'close': price,
+                    'volume': volume,
+                    'trades': 1,
+                    'complete': start >= self.complete_from,
+                }
+            elif start < bar['unix']:
+                self.stats['late'] += 1  # belongs to a bar that is already closed
+            else:
+                bar['high'] = max(bar['high'], price)
+                bar['low'] = min(bar['low'], price)
+                bar['close'] = price
+                bar['volume'] += volume
+                bar['trades'] += 1
+
+    def submit_trade(self, symbol, price, volume, timestamp):
+        """Thread-safe add_trade - queued into the aggregator's event loop"""
+        if self.loop is None:
+            return
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, (symbol, price, volume, timestamp))
+
+    def mark_gap(self):
+        """The stream was interrupted: bars open now missed trades and are not written"""
+        for bar in self.bars.values():
+            bar['complete'] = False
+        self.complete_from = time.time()
+
+    def _close(self, key):
+        bar = self.bars.pop(key)
+        self.last_closed[key] = bar['unix']
+        if bar['complete']:
+            self.closed.append(bar)
+            self.stats['closed'] += 1
+        else:
+            self.stats['partial'] += 1
+
+    def close_due(self, now=None):
+        """Close bars whose period ended (plus grace) without a trade of the next period"""
+        now = time.time() if now is None else now
+        for key, bar in list(self.bars.items()):
+            if now >= bar['unix'] + bar['interval'] + self.grace:
+                self._close(key)
+
+    def snapshot(self, symbol=None):
+        """Open bars (intrabar state), optionally of one symbol"""
+        return [dict(bar) for (bar_symbol, _), bar in self.bars.items() if symbol in (None, bar_symbol)]
+
+    # --- flushing / publishing ---
+
+    async def flush(self):
+        """Write the closed bars in one batch and notify the on_close callbacks"""
+        self.close_due()
+        bars, self.closed = self.closed, []
+        if not bars:
+            return []
+
+        try:
+            results = await sync_to_async(write_candles)(bars, self.market_id)
+        except Exception as e:
+            logger.error(f"Candle flush failed ({len(bars)} bars): {e}")
+            self.closed = bars + self.closed  # retried on the next flush
+            return []
+        self.stats['written'] += len(bars)
+        logger.info(f"Flushed {len(bars)} closed bars: {results}")
+
+        for callback in self.on_close:
+            try:
+                result = callback(bars)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Candle close callback error: {e}")
+        return bars
+
+    async def publish(self):
+        """Write the open bars to Redis for the dashboard"""
+        if self.redis_client is None or not self.bars:
+            return
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for bar in self.bars.values():
+                    pipe.setex(live_candle_key(bar['symbol'], bar['interval']), LIVE_CANDLE_TTL, json.dumps(bar))
+                await pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Live candle publish failed: {e}")
+
+    async def _consume(self):
+        while True:
+            self.add_trade(*await self.queue.get())
+
+    async def _every(self, seconds, coroutine_function):
+        while True:
+            await asyncio.sleep(seconds)
+            await coroutine_function()
+
+    async def run(self):
+        """Consume trades, flush closed bars and publish open bars until cancelled"""
+        self.loop = asyncio.get_running_loop()
+        if self.redis_client is None and self.publish_interval:
+            self.redis_client = get_async_redis()
+
+        tasks = [asyncio.create_task(self._consume()),
+                 asyncio.create_task(self._every(self.flush_interval, self.flush))]
+        if self.publish_interval:
+            tasks.append(asyncio.create_task(self._every(self.publish_interval, self.publish)))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Nothing of the bars still open is lost for good: the REST fetchers fill them in
+            await self.flush()
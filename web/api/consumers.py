@@ -61,6 +61,11 @@ class TicksAsyncConsumer(AsyncJsonWebsocketConsumer):
         # print(f"Event: {event['content']} for {self.channel_name}")
         await self.send(event['content'])
 
+    async def live_ticks_batch(self, event):
+        # Trades batched by api.wsclient, forwarded one message each
+        for message in event['messages']:
+            await self.send(message)
+
     async def timer_ticks(self, event):
         # print(f"Event: {event['content']} for {self.channel_name}")
         await self.send(event['content'])
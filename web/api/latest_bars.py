@@ -0,0 +1,145 @@
+"""
+Latest bar service - the newest OHLC bars of many (symbol, interval) pairs at once
+
+Page builders ask for all their symbols in one call instead of one
+`.order_by('-date').first()` per symbol / interval. Answers come from Redis
+(latest_bars:<table>:<symbol>:<interval>, one MGET); the pairs missing there are read
+with one LATERAL top-N query over the (symbol, interval, date) covering index and
+cached. upsert_ohlc / resample_ohlc invalidate the pairs they write.
+
+Bars are dicts: unix, date (datetime), interval, open / high / low / close / volume (Decimal).
+"""
+import json
+import logging
+from datetime import datetime
+from decimal import Decimal
+
+import redis
+from django.db import connection
+
+from api.models import OhlcPrice
+from api.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+LATEST_BARS_KEY = 'latest_bars:{table}:{symbol}:{interval}'
+LATEST_BARS_TTL = 300   # seconds - writes invalidate, the TTL only bounds missed invalidations
+LATEST_BARS_DEPTH = 2   # newest bar (usually still open) and the last closed one
+ANY_INTERVAL = '*'
+
+PRICE_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def latest_bars_key(table, symbol, interval):
+    return LATEST_BARS_KEY.format(table=table, symbol=symbol, interval=interval)
+
+
+def _encode(bars):
+    return json.dumps([
+        {**{field: None if bar[field] is None else str(bar[field]) for field in PRICE_FIELDS},
+         'unix': bar['unix'], 'interval': bar['interval'], 'date': bar['date'].isoformat()}
+        for bar in bars
+    ])
+
+
+def _decode(value):
+    return [
+        {**{field: None if bar[field] is None else Decimal(bar[field]) for field in PRICE_FIELDS},
+         'unix': bar['unix'], 'interval': bar['interval'], 'date': datetime.fromisoformat(bar['date'])}
+        for bar in json.loads(value)
+    ]
+
+
+def _query(table, pairs):
+    """One LATERAL top-N query for all pairs -> {(symbol, interval): [bars, newest first]}"""
+    columns = 'o.unix, o.date, o.interval, ' + ', '.join(f'o.{field}' for field in PRICE_FIELDS)
+    any_interval = [symbol for symbol, interval in pairs if interval == ANY_INTERVAL]
+    by_interval = [(symbol, interval) for symbol, interval in pairs if interval != ANY_INTERVAL]
+
+    result = {pair: [] for pair in pairs}
+    with connection.cursor() as cursor:
+        if by_interval:
+            cursor.execute(
+                f"SELECT p.symbol, p.interval, {columns} "
+                f"FROM unnest(%s::varchar[], %s::integer[]) AS p(symbol, interval) "
+                f"CROSS JOIN LATERAL (SELECT * FROM {table} o WHERE o.symbol = p.symbol AND o.interval = p.interval "
+                f"ORDER BY o.date DESC LIMIT %s) o",
+                [[s for s, _ in by_interval], [i for _, i in by_interval], LATEST_BARS_DEPTH],
+            )
+            for symbol, interval, *row in cursor.fetchall():
+                result[(symbol, interval)].append(dict(zip(['unix', 'date', 'interval'] + PRICE_FIELDS, row)))
+        if any_interval:
+            # Newest bar of a symbol on any interval (uses the (symbol, date) index)
+            cursor.execute(
+                f"SELECT p.symbol, {columns} "
+                f"FROM unnest(%s::varchar[]) AS p(symbol) "
+                f"CROSS JOIN LATERAL (SELECT * FROM {table} o WHERE o.symbol = p.symbol "
+                f"ORDER BY o.date DESC LIMIT %s) o",
+                [any_interval, LATEST_BARS_DEPTH],
+            )
+            for symbol, *row in cursor.fetchall():
+                result[(symbol, ANY_INTERVAL)].append(dict(zip(['unix', 'date', 'interval'] + PRICE_FIELDS, row)))
+    return result
+
+
+def latest_bars(symbols, intervals=None, model=OhlcPrice):
+    """
+    Newest LATEST_BARS_DEPTH bars of every (symbol, interval)
+
+    Args:
+        symbols: symbol names
+        intervals: intervals in seconds; None = newest bars of each symbol on any interval
+                   (keyed by (symbol, ANY_INTERVAL))
+        model: OhlcPrice (default) or OhlcPriceMinute
+
+    Returns: {(symbol, interval): [newest bar, previous bar]} ([] when there is no data)
+    """
+    table = model._meta.db_table
+    pairs = [(symbol, interval) for symbol in symbols for interval in (intervals or [ANY_INTERVAL])]
+    if not pairs:
+        return {}
+    keys = [latest_bars_key(table, symbol, interval) for symbol, interval in pairs]
+
+    result = {}
+    try:
+        client = get_redis(decode_responses=True)
+        for pair, value in zip(pairs, client.mget(keys)):
+            if value is not None:
+                result[pair] = _decode(value)
+    except redis.RedisError as e:
+        logger.warning(f"Latest bar cache unavailable: {e}")
+        client = None
+
+    missing = [pair for pair in pairs if pair not in result]
+    if missing:
+        loaded = _query(table, missing)
+        result.update(loaded)
+        if client is not None:
+            try:
+                pipe = client.pipeline(transaction=False)
+                for (symbol, interval), bars in loaded.items():
+                    pipe.setex(latest_bars_key(table, symbol, interval), LATEST_BARS_TTL, _encode(bars))
+                pipe.execute()
+            except redis.RedisError as e:
+                logger.warning(f"Latest bar cache write failed: {e}")
+    return result
+
+
+def latest_bar(symbol, interval=None, model=OhlcPrice):
+    """Newest bar of one (symbol, interval), or None"""
+    bars = latest_bars([symbol], [interval] if interval else None, model=model)[(symbol, interval or ANY_INTERVAL)]
+    return bars[0] if bars else None
+
+
+def invalidate_latest_bars(table, pairs):
+    """Drop the cached bars of the written (symbol, interval) pairs (and their any-interval entries)"""
+    keys = set()
+    for symbol, interval in pairs:
+        keys.add(latest_bars_key(table, symbol, interval))
+        keys.add(latest_bars_key(table, symbol, ANY_INTERVAL))
+    if not keys:
+        return
+    try:
+        get_redis().delete(*keys)
+    except redis.RedisError as e:
+        logger.warning(f"Latest bar cache invalidation failed: {e}")
@@ -0,0 +1,103 @@
+"""
+Latest state - the newest indicator, market regime and active signal of every (symbol, interval)
+
+qt_latest_state (LatestState) holds one row per pair pointing at the newest rows. Each
+pipeline stage repoints its column in the transaction that writes the rows, with one
+set-based INSERT ... ON CONFLICT for all pairs it touched, so the state never shows a
+row that is not committed yet. Views and stages read the state with one lookup on the
+(symbol, interval) key instead of an `order_by('-timestamp').first()` per table.
+
+    indicator   newest Indicator                  (indicators stage)
+    regime      newest MarketRegime               (market regime stage)
+    signal      newest TradingSignal still active (signals stage)
+"""
+from django.db import connection
+
+from api.models import Indicator, LatestState, MarketRegime, TradingSignal
+
+# column -> (source model, condition on the source rows)
+LATEST_STATE_SOURCES = {
+    'indicator': (Indicator, 'TRUE'),
+    'regime': (MarketRegime, 'TRUE'),
+    'signal': (TradingSignal, "o.status = 'active'"),
+}
+
+
+def refresh_latest_state(field, pairs, cursor=None):
+    """
+    Point `field` of the pairs at their newest source row (NULL when there is none)
+
+    Call it inside the transaction that wrote the source rows.
+
+    Args:
+        field: 'indicator', 'regime' or 'signal'
+        pairs: (symbol, interval) tuples written by the caller
+        cursor: cursor to use, default: Django's default connection
+    """
+    model, condition = LATEST_STATE_SOURCES[field]
+    pairs = list(dict.fromkeys(pairs))
+    if not pairs:
+        return
+
+    sql = (
+        f"INSERT INTO {LatestState._meta.db_table} (symbol, interval, {field}_id, updated_at) "
+        f"SELECT p.symbol, p.interval, ("
+        f"SELECT o.id FROM {model._meta.db_table} o "
+        f"WHERE o.symbol = p.symbol AND o.interval = p.interval AND {condition} "
+        f"ORDER BY o.timestamp DESC, o.id DESC LIMIT 1), now() "
+        f"FROM unnest(%s::varchar[], %s::integer[]) AS p(symbol, interval) "
+        f"ON CONFLICT (symbol, interval) DO UPDATE SET "
+        f"{field}_id = EXCLUDED.{field}_id, updated_at = EXCLUDED.updated_at"
+    )
+    params = [[symbol for symbol, _ in pairs], [interval for _, interval in pairs]]
+    if cursor is None:
+        with connection.cursor() as django_cursor:
+            django_cursor.execute(sql, params)
+    else:
+        cursor.execute(sql, params)
+
+
+def latest_states(pairs):
+    """
+    LatestState rows of the pairs with the referenced rows joined in - one query
+
+    Returns: {(symbol, interval): LatestState} (pairs never processed are missing)
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return {}
+
+    states = LatestState.objects.select_related('indicator', 'regime', 'signal').filter(
+        symbol__in={symbol for symbol, _ in pairs},
+        interval__in={interval for _, interval in pairs},
+    )
+    return {(state.symbol, state.interval): state for state in states if (state.symbol, state.interval) in pairs}
+
+
+def latest_rows(field, pairs):
+    """
+    Newest `field` row ('indicator', 'regime' or 'signal') of every pair
+
+    Returns: {(symbol, interval): row} (pairs without a row are missing)
+    """
+    rows = {}
+    for pair, state in latest_states(pairs).items():
+        row = getattr(state, field)
+        if row is not None:
+            rows[pair] = row
+    return rows
+
+
+def latest_row(field, symbol, interval):
+    """Newest `field` row of one (symbol, interval), or None"""
+    return latest_rows(field, [(symbol, interval)]).get((symbol, interval))
+
+
+def latest_active_signals(symbol=None, interval=None):
+    """Newest active signal of every pair (optionally of one symbol / interval), latest first"""
+    states = LatestState.objects.select_related('signal').filter(signal__isnull=False)
+    if symbol:
+        states = states.filter(symbol=symbol)
+    if interval:
+        states = states.filter(interval=int(interval))
+    return [state.signal for state in states.order_by('-signal__timestamp') if state.signal is not None]
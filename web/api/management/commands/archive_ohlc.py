@@ -0,0 +1,68 @@
+"""
+python manage.py archive_ohlc [--symbols=BTC/USD] [--intervals=1H,4H,1D,1W] [--table=qt_ohlc] [--rebuild] [--status]
+
+Parquet archive of closed OHLC months (api.ohlc_archive): appends the months closed since
+the last run, one file per (symbol, interval, month). api.ohlc_loader then reads long
+histories from the archive and only the open month from the database.
+
+    python manage.py archive_ohlc              # Newly closed months of all pipeline pairs
+    python manage.py archive_ohlc --rebuild    # Export every closed month again
+"""
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import OhlcPrice, OhlcPriceMinute
+from api.ohlc_archive import archive_enabled, archive_pair, archived_months
+from api.pipeline.constants import INTERVALS, SYMBOLS
+
+TABLES = {'qt_ohlc': OhlcPrice, 'qt_ohlc_m': OhlcPriceMinute}
+
+
+class Command(BaseCommand):
+    help = "Export closed OHLC months to the Parquet archive read by the OHLC loader"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--symbols', help="Comma separated (default: all pipeline symbols)")
+        parser.add_argument('--intervals', default=','.join(INTERVALS), help="Comma separated interval names")
+        parser.add_argument('--table', choices=list(TABLES), default='qt_ohlc')
+        parser.add_argument('--rebuild', action='store_true', help="Drop the archive and export all closed months")
+        parser.add_argument('--status', action='store_true', help="Show the archived months and exit")
+
+    def handle(self, *args, **options):
+        if not archive_enabled():
+            raise CommandError("OHLC archive disabled: set OHLC_ARCHIVE_DIR and install pyarrow")
+
+        symbols = options['symbols'].split(',') if options['symbols'] else list(SYMBOLS)
+        intervals = options['intervals'].split(',')
+        unknown = [name for name in intervals if name not in INTERVALS]
+        if unknown:
+            raise CommandError(f"Unknown intervals: {', '.join(unknown)}")
+        model = TABLES[options['table']]
+
+        if options['status']:
+            return self.show_status(model._meta.db_table, symbols, intervals)
+
+        self.stdout.write(f"🗄️ Archiving {options['table']} to {settings.OHLC_ARCHIVE_DIR}")
+        started = time.perf_counter()
+        total = 0
+        for symbol in symbols:
+            for name in intervals:
+                months = archive_pair(symbol, INTERVALS[name], model=model, rebuild=options['rebuild'])
+                total += months
+                if months:
+                    self.stdout.write(f"  ✅ {symbol} {name}: {months} months")
+        self.stdout.write(f"📊 {total} month files written in {time.perf_counter() - started:.1f}s")
+
+    def show_status(self, table, symbols, intervals):
+        for symbol in symbols:
+            for name in intervals:
+                months = archived_months(table, symbol, INTERVALS[name])
+                if not months:
+                    self.stdout.write(f"{symbol:10} {name:4} -")
+                    continue
+                first, last = (datetime.fromtimestamp(month, tz=timezone.utc).strftime('%Y-%m')
+                               for month in (months[0], months[-1]))
+                self.stdout.write(f"{symbol:10} {name:4} {first} .. {last} ({len(months)} months)")
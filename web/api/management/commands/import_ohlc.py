@@ -0,0 +1,83 @@
+"""
+python manage.py import_ohlc FILE [FILE ...] [--symbol=BTC/USD] [--interval=1H] [--table=qt_ohlc] [--workers=4]
+
+Bulk load of downloaded candle files (api.ohlc_importer): every CSV / Parquet file is
+COPYed in chunks into a staging table and merged into the OHLC table on its unique key,
+so files can be loaded again without duplicates. Files load in parallel.
+
+    python manage.py import_ohlc 'scripts/data/Bitstamp_*_1h.csv'
+"""
+import glob
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.models import OhlcPrice, OhlcPriceMinute
+from api.ohlc_importer import IMPORT_CHUNK_ROWS, import_file
+from api.ohlc_writer import BITSTAMP_MARKET_ID
+from api.pipeline.constants import INTERVALS
+
+TABLES = {'qt_ohlc': OhlcPrice, 'qt_ohlc_m': OhlcPriceMinute}
+
+
+class Command(BaseCommand):
+    help = "Load OHLC CSV / Parquet files into qt_ohlc / qt_ohlc_m (COPY + merge on the unique key)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help="Files or glob patterns (.csv / .parquet)")
+        parser.add_argument('--symbol', help="Symbol of all rows (default: the symbol column of the file)")
+        parser.add_argument('--interval', help="Interval name (1H, 4H, 1D, 1W) or seconds (default: from the file name)")
+        parser.add_argument('--table', choices=list(TABLES), default='qt_ohlc')
+        parser.add_argument('--market-id', type=int, default=BITSTAMP_MARKET_ID, help="1 = Bitstamp, 2 = Kraken")
+        parser.add_argument('--workers', type=int, default=4, help="Files loaded at the same time")
+        parser.add_argument('--chunk-rows', type=int, default=IMPORT_CHUNK_ROWS)
+
+    def handle(self, *args, **options):
+        files = []
+        for pattern in options['files']:
+            matches = sorted(glob.glob(pattern))
+            if not matches:
+                raise CommandError(f"No files match {pattern}")
+            files.extend(matches)
+
+        interval = options['interval']
+        if interval:
+            interval = INTERVALS[interval] if interval in INTERVALS else int(interval)
+
+        def load(path):
+            try:
+                return import_file(
+                    path, symbol=options['symbol'], interval=interval, model=TABLES[options['table']],
+                    market_id=options['market_id'], chunk_rows=options['chunk_rows'], progress=self.stdout.write,
+                )
+            finally:
+                connection.close()  # Connection of this worker thread
+
+        self.stdout.write(f"📥 Importing {len(files)} files into {options['table']} ({options['workers']} workers)")
+        started = time.perf_counter()
+        total_rows = 0
+        failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = {executor.submit(load, path): path for path in files}
+            for future in as_completed(futures):
+                name = os.path.basename(futures[future])
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"❌ {name}: {e}")
+                    continue
+                total_rows += result['rows']
+                self.stdout.write(
+                    f"✅ {name}: {result['rows']:,} rows, {result['inserted']:,} inserted, "
+                    f"{result['updated']:,} updated ({result['seconds']:.1f}s, "
+                    f"{result['rows'] / result['seconds'] if result['seconds'] else 0:,.0f} rows/s)"
+                )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"📊 {len(files) - failed}/{len(files)} files, {total_rows:,} rows in {elapsed:.1f}s")
+        if failed:
+            raise CommandError(f"{failed} files failed")
@@ -0,0 +1,48 @@
+"""
+python manage.py ohlc_storage status|convert|maintain
+
+  status    show the storage layout of qt_ohlc / qt_ohlc_m and the configured backend
+  convert   move the existing rows into the configured OHLC_STORAGE_BACKEND layout
+            (stop the fetchers / backfills first; the final swap locks writes briefly)
+  maintain  create upcoming partitions and apply OHLC_RETENTION_DAYS (also a daily Celery task)
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from api import ohlc_storage
+
+
+class Command(BaseCommand):
+    help = "Manage the OHLC table layout (heap / monthly partitions / TimescaleDB) and retention"
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['status', 'convert', 'maintain'])
+        parser.add_argument('--backend', choices=ohlc_storage.BACKENDS,
+                            help="Target backend for convert (default: settings.OHLC_STORAGE_BACKEND)")
+        parser.add_argument('--table', choices=[model._meta.db_table for model in ohlc_storage.OHLC_MODELS],
+                            help="Only this table (default: qt_ohlc and qt_ohlc_m)")
+        parser.add_argument('--keep-old', action='store_true',
+                            help="convert: keep the original heap table as <table>_heap")
+
+    def handle(self, *args, **options):
+        models = [model for model in ohlc_storage.OHLC_MODELS
+                  if options['table'] in (None, model._meta.db_table)]
+
+        try:
+            if options['action'] == 'status':
+                self.stdout.write(f"OHLC_STORAGE_BACKEND = {ohlc_storage.storage_backend()}")
+                for model in models:
+                    table = model._meta.db_table
+                    self.stdout.write(f"  {table}: {ohlc_storage.current_layout(table)}")
+
+            elif options['action'] == 'convert':
+                for model in models:
+                    ohlc_storage.convert_table(model, backend=options['backend'], keep_old=options['keep_old'])
+
+            else:
+                for table, result in ohlc_storage.maintain_storage().items():
+                    self.stdout.write(
+                        f"  {table} ({result['layout']}): {result['partitions_created']} partitions created, "
+                        f"retention {result['retention']}"
+                    )
+        except (ValueError, RuntimeError) as e:
+            raise CommandError(str(e))
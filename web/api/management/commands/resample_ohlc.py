@@ -0,0 +1,46 @@
+"""
+python manage.py resample_ohlc [--source=1H] [--targets=4H,1D,1W] [--symbols=BTC/USD,ETH/USD] [--incremental]
+
+Build higher timeframes from stored bars with the set-based resampler (api.ohlc_resampler):
+one GROUP BY / upsert statement per target interval for all symbols.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.ohlc_resampler import resample_ohlc
+from api.pipeline.constants import SYMBOLS, INTERVALS
+
+
+class Command(BaseCommand):
+    help = "Rebuild higher OHLC timeframes (e.g. 4H / 1D / 1W) from a base interval"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', choices=list(INTERVALS), default='1H')
+        parser.add_argument('--targets', default='4H,1D,1W', help="Comma separated target intervals")
+        parser.add_argument('--symbols', help="Comma separated (default: all pipeline symbols)")
+        parser.add_argument('--since', type=int, help="Only buckets from this unix timestamp on")
+        parser.add_argument('--incremental', action='store_true',
+                            help="Only from the latest stored target bar of each symbol on")
+        parser.add_argument('--complete-only', action='store_true',
+                            help="Skip buckets with missing base bars (e.g. the bar still forming)")
+
+    def handle(self, *args, **options):
+        symbols = options['symbols'].split(',') if options['symbols'] else SYMBOLS
+        source = INTERVALS[options['source']]
+        targets = options['targets'].split(',')
+        unknown = [name for name in targets if name not in INTERVALS]
+        if unknown:
+            raise CommandError(f"Unknown intervals: {', '.join(unknown)}")
+
+        for name in targets:
+            started = time.perf_counter()
+            try:
+                inserted, updated = resample_ohlc(
+                    symbols, INTERVALS[name], source, since=options['since'],
+                    incremental=options['incremental'], complete_only=options['complete_only'],
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(f"✅ {options['source']} -> {name}: {inserted} inserted, {updated} updated "
+                              f"({time.perf_counter() - started:.1f}s)")
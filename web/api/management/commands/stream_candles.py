@@ -0,0 +1,139 @@
+"""
+python manage.py stream_candles [--source=kraken|bitstamp] [--symbols=BTC/USD,ETH/USD] [--trigger-pipeline]
+
+Long-running streaming candle builder: subscribes to the exchange trade stream and
+aggregates every trade into the open 1m/5m/15m/1H/4H/1D bars (api.candles.CandleAggregator).
+Closed bars are upserted in batches, open bars are published to Redis (live_candle:*).
+With --trigger-pipeline every closed 1H/4H/1D bar starts the indicator / regime / signal
+pipeline for its interval without a REST fetch.
+"""
+import asyncio
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from api.candles import (CandleAggregator, KRAKEN_WS_PAIRS, KRAKEN_WS_SYMBOLS, STREAM_INTERVALS,
+                         bitstamp_channel)
+from api.ohlc_writer import BITSTAMP_MARKET_ID, KRAKEN_MARKET_ID
+from api.pipeline.constants import SYMBOLS, INTERVALS
+
+BITSTAMP_WS_URL = "wss://ws.bitstamp.net"
+RECONNECT_CHECK = 5  # seconds between stream health checks
+
+
+def trigger_pipeline(bars):
+    """on_close callback: run the pipeline for the pipeline intervals that just closed"""
+    from api.tasks import run_pipeline_workflow
+
+    closed = defaultdict(set)
+    for bar in bars:
+        if bar['interval'] in INTERVALS.values():
+            closed[bar['interval']].add(bar['symbol'])
+    for interval, symbols in closed.items():
+        run_pipeline_workflow.delay(sorted(symbols), [interval], fetch=False)
+
+
+class KrakenStream:
+    """Kraken trade channel through the existing KrakenDataProvider websocket thread"""
+
+    def __init__(self, symbols, aggregator):
+        from api.providers.kraken_provider import get_kraken_provider
+
+        self.provider = get_kraken_provider()
+        self.pairs = [KRAKEN_WS_PAIRS[symbol] for symbol in symbols]
+        self.provider.register_callback('trade', lambda pair, trade: aggregator.submit_trade(
+            KRAKEN_WS_SYMBOLS.get(pair, pair), trade['price'], trade['volume'], trade['timestamp']))
+
+    def start(self):
+        self.provider.start_websocket(subscriptions=[
+            {"event": "subscribe", "pair": self.pairs, "subscription": {"name": "trade"}},
+        ])
+
+    def alive(self):
+        return self.provider.ws_client is not None
+
+    def stop(self):
+        self.provider.stop_websocket()
+
+
+class BitstampStream:
+    """Bitstamp live_trades channels through the existing WebSocketClient thread"""
+
+    def __init__(self, symbols, aggregator):
+        from api.wsclient import WebSocketClient
+
+        self.client_class = WebSocketClient
+        self.channels = [bitstamp_channel(symbol) for symbol in symbols]
+        self.on_trade = aggregator.submit_trade
+        self.client = None
+
+    def start(self):
+        self.client = self.client_class(BITSTAMP_WS_URL, on_trade=self.on_trade, channels=self.channels)
+        self.client.start()
+
+    def alive(self):
+        return self.client is not None and self.client.is_alive()
+
+    def stop(self):
+        if self.client is not None:
+            self.client.stop()
+
+
+class Command(BaseCommand):
+    help = "Aggregate the live trade stream into OHLC bars in real time (qt_ohlc_m / qt_ohlc)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', choices=['kraken', 'bitstamp'], default='kraken')
+        parser.add_argument('--symbols', help="Comma separated (default: all pipeline symbols)")
+        parser.add_argument('--intervals', help="Comma separated bar sizes in seconds "
+                                                f"(default: {','.join(map(str, STREAM_INTERVALS))})")
+        parser.add_argument('--flush-interval', type=float, default=5.0,
+                            help="Seconds between database writes of the closed bars")
+        parser.add_argument('--no-publish', action='store_true', help="Do not publish open bars to Redis")
+        parser.add_argument('--trigger-pipeline', action='store_true',
+                            help="Run the pipeline (without fetch) when 1H/4H/1D bars close")
+
+    def handle(self, *args, **options):
+        symbols = options['symbols'].split(',') if options['symbols'] else SYMBOLS
+        intervals = [int(i) for i in options['intervals'].split(',')] if options['intervals'] else STREAM_INTERVALS
+        if options['source'] == 'kraken':
+            symbols = [symbol for symbol in symbols if symbol in KRAKEN_WS_PAIRS]
+
+        aggregator = CandleAggregator(
+            intervals=intervals,
+            market_id=KRAKEN_MARKET_ID if options['source'] == 'kraken' else BITSTAMP_MARKET_ID,
+            flush_interval=options['flush_interval'],
+            publish_interval=0 if options['no_publish'] else 1.0,
+            on_close=[trigger_pipeline] if options['trigger_pipeline'] else None,
+        )
+        stream_class = KrakenStream if options['source'] == 'kraken' else BitstampStream
+        stream = stream_class(symbols, aggregator)
+
+        self.stdout.write(f"📡 Streaming {options['source']} trades of {len(symbols)} symbols into "
+                          f"{', '.join(map(str, intervals))}s bars")
+        try:
+            asyncio.run(self.run(aggregator, stream))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stream.stop()
+            self.stdout.write(f"🛑 Stopped: {aggregator.stats}")
+
+    async def run(self, aggregator, stream):
+        aggregator_task = asyncio.create_task(aggregator.run())
+        await asyncio.sleep(0)  # aggregator.loop is set before the first trade arrives
+        stream.start()
+        try:
+            while not aggregator_task.done():
+                await asyncio.sleep(RECONNECT_CHECK)
+                if not stream.alive():
+                    # Trades were missed: the bars open now are not written
+                    self.stderr.write("⚠️  Trade stream disconnected, reconnecting...")
+                    aggregator.mark_gap()
+                    stream.start()
+        finally:
+            aggregator_task.cancel()
+            try:
+                await aggregator_task
+            except asyncio.CancelledError:
+                pass
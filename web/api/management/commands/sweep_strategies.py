@@ -0,0 +1,76 @@
+"""
+python manage.py sweep_strategies [--interval=1D] [--symbols=BTC/USD,ETH/USD] [--grid name=v1,v2 ...]
+
+Grid search of the strategy thresholds (regime ADX / channel thresholds, deviation and gain
+penalty tiers) and trading parameters over the OHLC history, on all cores. Tier values are
+written with ':' (e.g. --grid deviation_tiers=3:5:10,5:10:15). Results are ranked and saved
+to qt_strategy_sweep_result.
+"""
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.pipeline import sweep
+from api.pipeline.backtest import DEFAULT_PARAMS, DEFAULT_THRESHOLDS
+from api.pipeline.constants import SYMBOLS, INTERVALS
+
+
+def parse_value(text):
+    """'25' -> 25, '0.5' -> 0.5, 'true' -> True, '3:5:10' -> (3, 5, 10)"""
+    if ':' in text:
+        return tuple(parse_value(part) for part in text.split(':'))
+    if text.lower() in ('true', 'false'):
+        return text.lower() == 'true'
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+class Command(BaseCommand):
+    help = "Parallel parameter sweep of the signal strategy thresholds (results in qt_strategy_sweep_result)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', choices=list(INTERVALS), default='1D')
+        parser.add_argument('--symbols', help="Comma separated (default: all pipeline symbols)")
+        parser.add_argument('--since', help="Only bars from this date (YYYY-MM-DD)")
+        parser.add_argument('--grid', action='append', default=[], metavar='NAME=V1,V2',
+                            help=f"Values to sweep (repeatable; replaces the default grid). "
+                                 f"Names: {', '.join(list(DEFAULT_THRESHOLDS) + list(DEFAULT_PARAMS))}")
+        parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+                            help="Fixed value of a parameter that is not swept, e.g. --set fee_pct=0.1")
+        parser.add_argument('--rank-by', choices=sweep.RANK_METRICS, default='total_return_pct')
+        parser.add_argument('--workers', type=int, help="Worker processes (default: all cores)")
+        parser.add_argument('--top', type=int, default=10, help="Best combinations to print")
+        parser.add_argument('--no-save', action='store_true', help="Do not write the results table")
+
+    def handle(self, *args, **options):
+        symbols = options['symbols'].split(',') if options['symbols'] else SYMBOLS
+        since = (datetime.strptime(options['since'], '%Y-%m-%d').replace(tzinfo=timezone.utc)
+                 if options['since'] else None)
+
+        try:
+            grid = {}
+            for item in options['grid']:
+                name, values = item.split('=', 1)
+                grid[name] = [parse_value(value) for value in values.split(',')]
+            base_params = {}
+            for item in options['set']:
+                name, value = item.split('=', 1)
+                base_params[name] = parse_value(value)
+
+            sweep_id, results = sweep.run_sweep(
+                symbols, INTERVALS[options['interval']], grid=grid or None, since=since,
+                base_params=base_params, rank_by=options['rank_by'], workers=options['workers'],
+                save=not options['no_save'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"\nTop {min(options['top'], len(results))} by {options['rank_by']}:")
+        for rank, (combination, stats, _) in enumerate(results[:options['top']], 1):
+            hit_rate = '--' if stats['hit_rate'] is None else f"{stats['hit_rate']:.1f}%"
+            self.stdout.write(
+                f"  #{rank:<3} return {stats['total_return_pct']:+8.1f}%  max DD {stats['max_drawdown_pct']:7.1f}%  "
+                f"hit {hit_rate:>6}  trades {stats['trades']:>6}  {combination}"
+            )
@@ -0,0 +1,56 @@
+"""
+python manage.py ticker_service [--interval=10] [--no-websocket]
+
+Background ticker service (docker compose service ticker-service): refreshes the ticker
+snapshot of all venues in Redis (api.ticker_snapshot) every --interval seconds and keeps
+the Bitstamp live-trade websocket client running, so the dashboard never calls an
+exchange while rendering a page. The service is the only owner of the websocket client:
+it subscribes the live trades of TRADING_PAIRS and of every enabled symbol.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.models import SymbolInfo
+from api.ticker_snapshot import TICKER_REFRESH_INTERVAL, refresh_ticker_snapshot
+from api import wsclient
+
+
+def live_trade_channels():
+    """TRADING_PAIRS plus the live-trade channels of enabled symbols missing from it"""
+    enabled = SymbolInfo.objects.filter(trading="Enabled").values_list('url_symbol', flat=True)
+    channels = list(wsclient.TRADING_PAIRS)
+    channels += [channel for channel in dict.fromkeys('live_trades_' + symbol for symbol in enabled)
+                 if channel not in channels]
+    return channels
+
+
+class Command(BaseCommand):
+    help = "Keep the ticker snapshot of all venues fresh (Kraken, IBKR) and the Bitstamp websocket running"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=TICKER_REFRESH_INTERVAL,
+                            help="Seconds between snapshot refreshes")
+        parser.add_argument('--no-websocket', action='store_true',
+                            help="Do not run the Bitstamp live-trade websocket client")
+        parser.add_argument('--once', action='store_true', help="Refresh once and exit")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"📡 Ticker service: refreshing every {options['interval']}s")
+        snapshot = None
+        try:
+            while True:
+                started = time.monotonic()
+                if not options['no_websocket'] and (wsclient.wsCli is None or not wsclient.wsCli.is_alive()):
+                    wsclient.ws_client('start', channels=live_trade_channels())  # (re)start the client thread
+                snapshot = refresh_ticker_snapshot(previous=snapshot)
+                if options['once']:
+                    self.stdout.write(f"✅ Kraken: {len(snapshot['kraken'])} pairs, IBKR: {len(snapshot['ibkr'])} symbols")
+                    return
+                time.sleep(max(0.0, options['interval'] - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if not options['no_websocket']:
+                wsclient.ws_client('stop')
+            self.stdout.write("🛑 Ticker service stopped")
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_sync_ema_fields_and_confidence_breakdown'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PipelineStageRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('run_id', models.CharField(max_length=36)),
+                ('stage', models.CharField(max_length=30)),
+                ('symbol', models.CharField(max_length=10, null=True)),
+                ('interval', models.IntegerField(null=True)),
+                ('status', models.CharField(max_length=20)),
+                ('started_at', models.DateTimeField()),
+                ('duration', models.FloatField()),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'qt_pipeline_stage_run',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['run_id', 'stage'], name='qt_pipeline_run_id_c8a4aa_idx'), models.Index(fields=['started_at'], name='qt_pipeline_started_58065d_idx')],
+            },
+        ),
+    ]
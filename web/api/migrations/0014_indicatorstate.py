@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:26
+
+import django_unixdatetimefield.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_pipelinestagerun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndicatorState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=10)),
+                ('interval', models.IntegerField()),
+                ('unix', django_unixdatetimefield.fields.UnixDateTimeField()),
+                ('state', models.JSONField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'qt_indicator_state',
+                'unique_together': {('symbol', 'interval')},
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:36
+
+from django.db import migrations
+
+# Keep the most recently written row of every duplicated (symbol, interval, unix) bar
+DEDUPLICATE_SQL = """
+DELETE FROM {table} AS older
+USING {table} AS newer
+WHERE older.symbol = newer.symbol
+  AND older.interval = newer.interval
+  AND older.unix = newer.unix
+  AND older.id < newer.id;
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_indicatorstate'),
+    ]
+
+    operations = [
+        migrations.RunSQL(DEDUPLICATE_SQL.format(table='qt_ohlc'), migrations.RunSQL.noop),
+        migrations.RunSQL(DEDUPLICATE_SQL.format(table='qt_ohlc_m'), migrations.RunSQL.noop),
+        migrations.AlterUniqueTogether(
+            name='ohlcprice',
+            unique_together={('symbol', 'interval', 'unix')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='ohlcpriceminute',
+            unique_together={('symbol', 'interval', 'unix')},
+        ),
+    ]
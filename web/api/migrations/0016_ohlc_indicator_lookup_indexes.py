@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:37
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without locking writes on the (large) OHLC tables
+    atomic = False
+
+    dependencies = [
+        ('api', '0015_ohlc_unique_symbol_interval_unix'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='indicator',
+            index=models.Index(fields=['symbol', 'interval', 'timestamp'], name='qt_indicato_symbol_d1678b_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ohlcprice',
+            index=models.Index(fields=['symbol', 'interval', 'date'], include=('open', 'high', 'low', 'close', 'volume'), name='qt_ohlc_sym_int_date_cov'),
+        ),
+        AddIndexConcurrently(
+            model_name='ohlcprice',
+            index=models.Index(fields=['symbol', 'date'], name='qt_ohlc_symbol_aa0f98_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ohlcpriceminute',
+            index=models.Index(fields=['symbol', 'interval', 'date'], name='qt_ohlc_m_symbol_d28d11_idx'),
+        ),
+    ]
@@ -0,0 +1,205 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_ohlc_indicator_lookup_indexes'),
+    ]
+
+    operations = [
+        # 0012 only added the EMA-33 columns to the migration state (they were created by
+        # hand on the existing database) - create them on fresh databases before altering them
+        migrations.RunSQL(
+            "ALTER TABLE qt_indicator ADD COLUMN IF NOT EXISTS ema_high_33 numeric(18, 8) NULL, "
+            "ADD COLUMN IF NOT EXISTS ema_low_33 numeric(18, 8) NULL",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AlterField(
+            model_name='indicator',
+            name='adx',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicator',
+            name='ema',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicator',
+            name='ema_high_33',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicator',
+            name='ema_low_33',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicator',
+            name='histogram',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicator',
+            name='kdj_d',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicator',
+            name='kdj_j',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicator',
+            name='kdj_k',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicator',
+            name='lower_ema',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicator',
+            name='ma_20',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicator',
+            name='ma_50',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicator',
+            name='macd',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicator',
+            name='rsi',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicator',
+            name='signal_line',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicator',
+            name='stoch_d',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicator',
+            name='stoch_k',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicator',
+            name='upper_ema',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicator',
+            name='volume',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicatorminute',
+            name='ema',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicatorminute',
+            name='histogram',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicatorminute',
+            name='kdj_d',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicatorminute',
+            name='kdj_j',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicatorminute',
+            name='kdj_k',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicatorminute',
+            name='lower_ema',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicatorminute',
+            name='ma_20',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicatorminute',
+            name='ma_50',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicatorminute',
+            name='macd',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicatorminute',
+            name='rsi',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicatorminute',
+            name='signal_line',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicatorminute',
+            name='stoch_d',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicatorminute',
+            name='stoch_k',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicatorminute',
+            name='upper_ema',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='indicatorminute',
+            name='volume',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='marketregime',
+            name='adx',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='marketregime',
+            name='channel_in_pct',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='marketregime',
+            name='channel_width_pct',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='marketregime',
+            name='volume_ratio',
+            field=models.FloatField(null=True),
+        ),
+    ]
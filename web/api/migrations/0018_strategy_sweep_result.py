@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_analytics_float_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StrategySweepResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sweep_id', models.CharField(max_length=36)),
+                ('interval', models.IntegerField()),
+                ('symbols', models.JSONField()),
+                ('rank', models.IntegerField()),
+                ('rank_by', models.CharField(max_length=30)),
+                ('score', models.FloatField(null=True)),
+                ('params', models.JSONField()),
+                ('trades', models.IntegerField()),
+                ('hit_rate', models.FloatField(null=True)),
+                ('total_return_pct', models.FloatField()),
+                ('max_drawdown_pct', models.FloatField()),
+                ('avg_trade_pct', models.FloatField(null=True)),
+                ('symbol_stats', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'qt_strategy_sweep_result',
+                'ordering': ['sweep_id', 'rank'],
+                'indexes': [models.Index(fields=['sweep_id', 'rank'], name='qt_strategy_sweep_i_bcaf8e_idx'), models.Index(fields=['created_at'], name='qt_strategy_created_eabb88_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Point the state of every pair at its newest indicator, regime and active signal
+NEWEST_ROW_SQL = ("(SELECT o.id FROM {table} o WHERE o.symbol = p.symbol AND o.interval = p.interval{condition} "
+                  "ORDER BY o.timestamp DESC, o.id DESC LIMIT 1)")
+
+BACKFILL_SQL = f"""
+INSERT INTO qt_latest_state (symbol, interval, indicator_id, regime_id, signal_id, updated_at)
+SELECT p.symbol, p.interval,
+       {NEWEST_ROW_SQL.format(table='qt_indicator', condition='')},
+       {NEWEST_ROW_SQL.format(table='qt_market_regime', condition='')},
+       {NEWEST_ROW_SQL.format(table='qt_trading_signal', condition=" AND o.status = 'active'")},
+       now()
+FROM (SELECT DISTINCT symbol, interval FROM qt_indicator
+      UNION SELECT DISTINCT symbol, interval FROM qt_market_regime
+      UNION SELECT DISTINCT symbol, interval FROM qt_trading_signal) AS p;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_strategy_sweep_result'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LatestState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=10)),
+                ('interval', models.IntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('indicator', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api.indicator')),
+                ('regime', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api.marketregime')),
+                ('signal', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api.tradingsignal')),
+            ],
+            options={
+                'db_table': 'qt_latest_state',
+                'unique_together': {('symbol', 'interval')},
+            },
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_latest_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackfillCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=20)),
+                ('symbol', models.CharField(max_length=10)),
+                ('interval', models.IntegerField()),
+                ('cursor', models.BigIntegerField(null=True)),
+                ('status', models.CharField(default='running', max_length=20)),
+                ('pages', models.IntegerField(default=0)),
+                ('rows', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'qt_backfill_checkpoint',
+                'unique_together': {('source', 'symbol', 'interval')},
+            },
+        ),
+    ]
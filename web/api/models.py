@@ -37,6 +37,13 @@ class OhlcPrice(models.Model):
     class Meta:
         managed = True
         db_table = 'qt_ohlc'
+        unique_together = ('symbol', 'interval', 'unix')
+        indexes = [
+            # Latest bars of a (symbol, interval), covering the price columns for index-only scans
+            models.Index(fields=['symbol', 'interval', 'date'], include=['open', 'high', 'low', 'close', 'volume'],
+                         name='qt_ohlc_sym_int_date_cov'),
+            models.Index(fields=['symbol', 'date']),  # latest bar of a symbol on any interval
+        ]
 
 class OhlcPriceMinute(models.Model):
     unix = UnixDateTimeField()
@@ -54,6 +61,10 @@ class OhlcPriceMinute(models.Model):
     class Meta:
         managed = True
         db_table = 'qt_ohlc_m'
+        unique_together = ('symbol', 'interval', 'unix')
+        indexes = [
+            models.Index(fields=['symbol', 'interval', 'date']),
+        ]
 
     def __str__(self):
         return self.symbol
@@ -77,55 +88,71 @@ class TslaPrice(models.Model):
 
 
 class Indicator(models.Model):
+    # Analytic series - double precision (Decimal is kept for booked money: UserTrade, Portfolio)
     unix = UnixDateTimeField()
     timestamp = models.DateTimeField()
     symbol = models.CharField(max_length=10)
     interval = models.IntegerField()
-    volume = models.DecimalField(max_digits=20, decimal_places=8, null=True)  # This field type is a guess.
-    ma_20 = models.DecimalField(max_digits=18, decimal_places=8, null=True)
-    ma_50 = models.DecimalField(max_digits=18, decimal_places=8, null=True)
-    macd = models.DecimalField(max_digits=18, decimal_places=8, null=True)
-    signal_line = models.DecimalField(max_digits=18, decimal_places=8, null=True)
-    histogram = models.DecimalField(max_digits=18, decimal_places=8, null=True)
-    rsi = models.DecimalField(max_digits=18, decimal_places=8, null=True)    #relative_strength_index
-    stoch_k = models.DecimalField(max_digits=18, decimal_places=8, null=True)   #stochastic_oscillator_k
-    stoch_d = models.DecimalField(max_digits=18, decimal_places=8, null=True)   #stochastic_oscillator_d
-    ema = models.DecimalField(max_digits=18, decimal_places=8, null=True)
-    upper_ema = models.DecimalField(max_digits=18, decimal_places=8, null=True)
-    lower_ema = models.DecimalField(max_digits=18, decimal_places=8, null=True)
-    kdj_k = models.DecimalField(max_digits=18, decimal_places=8, null=True)
-    kdj_d = models.DecimalField(max_digits=18, decimal_places=8, null=True)
-    kdj_j = models.DecimalField(max_digits=18, decimal_places=8, null=True)
+    volume = models.FloatField(null=True)
+    ma_20 = models.FloatField(null=True)
+    ma_50 = models.FloatField(null=True)
+    macd = models.FloatField(null=True)
+    signal_line = models.FloatField(null=True)
+    histogram = models.FloatField(null=True)
+    rsi = models.FloatField(null=True)    #relative_strength_index
+    stoch_k = models.FloatField(null=True)   #stochastic_oscillator_k
+    stoch_d = models.FloatField(null=True)   #stochastic_oscillator_d
+    ema = models.FloatField(null=True)
+    upper_ema = models.FloatField(null=True)
+    lower_ema = models.FloatField(null=True)
+    kdj_k = models.FloatField(null=True)
+    kdj_d = models.FloatField(null=True)
+    kdj_j = models.FloatField(null=True)
     # EMA Channel (轨道当值) indicators
-    ema_high_33 = models.DecimalField(max_digits=18, decimal_places=8, null=True)  # 上轨当值 (EMA of High prices, 33 periods)
-    ema_low_33 = models.DecimalField(max_digits=18, decimal_places=8, null=True)   # 下轨当值 (EMA of Low prices, 33 periods)
+    ema_high_33 = models.FloatField(null=True)  # 上轨当值 (EMA of High prices, 33 periods)
+    ema_low_33 = models.FloatField(null=True)   # 下轨当值 (EMA of Low prices, 33 periods)
     # ADX for trend strength
-    adx = models.DecimalField(max_digits=18, decimal_places=8, null=True)  # Average Directional Index
+    adx = models.FloatField(null=True)  # Average Directional Index
 
     class Meta:
         db_table = 'qt_indicator'
         unique_together = ('symbol', 'interval', 'unix')
+        indexes = [
+            models.Index(fields=['symbol', 'interval', 'timestamp']),
+        ]
+
+class IndicatorState(models.Model):
+    """Smoothing state of the indicator series - lets indicators be computed incrementally"""
+    symbol = models.CharField(max_length=10)
+    interval = models.IntegerField()
+    unix = UnixDateTimeField()  # Last bar already folded into the state
+    state = models.JSONField()  # SMA window, EMA/MACD/RSI/ADX smoothing state
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'qt_indicator_state'
+        unique_together = ('symbol', 'interval')
 
 class IndicatorMinute(models.Model):
     unix = UnixDateTimeField()
     timestamp = models.DateTimeField()
     symbol = models.CharField(max_length=10)
     interval = models.IntegerField()
-    volume = models.DecimalField(max_digits=20, decimal_places=8, null=True)  # This field type is a guess.
-    ma_20 = models.DecimalField(max_digits=18, decimal_places=8, null=True)
-    ma_50 = models.DecimalField(max_digits=18, decimal_places=8, null=True)
-    macd = models.DecimalField(max_digits=18, decimal_places=8, null=True)
-    signal_line = models.DecimalField(max_digits=18, decimal_places=8, null=True)
-    histogram = models.DecimalField(max_digits=18, decimal_places=8, null=True)
-    rsi = models.DecimalField(max_digits=18, decimal_places=8, null=True)    #relative_strength_index
-    stoch_k = models.DecimalField(max_digits=18, decimal_places=8, null=True)   #stochastic_oscillator_k
-    stoch_d = models.DecimalField(max_digits=18, decimal_places=8, null=True)   #stochastic_oscillator_d
-    ema = models.DecimalField(max_digits=18, decimal_places=8, null=True)
-    upper_ema = models.DecimalField(max_digits=18, decimal_places=8, null=True)
-    lower_ema = models.DecimalField(max_digits=18, decimal_places=8, null=True)
-    kdj_k = models.DecimalField(max_digits=18, decimal_places=8, null=True)
-    kdj_d = models.DecimalField(max_digits=18, decimal_places=8, null=True)
-    kdj_j = models.DecimalField(max_digits=18, decimal_places=8, null=True)
+    volume = models.FloatField(null=True)
+    ma_20 = models.FloatField(null=True)
+    ma_50 = models.FloatField(null=True)
+    macd = models.FloatField(null=True)
+    signal_line = models.FloatField(null=True)
+    histogram = models.FloatField(null=True)
+    rsi = models.FloatField(null=True)    #relative_strength_index
+    stoch_k = models.FloatField(null=True)   #stochastic_oscillator_k
+    stoch_d = models.FloatField(null=True)   #stochastic_oscillator_d
+    ema = models.FloatField(null=True)
+    upper_ema = models.FloatField(null=True)
+    lower_ema = models.FloatField(null=True)
+    kdj_k = models.FloatField(null=True)
+    kdj_d = models.FloatField(null=True)
+    kdj_j = models.FloatField(null=True)
 
 
     class Meta:
@@ -217,17 +244,17 @@ class MarketRegime(models.Model):
     trend_direction = models.CharField(max_length=10, null=True)
     
     # ADX value for trend strength
-    adx = models.DecimalField(max_digits=18, decimal_places=2, null=True)
+    adx = models.FloatField(null=True)
     
     # Channel metrics
-    channel_in_pct = models.DecimalField(max_digits=5, decimal_places=2, null=True)  # % of time inside channel (last 20 bars)
-    channel_width_pct = models.DecimalField(max_digits=5, decimal_places=2, null=True)  # Channel width as % of price
+    channel_in_pct = models.FloatField(null=True)  # % of time inside channel (last 20 bars)
+    channel_width_pct = models.FloatField(null=True)  # Channel width as % of price
     
     # Multi-timeframe trend
     higher_tf_trend = models.CharField(max_length=10, null=True)  # Trend from higher timeframe
     
     # Volume metrics
-    volume_ratio = models.DecimalField(max_digits=5, decimal_places=2, null=True)  # Current volume vs 20-period average
+    volume_ratio = models.FloatField(null=True)  # Current volume vs 20-period average
     
     class Meta:
         db_table = 'qt_market_regime'
@@ -298,3 +325,112 @@ class TradingSignal(models.Model):
     
     def __str__(self):
         return f"{self.symbol} {self.signal_type.upper()} @ {self.entry_price} ({self.confidence}%)"
+
+
+class PipelineStageRun(models.Model):
+    """Pipeline 阶段执行记录 - per-stage timing of each pipeline run"""
+    run_id = models.CharField(max_length=36)
+    stage = models.CharField(max_length=30)  # fetch, indicators, market_regime, signals
+    
+    # Pair processed by this stage (null when the stage ran for all pairs)
+    symbol = models.CharField(max_length=10, null=True)
+    interval = models.IntegerField(null=True)
+    
+    status = models.CharField(max_length=20)  # success, error
+    started_at = models.DateTimeField()
+    duration = models.FloatField()  # Wall time in seconds
+    result = models.JSONField(null=True, blank=True)  # Stage summary, e.g. {'success': 1, 'failed': 0}
+    error = models.TextField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'qt_pipeline_stage_run'
+        indexes = [
+            models.Index(fields=['run_id', 'stage']),
+            models.Index(fields=['started_at']),
+        ]
+        ordering = ['-started_at']
+    
+    def __str__(self):
+        pair = f" {self.symbol} {self.interval}s" if self.symbol else ""
+        return f"{self.run_id[:8]} {self.stage}{pair}: {self.status} ({self.duration:.2f}s)"
+
+
+class StrategySweepResult(models.Model):
+    """策略参数扫描结果 - one ranked parameter combination of a sweep (api.pipeline.sweep)"""
+    sweep_id = models.CharField(max_length=36)
+    interval = models.IntegerField()
+    symbols = models.JSONField()  # Symbols backtested, e.g. ['BTC/USD', 'ETH/USD']
+    
+    rank = models.IntegerField()  # 1 = best by rank_by
+    rank_by = models.CharField(max_length=30)
+    score = models.FloatField(null=True)
+    params = models.JSONField()  # Thresholds / trading parameters of this combination
+    
+    # Aggregated over the symbols (mean; max_drawdown_pct is the worst symbol)
+    trades = models.IntegerField()
+    hit_rate = models.FloatField(null=True)
+    total_return_pct = models.FloatField()
+    max_drawdown_pct = models.FloatField()
+    avg_trade_pct = models.FloatField(null=True)
+    symbol_stats = models.JSONField()  # Per-symbol backtest statistics
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'qt_strategy_sweep_result'
+        indexes = [
+            models.Index(fields=['sweep_id', 'rank']),
+            models.Index(fields=['created_at']),
+        ]
+        ordering = ['sweep_id', 'rank']
+    
+    def __str__(self):
+        return f"{self.sweep_id[:8]} #{self.rank} {self.rank_by}={self.score}"
+
+
+class LatestState(models.Model):
+    """最新状态 - newest indicator, market regime and active signal per (symbol, interval)
+
+    Maintained by the pipeline stages in the transaction that writes the rows
+    (api.latest_state), so readers get them with one primary-key lookup. The references
+    are kept without foreign key constraints: the stages replace rows (regimes are deleted
+    and re-inserted) and repoint the state in the same transaction.
+    """
+    symbol = models.CharField(max_length=10)
+    interval = models.IntegerField()
+    
+    indicator = models.ForeignKey(Indicator, on_delete=models.DO_NOTHING, null=True, db_constraint=False, related_name='+')
+    regime = models.ForeignKey(MarketRegime, on_delete=models.DO_NOTHING, null=True, db_constraint=False, related_name='+')
+    signal = models.ForeignKey(TradingSignal, on_delete=models.DO_NOTHING, null=True, db_constraint=False, related_name='+')  # Newest active signal
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'qt_latest_state'
+        unique_together = ('symbol', 'interval')
+    
+    def __str__(self):
+        return f"{self.symbol} {self.interval}s: indicator={self.indicator_id} regime={self.regime_id} signal={self.signal_id}"
+
+
+class BackfillCheckpoint(models.Model):
+    """历史数据回填进度 - resumable cursor of one (source, symbol, interval) backfill (api.backfill)"""
+    source = models.CharField(max_length=20)  # kraken
+    symbol = models.CharField(max_length=10)
+    interval = models.IntegerField()
+    
+    cursor = models.BigIntegerField(null=True)  # `since` of the next page (unix seconds)
+    status = models.CharField(max_length=20, default='running')  # running, paused, done, error
+    pages = models.IntegerField(default=0)
+    rows = models.IntegerField(default=0)  # Bars written (inserted + updated)
+    error = models.TextField(null=True, blank=True)
+    
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'qt_backfill_checkpoint'
+        unique_together = ('source', 'symbol', 'interval')
+    
+    def __str__(self):
+        return f"{self.source} {self.symbol} {self.interval}s: {self.status} @ {self.cursor} ({self.pages} pages)"
@@ -0,0 +1,190 @@
+"""
+OHLC archive - closed bars of past months as Parquet files, read memory-mapped
+
+Past candles rarely change, yet backtests, sweeps and full indicator runs read them from
+Postgres again on every run. Bars that closed before the current month are exported once
+per (table, symbol, interval, month):
+
+    <OHLC_ARCHIVE_DIR>/<table>/<symbol>/<interval>/<YYYY-MM>.parquet   (BTC/USD -> BTC-USD)
+
+with the loader's columns (unix, date as int64, open/high/low/close/volume as float64).
+A bar still open at the start of the current month (e.g. the 1W bar crossing the month
+boundary) stays in the database. api.ohlc_loader reads long histories (loads without
+`limit`) from these files through Arrow with memory mapping and only queries the database
+for the bars after the last archived bar. Notebooks can read the same files with
+pandas / pyarrow directly.
+
+The archive is a cache: `python manage.py archive_ohlc` (and the daily Celery task)
+appends newly closed bars; every OHLC write (upsert_ohlc, resampler, importer) drops the
+archived months of a pair from its oldest changed bar on (api.ohlc_writer.invalidate_after_write).
+Without pyarrow the loader reads everything from the database.
+"""
+import logging
+import os
+import shutil
+from datetime import datetime, timezone
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_COLUMNS = ['unix', 'date', 'open', 'high', 'low', 'close', 'volume']
+
+
+def archive_enabled():
+    """Archive directory configured and pyarrow installed"""
+    if not getattr(settings, 'OHLC_ARCHIVE_DIR', None):
+        return False
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def month_start(unix):
+    """Epoch seconds of the first second of the (UTC) month containing unix"""
+    date = datetime.fromtimestamp(unix, tz=timezone.utc)
+    return int(datetime(date.year, date.month, 1, tzinfo=timezone.utc).timestamp())
+
+
+def next_month(unix):
+    date = datetime.fromtimestamp(month_start(unix), tz=timezone.utc)
+    year, month = (date.year + 1, 1) if date.month == 12 else (date.year, date.month + 1)
+    return int(datetime(year, month, 1, tzinfo=timezone.utc).timestamp())
+
+
+def pair_dir(table, symbol, interval):
+    return os.path.join(settings.OHLC_ARCHIVE_DIR, table, symbol.replace('/', '-'), str(interval))
+
+
+def month_path(table, symbol, interval, month):
+    name = datetime.fromtimestamp(month, tz=timezone.utc).strftime('%Y-%m')
+    return os.path.join(pair_dir(table, symbol, interval), f'{name}.parquet')
+
+
+def archived_months(table, symbol, interval):
+    """Month starts (epoch seconds) archived for a pair, oldest first"""
+    directory = pair_dir(table, symbol, interval)
+    if not os.path.isdir(directory):
+        return []
+    months = []
+    for name in os.listdir(directory):
+        if name.endswith('.parquet'):
+            month = datetime.strptime(name[:-len('.parquet')], '%Y-%m').replace(tzinfo=timezone.utc)
+            months.append(int(month.timestamp()))
+    return sorted(months)
+
+
+def archive_end(table, symbol, interval):
+    """Unix of the last archived bar of a pair, None without archive"""
+    import pyarrow.parquet as pq
+
+    months = archived_months(table, symbol, interval)
+    if not months:
+        return None
+    unix = pq.read_table(month_path(table, symbol, interval, months[-1]), columns=['unix'], memory_map=True)
+    return int(unix.column('unix').to_numpy()[-1]) if unix.num_rows else months[-1] - 1
+
+
+def archive_pair(symbol, interval, model=None, rebuild=False, now=None):
+    """
+    Archive the bars of one pair closed before the current month that are not archived yet
+
+    The last archived month is written again, it may have missed bars that were still
+    open at the previous run.
+
+    Args:
+        model: OhlcPrice (default) or OhlcPriceMinute
+        rebuild: drop the archive of the pair and export every closed bar again
+        now: epoch seconds of "now" (bars ending after the start of its month stay in the database)
+
+    Returns: number of month files written
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from api.models import OhlcPrice
+    from api.ohlc_loader import load_ohlc_arrays
+
+    model = model or OhlcPrice
+    table = model._meta.db_table
+    if rebuild:
+        invalidate_archive(table, [(symbol, interval)])
+
+    open_month = month_start(int(now or datetime.now(timezone.utc).timestamp()))
+    months = archived_months(table, symbol, interval)
+    since = months[-1] - 1 if months else None
+    # Only bars with unix + interval <= start of the current month are final
+    columns = load_ohlc_arrays(symbol, interval, since=since, until=open_month - interval, model=model)
+    if not len(columns['unix']):
+        return 0
+
+    # Rows are ordered by unix: split them at the month boundaries
+    months = columns['unix'].astype('datetime64[s]').astype('datetime64[M]').astype('datetime64[s]').astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+    bounds = np.r_[starts, len(months)]
+
+    directory = pair_dir(table, symbol, interval)
+    os.makedirs(directory, exist_ok=True)
+    for begin, end in zip(bounds[:-1], bounds[1:]):
+        path = month_path(table, symbol, interval, int(months[begin]))
+        data = pa.table({column: columns[column][begin:end] for column in ARCHIVE_COLUMNS})
+        pq.write_table(data, path + '.tmp')
+        os.replace(path + '.tmp', path)  # readers never see a partial file
+    return len(starts)
+
+
+def read_archive(table, symbol, interval, since=None, until=None):
+    """
+    Archived bars of a pair with since < unix <= until, memory-mapped
+
+    Returns: dict of arrays with ARCHIVE_COLUMNS (oldest first), or None without archive
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    months = archived_months(table, symbol, interval)
+    if not months:
+        return None
+    months = [month for month in months
+              if (since is None or next_month(month) - 1 > since) and (until is None or month <= until)]
+
+    tables = [pq.read_table(month_path(table, symbol, interval, month), memory_map=True) for month in months]
+    if not tables:
+        return {column: np.empty(0, dtype=np.int64 if column in ('unix', 'date') else np.float64)
+                for column in ARCHIVE_COLUMNS}
+
+    data = pa.concat_tables(tables)
+    columns = {column: data.column(column).to_numpy() for column in ARCHIVE_COLUMNS}
+    mask = np.ones(len(columns['unix']), dtype=bool)
+    if since is not None:
+        mask &= columns['unix'] > since
+    if until is not None:
+        mask &= columns['unix'] <= until
+    return columns if mask.all() else {column: values[mask] for column, values in columns.items()}
+
+
+def invalidate_archive(table, pairs, since=None):
+    """
+    Drop archived months of pairs whose bars were rewritten
+
+    Args:
+        since: unix of the oldest rewritten bar - its month and all later months are
+               dropped (the archive stays contiguous), None = the whole archive of the pairs
+    """
+    if not getattr(settings, 'OHLC_ARCHIVE_DIR', None):
+        return
+    for symbol, interval in pairs:
+        directory = pair_dir(table, symbol, interval)
+        if not os.path.isdir(directory):
+            continue
+        if since is None:
+            shutil.rmtree(directory, ignore_errors=True)
+            logger.info(f"Dropped OHLC archive of {symbol} @ {interval}s ({table})")
+            continue
+        dropped = [month for month in archived_months(table, symbol, interval) if next_month(month) > since]
+        for month in dropped:
+            os.remove(month_path(table, symbol, interval, month))
+        if dropped:
+            logger.info(f"Dropped {len(dropped)} archived months of {symbol} @ {interval}s ({table})")
@@ -0,0 +1,196 @@
+"""
+OHLC importer - bulk load of downloaded candle files (CSV / Parquet) into qt_ohlc / qt_ohlc_m
+
+A file is read in chunks, every chunk is streamed with COPY into a temporary staging
+table, and the staged bars are merged into the OHLC table on its unique
+(symbol, interval, unix) key with one INSERT ... SELECT ... ON CONFLICT DO UPDATE - all in
+one transaction per file, so a failed file leaves nothing behind and a file can be loaded
+again without creating duplicates.
+
+Understood layouts (column names are matched case-insensitively):
+    CryptoDataDownload / Bitstamp   unix, date, symbol, open, high, low, close,
+                                    Volume <base>, Volume <quote>  (URL line before the header)
+    Yahoo Finance                   Date, Open, High, Low, Close, Adj Close, Volume
+    plain                           unix or date, open, high, low, close, volume[, volume_base][, symbol]
+
+Parquet files need pyarrow.
+"""
+import io
+import os
+import re
+import time
+
+import pandas as pd
+from django.db import connection, transaction
+
+from api.models import OhlcPrice
+from api.ohlc_writer import (BITSTAMP_MARKET_ID, OHLC_INSERT_COLUMNS, OHLC_UPDATE_COLUMNS, changed_sql,
+                             invalidate_after_write)
+
+IMPORT_CHUNK_ROWS = 100_000
+
+# Interval suffix of downloaded file names, e.g. Bitstamp_BTCUSD_1h.csv
+FILE_INTERVALS = {
+    'minute': 60, '1m': 60, '5m': 300, '15m': 900, '30m': 1800,
+    '1h': 3600, 'h': 3600, '4h': 14400, 'd': 86400, '1d': 86400, 'w': 604800, '1w': 604800,
+}
+
+STAGING_TABLE = 'ohlc_import_staging'
+STAGING_COLUMNS = [column for column in OHLC_INSERT_COLUMNS if column != 'date']
+
+
+def interval_from_filename(path):
+    """Interval in seconds from the file name suffix (Bitstamp_BTCUSD_1h.csv -> 3600), or None"""
+    stem = os.path.splitext(os.path.basename(path))[0].lower()
+    return FILE_INTERVALS.get(stem.rsplit('_', 1)[-1])
+
+
+def _csv_header_row(path):
+    """Line number of the header (CryptoDataDownload files start with their URL)"""
+    with open(path, encoding='utf8') as f:
+        for number, line in enumerate(f):
+            columns = [column.strip().strip("'\"").lower() for column in line.split(',')]
+            if 'open' in columns and 'close' in columns:
+                return number
+            if number > 10:
+                break
+    raise ValueError(f"{path}: no header with open / close columns")
+
+
+def read_chunks(path, chunk_rows=IMPORT_CHUNK_ROWS):
+    """Yield the file as DataFrames of at most chunk_rows rows"""
+    if path.lower().endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Parquet import needs pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, skiprows=_csv_header_row(path), quotechar="'",
+                               chunksize=chunk_rows, encoding='utf8')
+
+
+def normalize_chunk(df, symbol=None, interval=None, market_id=BITSTAMP_MARKET_ID):
+    """
+    Map a chunk of any understood layout onto the OHLC columns
+
+    Args:
+        symbol: symbol of all rows (default: the file's symbol column)
+        interval: interval in seconds of all rows
+        market_id: market of the rows (1 = Bitstamp, 2 = Kraken)
+
+    Returns: DataFrame with STAGING_COLUMNS (the date is derived from unix in the merge)
+    """
+    df = df.rename(columns=lambda column: str(column).strip().lower())
+    out = pd.DataFrame(index=df.index)
+
+    if 'unix' in df:
+        unix = pd.to_numeric(df['unix']).astype('int64')
+        out['unix'] = unix.where(unix < 10**11, unix // 1000)  # millisecond timestamps
+    else:
+        out['unix'] = pd.to_datetime(df['date'], utc=True).astype('int64') // 10**9
+
+    if symbol is None:
+        if 'symbol' not in df:
+            raise ValueError("The file has no symbol column - pass the symbol")
+        out['symbol'] = df['symbol'].str.strip()
+    else:
+        out['symbol'] = symbol
+    out['interval'] = interval
+
+    for column in ['open', 'high', 'low', 'close']:
+        out[column] = df[column]
+
+    # CryptoDataDownload: "Volume BTC" (base currency) -> volume, "Volume USD" (quote) -> volume_base
+    volumes = [column for column in df.columns if re.fullmatch(r'volume \w+', column)]
+    if 'volume' in df:
+        out['volume'] = df['volume']
+        out['volume_base'] = df['volume_base'] if 'volume_base' in df else None
+    elif volumes:
+        first_symbol = out['symbol'].iloc[0] if len(out) else ''
+        base = first_symbol.split('/')[0].lower()
+        base_volume = next((column for column in volumes if column == f'volume {base}'), volumes[0])
+        quote_volume = next((column for column in volumes if column != base_volume), None)
+        out['volume'] = df[base_volume]
+        out['volume_base'] = df[quote_volume] if quote_volume else None
+    else:
+        out['volume'] = None
+        out['volume_base'] = None
+
+    out['market_id'] = market_id
+    return out[STAGING_COLUMNS]
+
+
+def _merge_sql(table):
+    columns = ', '.join(OHLC_INSERT_COLUMNS)
+    updates = ', '.join(f"{column} = EXCLUDED.{column}" for column in OHLC_UPDATE_COLUMNS)
+    # Same counting as upsert_ohlc; a later row of the file wins if a bar appears twice
+    staged = ', '.join('to_timestamp(unix) AS date' if column == 'date' else column for column in OHLC_INSERT_COLUMNS)
+    return (
+        f"WITH incoming AS ("
+        f"SELECT DISTINCT ON (symbol, interval, unix) {staged} FROM {STAGING_TABLE} "
+        f"ORDER BY symbol, interval, unix, seq DESC), "
+        f"existing AS (SELECT count(*) AS n FROM {table} JOIN incoming USING (symbol, interval, unix)), "
+        f"written AS ("
+        f"INSERT INTO {table} ({columns}) SELECT {columns} FROM incoming "
+        f"ON CONFLICT (symbol, interval, unix) DO UPDATE SET {updates}, "
+        f"volume_base = COALESCE(EXCLUDED.volume_base, {table}.volume_base) "
+        f"RETURNING 1) "
+        f"SELECT (SELECT count(*) FROM written), (SELECT n FROM existing), {changed_sql(table, 'incoming')}"
+    )
+
+
+def import_file(path, symbol=None, interval=None, model=OhlcPrice, market_id=BITSTAMP_MARKET_ID,
+                chunk_rows=IMPORT_CHUNK_ROWS, progress=None):
+    """
+    Load one CSV / Parquet file into the OHLC table (COPY into staging, then one merge)
+
+    Args:
+        path: .csv or .parquet file
+        symbol: symbol of all rows (default: the file's symbol column)
+        interval: interval in seconds (default: from the file name, e.g. _1h / _d)
+        model: OhlcPrice (default) or OhlcPriceMinute
+        market_id: market of the rows (default: Bitstamp)
+        progress: callable(message) for per-chunk progress
+
+    Returns: dict with rows (read), inserted, updated, seconds
+    """
+    interval = interval or interval_from_filename(path)
+    if not interval:
+        raise ValueError(f"{path}: interval not recognised from the file name - pass the interval")
+
+    started = time.perf_counter()
+    table = model._meta.db_table
+    columns = ', '.join(STAGING_COLUMNS)
+    rows = 0
+    pairs = set()
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE {STAGING_TABLE} ("
+            f"seq bigint GENERATED ALWAYS AS IDENTITY, unix bigint, symbol varchar(10), "
+            f"interval integer, open numeric, high numeric, low numeric, close numeric, "
+            f"volume numeric, volume_base numeric, market_id integer) ON COMMIT DROP"
+        )
+        for chunk in read_chunks(path, chunk_rows):
+            chunk = normalize_chunk(chunk, symbol=symbol, interval=interval, market_id=market_id)
+            buffer = io.StringIO()
+            chunk.to_csv(buffer, index=False, header=False)
+            buffer.seek(0)
+            cursor.cursor.copy_expert(f"COPY {STAGING_TABLE} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+            rows += len(chunk)
+            pairs.update((chunk_symbol, interval) for chunk_symbol in chunk['symbol'].unique())
+            if progress:
+                progress(f"  📦 {os.path.basename(path)}: {rows:,} rows staged")
+
+        cursor.execute(_merge_sql(table))
+        written, updated, changed = cursor.fetchone()
+        invalidate_after_write(table, pairs, changed=changed)
+
+    return {
+        'rows': rows,
+        'inserted': written - updated,
+        'updated': updated,
+        'seconds': time.perf_counter() - started,
+    }
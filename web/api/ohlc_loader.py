@@ -0,0 +1,281 @@
+"""
+Columnar OHLC loader - candles straight from Postgres into NumPy arrays / pandas DataFrames
+
+Loading candles through the ORM builds one model (or dict) per row and converts every
+numeric column from Decimal, which dominates runtime on long 1H histories. This loader
+streams the rows with ``COPY ... TO STDOUT (FORMAT binary)`` and decodes the whole
+buffer with a single ``np.frombuffer`` call. Other database backends fall back to a
+plain cursor ``fetchall``.
+
+Full histories (loads without ``limit``) read the closed months from the Parquet archive
+(api.ohlc_archive) when there is one, and only the bars after it from the database.
+"""
+import io
+import logging
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from django.db import connection
+
+from api import ohlc_archive
+from api.models import OhlcPrice
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+OHLC_COLUMNS = ['unix', 'date'] + PRICE_COLUMNS
+
+# Binary COPY file header: signature, flags, header extension length
+PGCOPY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00'
+PGCOPY_HEADER_SIZE = len(PGCOPY_SIGNATURE) + 4 + 4
+
+
+def _row_dtype(int_columns):
+    """
+    COPY binary row layout: field count, then (length, value) per column
+    Prices are COALESCEd to NaN and the int8 columns are NOT NULL, so every row has the same width.
+    """
+    fields = [('field_count', '>i2')]
+    for name, fmt in [(c, '>i8') for c in int_columns] + [(c, '>f8') for c in PRICE_COLUMNS]:
+        fields += [(f'{name}_len', '>i4'), (name, fmt)]
+    return np.dtype(fields)
+
+
+def _to_epoch(value):
+    """datetime / Timestamp / int -> epoch seconds"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    return int(value)
+
+
+def _build_query(table, symbols, interval, since=None, until=None, limit=None):
+    """
+    SELECT returning the int8 columns then float8 prices, ordered by unix
+
+    `symbols` is one symbol, or a list of symbols - then a leading symbol_index column
+    (position in the list) is returned and `limit` applies per symbol.
+    Returns: (sql, params, int_columns)
+    """
+    multi = isinstance(symbols, (list, tuple))
+    int_columns = (['symbol_index'] if multi else []) + ['unix', 'date']
+
+    select = ["unix::int8 AS unix", "(extract(epoch FROM date) * 1000000)::int8 AS date"]
+    select += [f"COALESCE({column}::float8, 'NaN'::float8) AS {column}" for column in PRICE_COLUMNS]
+    where = ["symbol = ANY(%s)" if multi else "symbol = %s", "interval = %s"]
+    params = [list(symbols) if multi else symbols, interval]
+    if since is not None:
+        where.append("unix > %s")
+        params.append(_to_epoch(since))
+    if until is not None:
+        where.append("unix <= %s")
+        params.append(_to_epoch(until))
+
+    if multi:
+        select.insert(0, "(array_position(%s::varchar[], symbol::varchar) - 1)::int8 AS symbol_index")
+        params.insert(0, list(symbols))
+        if limit:
+            # Most recent `limit` bars of every symbol
+            select.append("row_number() OVER (PARTITION BY symbol ORDER BY unix DESC) AS bar_rank")
+
+    sql = f"SELECT {', '.join(select)} FROM {table} WHERE {' AND '.join(where)}"
+    if limit and multi:
+        columns = ', '.join(int_columns + PRICE_COLUMNS)
+        sql = f"SELECT {columns} FROM ({sql}) AS ranked WHERE bar_rank <= %s"
+        params.append(int(limit))
+    elif limit:
+        # Most recent `limit` bars, returned oldest first
+        sql = f"SELECT * FROM ({sql} ORDER BY unix DESC LIMIT %s) AS recent"
+        params.append(int(limit))
+    return f"{sql} ORDER BY unix", params, int_columns
+
+
+def _parse_copy_binary(buffer, row_dtype):
+    """Decode a COPY binary buffer of fixed-width rows into a structured array"""
+    if buffer[:len(PGCOPY_SIGNATURE)] != PGCOPY_SIGNATURE:
+        raise ValueError("Not a PGCOPY binary buffer")
+
+    extension_size = int.from_bytes(buffer[PGCOPY_HEADER_SIZE - 4:PGCOPY_HEADER_SIZE], 'big')
+    offset = PGCOPY_HEADER_SIZE + extension_size
+    count = (len(buffer) - offset - 2) // row_dtype.itemsize  # 2 byte trailer
+
+    rows = np.frombuffer(buffer, dtype=row_dtype, count=count, offset=offset)
+    if count and (rows['field_count'] != (len(row_dtype.names) - 1) // 2).any():
+        raise ValueError("Unexpected field count in COPY buffer")
+    return rows
+
+
+def _fetch_copy(sql, params, int_columns):
+    """Run the query through COPY (FORMAT binary) and return native-endian column arrays"""
+    with connection.cursor() as cursor:
+        raw_cursor = cursor.cursor  # psycopg2 cursor underneath Django's wrapper
+        query = raw_cursor.mogrify(sql, params).decode()
+        buffer = io.BytesIO()
+        raw_cursor.copy_expert(f"COPY ({query}) TO STDOUT (FORMAT binary)", buffer)
+
+    rows = _parse_copy_binary(buffer.getbuffer(), _row_dtype(int_columns))
+    columns = {column: rows[column].astype(np.int64) for column in int_columns}
+    for column in PRICE_COLUMNS:
+        columns[column] = rows[column].astype(np.float64)
+    return columns
+
+
+def _fetch_rows(sql, params, int_columns):
+    """Plain cursor fallback (non-Postgres backends, COPY failures)"""
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    data = np.array(rows, dtype=np.float64).reshape(-1, len(int_columns) + len(PRICE_COLUMNS))
+    columns = {column: data[:, i].astype(np.int64) for i, column in enumerate(int_columns)}
+    for i, column in enumerate(PRICE_COLUMNS, start=len(int_columns)):
+        columns[column] = data[:, i]
+    return columns
+
+
+def _load(table, symbols, interval, since=None, until=None, limit=None):
+    if limit is None and ohlc_archive.archive_enabled():
+        try:
+            columns = _load_archived(table, symbols, interval, _to_epoch(since), _to_epoch(until))
+            if columns is not None:
+                return columns
+        except Exception as e:
+            logger.warning(f"OHLC archive read failed for {symbols} @ {interval}s, using the database: {str(e)}")
+    return _load_db(table, symbols, interval, since=since, until=until, limit=limit)
+
+
+def _load_archived(table, symbols, interval, since, until):
+    """
+    Archived months from Parquet + the bars after the archive from the database
+
+    The archive is used up to the earliest archive end of the requested symbols, so all
+    symbols switch to the database at the same time. Returns None (-> database only) when
+    a symbol has no archive or the range starts after the archive.
+    """
+    multi = isinstance(symbols, (list, tuple))
+    names = list(symbols) if multi else [symbols]
+    ends = [ohlc_archive.archive_end(table, symbol, interval) for symbol in names]
+    if not names or None in ends:
+        return None
+    cutoff = min(ends)
+    if since is not None and since >= cutoff:
+        return None
+
+    parts = []
+    for i, symbol in enumerate(names):
+        columns = ohlc_archive.read_archive(table, symbol, interval, since=since,
+                                            until=cutoff if until is None else min(until, cutoff))
+        if multi:
+            columns['symbol_index'] = np.full(len(columns['unix']), i, dtype=np.int64)
+        parts.append(columns)
+    if until is None or until > cutoff:
+        parts.append(_load_db(table, symbols, interval, since=cutoff if since is None else max(since, cutoff), until=until))
+
+    columns = {column: np.concatenate([part[column] for part in parts]) for column in parts[-1]}
+    if multi:
+        # Same order as the query: by unix
+        order = np.argsort(columns['unix'], kind='stable')
+        columns = {column: values[order] for column, values in columns.items()}
+    return columns
+
+
+def _load_db(table, symbols, interval, **filters):
+    sql, params, int_columns = _build_query(table, symbols, interval, **filters)
+
+    if connection.vendor == 'postgresql':
+        try:
+            return _fetch_copy(sql, params, int_columns)
+        except Exception as e:
+            logger.warning(f"COPY binary load failed for {symbols} @ {interval}s, using fetchall: {str(e)}")
+
+    return _fetch_rows(sql, params, int_columns)
+
+
+def load_ohlc_arrays(symbol, interval, since=None, until=None, limit=None, model=OhlcPrice):
+    """
+    Candles of one (symbol, interval) as NumPy arrays, oldest first
+
+    Args:
+        since: only bars with unix > since (datetime or epoch seconds)
+        until: only bars with unix <= until
+        limit: only the most recent `limit` bars
+        model: OhlcPrice (default) or another model with the same columns, e.g. OhlcPriceMinute
+
+    Returns: dict of arrays - unix (int64 epoch seconds), date (int64 epoch microseconds),
+             open/high/low/close/volume (float64, NaN for NULL)
+    """
+    return _load(model._meta.db_table, symbol, interval, since=since, until=until, limit=limit)
+
+
+def load_ohlc_frame(symbol, interval, since=None, until=None, limit=None, model=OhlcPrice):
+    """
+    Candles of one (symbol, interval) as a DataFrame, oldest first
+
+    Columns: unix, date (tz-aware UTC timestamps), open, high, low, close, volume (float64)
+    """
+    columns = load_ohlc_arrays(symbol, interval, since=since, until=until, limit=limit, model=model)
+    return _to_frame(columns)
+
+
+def _to_frame(columns, rows=slice(None)):
+    df = pd.DataFrame({column: columns[column][rows] for column in PRICE_COLUMNS})
+    df.insert(0, 'date', pd.to_datetime(columns['date'][rows], unit='us', utc=True))
+    df.insert(0, 'unix', pd.to_datetime(columns['unix'][rows], unit='s', utc=True))
+    return df
+
+
+def load_ohlc_frames(symbols, interval, since=None, until=None, limit=None, model=OhlcPrice):
+    """
+    Candles of several symbols of one interval as one DataFrame per symbol - one query
+
+    Args: as in load_ohlc_arrays (limit is per symbol)
+    Returns: {symbol: DataFrame} with the columns of load_ohlc_frame, oldest first
+             (symbols without bars get an empty frame)
+    """
+    symbols = list(symbols)
+    columns = _load(model._meta.db_table, symbols, interval, since=since, until=until, limit=limit)
+
+    # Rows come ordered by unix; a stable sort groups them by symbol and keeps that order
+    order = np.argsort(columns['symbol_index'], kind='stable')
+    bounds = np.searchsorted(columns['symbol_index'][order], np.arange(len(symbols) + 1))
+    return {symbol: _to_frame(columns, order[bounds[i]:bounds[i + 1]]) for i, symbol in enumerate(symbols)}
+
+
+def load_ohlc_matrix(symbols, interval, since=None, until=None, limit=None, model=OhlcPrice):
+    """
+    Candles of several symbols aligned on time, as (time x symbol) matrices - one query
+
+    Args:
+        since: datetime / epoch seconds, or a dict of symbol -> since (per-symbol cut-off,
+               symbols missing from the dict get their full history)
+        until, limit, model: as in load_ohlc_arrays (limit is per symbol)
+
+    Returns: dict - unix (T,) int64 epoch seconds of the union of all bar times, and
+             open/high/low/close/volume (T, S) float64 with NaN where a symbol has no bar
+    """
+    symbols = list(symbols)
+    per_symbol_since = since if isinstance(since, dict) else {}
+    if isinstance(since, dict):
+        # One query from the earliest cut-off, the rest is masked below
+        cutoffs = [since.get(symbol) for symbol in symbols]
+        since = None if any(cutoff is None for cutoff in cutoffs) or not cutoffs else min(cutoffs)
+
+    columns = _load(model._meta.db_table, symbols, interval, since=since, until=until, limit=limit)
+
+    times, row_index = np.unique(columns['unix'], return_inverse=True)
+    matrix = {'unix': times}
+    for column in PRICE_COLUMNS:
+        values = np.full((len(times), len(symbols)), np.nan)
+        values[row_index, columns['symbol_index']] = columns[column]
+        matrix[column] = values
+
+    for i, symbol in enumerate(symbols):
+        cutoff = _to_epoch(per_symbol_since.get(symbol))
+        if cutoff is not None:
+            older = times <= cutoff
+            for column in PRICE_COLUMNS:
+                matrix[column][older, i] = np.nan
+
+    return matrix
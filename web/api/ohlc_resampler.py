@@ -0,0 +1,108 @@
+"""
+OHLC resampler - builds higher timeframes from stored bars with one set-based statement
+
+The base bars of all requested symbols are grouped into buckets of the target interval
+(`unix - unix % interval`, i.e. aligned to the epoch like the exchange bars: 4H at
+00/04/08.. UTC, 1W on Thursdays) and the aggregated bars are upserted with
+INSERT ... SELECT ... GROUP BY ... ON CONFLICT DO UPDATE - no rows travel to Python.
+
+    open    first base bar of the bucket      high    max(high)
+    close   last base bar of the bucket       low     min(low)
+    volume  sum(volume)                       volume_base  sum(volume_base)
+
+The newest bucket is usually still forming; it is written as a partial bar and refreshed
+by the next run (complete_only=True skips buckets with missing base bars instead).
+"""
+from django.db import connection
+
+from api.models import OhlcPrice
+from api.ohlc_writer import OHLC_INSERT_COLUMNS, OHLC_UPDATE_COLUMNS, changed_sql, invalidate_after_write
+
+
+def resample_ohlc(symbols, interval, interval_base, model=OhlcPrice, since=None, incremental=False,
+                  complete_only=False, cursor=None):
+    """
+    Aggregate interval_base bars into interval bars and upsert them
+
+    Args:
+        symbols: symbols to resample (one statement for all of them)
+        interval: target interval in seconds (a multiple of interval_base)
+        interval_base: source interval in seconds
+        model: OhlcPrice (default) or OhlcPriceMinute - source and target table
+        since: only buckets starting at or after this unix timestamp
+        incremental: only from the latest stored target bar of each symbol on
+                     (the full history for symbols without target bars)
+        complete_only: skip buckets that do not have all interval / interval_base base bars
+        cursor: psycopg2 cursor to use, default: Django's default connection
+
+    Returns: (inserted, updated)
+    """
+    if interval <= interval_base or interval % interval_base:
+        raise ValueError(f"Interval {interval}s is not a multiple of {interval_base}s")
+    symbols = list(symbols)
+    if not symbols:
+        return 0, 0
+
+    table = model._meta.db_table
+    columns = ', '.join(OHLC_INSERT_COLUMNS)
+    updates = ', '.join(f"{column} = EXCLUDED.{column}" for column in OHLC_UPDATE_COLUMNS)
+    params = {
+        'symbols': symbols,
+        'interval': interval,
+        'interval_base': interval_base,
+        'since': since - since % interval if since else 0,
+        'bars': interval // interval_base,
+    }
+    if incremental:
+        start = (f"GREATEST(%(since)s, COALESCE((SELECT max(t.unix) FROM {table} t "
+                 f"WHERE t.symbol = s.symbol AND t.interval = %(interval)s), 0))")
+    else:
+        start = "%(since)s"
+
+    # Same counting as upsert_ohlc: the CTEs see one snapshot (no RETURNING xmax on partitions)
+    sql = (
+        f"WITH starts AS ("
+        f"SELECT s.symbol, {start} AS since FROM unnest(%(symbols)s::varchar[]) AS s(symbol)), "
+        f"bars AS ("
+        f"SELECT o.unix - o.unix %% %(interval)s AS unix, "
+        f"to_timestamp(o.unix - o.unix %% %(interval)s) AS date, "
+        f"o.symbol, %(interval)s::integer AS interval, "
+        f"(array_agg(o.open ORDER BY o.unix))[1] AS open, "
+        f"max(o.high) AS high, min(o.low) AS low, "
+        f"(array_agg(o.close ORDER BY o.unix DESC))[1] AS close, "
+        f"sum(o.volume) AS volume, sum(o.volume_base) AS volume_base, "
+        f"(array_agg(o.market_id ORDER BY o.unix DESC))[1] AS market_id "
+        f"FROM {table} o JOIN starts USING (symbol) "
+        f"WHERE o.interval = %(interval_base)s AND o.unix >= starts.since "
+        f"GROUP BY o.symbol, o.unix - o.unix %% %(interval)s"
+        f"{' HAVING count(*) = %(bars)s' if complete_only else ''}), "
+        f"existing AS (SELECT count(*) AS n FROM {table} JOIN bars USING (symbol, interval, unix)), "
+        f"written AS ("
+        f"INSERT INTO {table} ({columns}) SELECT {columns} FROM bars "
+        f"ON CONFLICT (symbol, interval, unix) DO UPDATE SET {updates}, "
+        f"volume_base = COALESCE(EXCLUDED.volume_base, {table}.volume_base) "
+        f"RETURNING 1) "
+        f"SELECT (SELECT count(*) FROM written), (SELECT n FROM existing), {changed_sql(table, 'bars')}"
+    )
+
+    if cursor is None:
+        with connection.cursor() as django_cursor:
+            django_cursor.execute(sql, params)
+            written, updated, changed = django_cursor.fetchone()
+    else:
+        cursor.execute(sql, params)
+        written, updated, changed = cursor.fetchone()
+    invalidate_after_write(table, {(symbol, interval) for symbol in symbols}, cursor, changed)
+    return written - updated, updated
+
+
+def resample_timeframes(symbols, targets, interval_base, model=OhlcPrice, **options):
+    """
+    Build several timeframes from the same base interval, e.g. 4H / 1D / 1W from 1H
+
+    Returns: {interval: (inserted, updated)}
+    """
+    return {
+        interval: resample_ohlc(symbols, interval, interval_base, model=model, **options)
+        for interval in targets
+    }
@@ -0,0 +1,499 @@
+"""
+OHLC storage layout - plain heap tables, native Postgres partitions or TimescaleDB hypertables
+
+settings.OHLC_STORAGE_BACKEND selects the layout of qt_ohlc / qt_ohlc_m:
+
+- heap:        plain tables (default), retention runs batched DELETEs
+- partitioned: LIST partition per interval, each RANGE partitioned by month on unix:
+                   qt_ohlc -> qt_ohlc_i3600 -> qt_ohlc_i3600_p202510, ..., qt_ohlc_i3600_pdefault
+               Range scans on recent bars only touch recent partitions and retention
+               drops whole monthly partitions of one interval (no DELETE / VACUUM)
+- timescale:   hypertable chunked by 30 days on unix
+
+`convert_table` moves an existing heap table over (python manage.py ohlc_storage convert),
+`maintain_storage` creates upcoming partitions and applies settings.OHLC_RETENTION_DAYS
+(daily Celery task).
+"""
+import logging
+import re
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from api.models import OhlcPrice, OhlcPriceMinute
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('heap', 'partitioned', 'timescale')
+OHLC_MODELS = [OhlcPrice, OhlcPriceMinute]
+
+# Intervals that always get their own LIST partition (others found in the data are added on convert)
+TABLE_INTERVALS = {
+    'qt_ohlc': [3600, 14400, 86400, 604800],
+    'qt_ohlc_m': [60],
+}
+
+TIMESCALE_CHUNK_SECONDS = 30 * 86400
+DELETE_BATCH_SIZE = 50000
+# Bars newer than this are copied again under the table lock when swapping tables
+RESYNC_MONTHS = 2
+
+
+def storage_backend():
+    """Configured OHLC storage backend (settings.OHLC_STORAGE_BACKEND)"""
+    backend = getattr(settings, 'OHLC_STORAGE_BACKEND', 'heap')
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown OHLC_STORAGE_BACKEND '{backend}', expected one of {BACKENDS}")
+    return backend
+
+
+def month_start(epoch):
+    """Epoch seconds of the first day (UTC) of the month containing `epoch`"""
+    dt = datetime.fromtimestamp(epoch, tz=timezone.utc)
+    return int(datetime(dt.year, dt.month, 1, tzinfo=timezone.utc).timestamp())
+
+
+def add_months(epoch, months):
+    """Epoch of the month start `months` months after the month containing `epoch`"""
+    dt = datetime.fromtimestamp(month_start(epoch), tz=timezone.utc)
+    month_index = dt.year * 12 + dt.month - 1 + months
+    return int(datetime(month_index // 12, month_index % 12 + 1, 1, tzinfo=timezone.utc).timestamp())
+
+
+def interval_partition_name(table, interval):
+    return f"{table}_i{interval}"
+
+
+def month_partition_name(table, interval, month):
+    return f"{interval_partition_name(table, interval)}_p{datetime.fromtimestamp(month, tz=timezone.utc):%Y%m}"
+
+
+def _partition_month(name):
+    """Month start epoch from a `..._pYYYYMM` partition name, None for other partitions"""
+    suffix = name.rsplit('_p', 1)[-1]
+    if len(suffix) != 6 or not suffix.isdigit():
+        return None
+    return int(datetime(int(suffix[:4]), int(suffix[4:]), 1, tzinfo=timezone.utc).timestamp())
+
+
+def _now():
+    return int(time.time())
+
+
+# ---------------------------------------------------------------------------
+# Introspection
+# ---------------------------------------------------------------------------
+
+def _table_exists(cursor, table):
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [table])
+    return cursor.fetchone()[0]
+
+
+def _is_hypertable(cursor, table):
+    cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'")
+    if not cursor.fetchone():
+        return False
+    cursor.execute("SELECT 1 FROM timescaledb_information.hypertables WHERE hypertable_name = %s", [table])
+    return cursor.fetchone() is not None
+
+
+def current_layout(table, cursor=None):
+    """'heap', 'partitioned' or 'timescale' - how `table` is stored right now"""
+    if cursor is None:
+        with connection.cursor() as cursor:
+            return current_layout(table, cursor)
+
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [table])
+    row = cursor.fetchone()
+    if row is None:
+        raise ValueError(f"Table {table} does not exist")
+    if row[0] == 'p':
+        return 'partitioned'
+    return 'timescale' if _is_hypertable(cursor, table) else 'heap'
+
+
+def _child_partitions(cursor, parent):
+    """Direct partitions of `parent`: [(name, is_default)]"""
+    cursor.execute("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) = 'DEFAULT'
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        ORDER BY c.relname
+    """, [parent])
+    return cursor.fetchall()
+
+
+def _interval_partitions(cursor, table):
+    """{interval: list partition name} of a partitioned OHLC table"""
+    prefix = f"{table}_i"
+    partitions = {}
+    for name, is_default in _child_partitions(cursor, table):
+        suffix = name[len(prefix):]
+        if not is_default and name.startswith(prefix) and suffix.isdigit():
+            partitions[int(suffix)] = name
+    return partitions
+
+
+def _constraints_and_indexes(cursor, table):
+    """
+    Constraints (PRIMARY KEY / UNIQUE / CHECK) and the other indexes of `table`
+    Returns: ([(name, type, definition)], [(name, CREATE INDEX statement)])
+    """
+    cursor.execute("""
+        SELECT conname, contype, pg_get_constraintdef(oid)
+        FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'u', 'c')
+        ORDER BY contype, conname
+    """, [table])
+    constraints = cursor.fetchall()
+
+    cursor.execute("""
+        SELECT indexname, indexdef FROM pg_indexes
+        WHERE tablename = %s AND indexname NOT IN (
+            SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s))
+        ORDER BY indexname
+    """, [table, table])
+    return constraints, cursor.fetchall()
+
+
+# ---------------------------------------------------------------------------
+# Native partitions
+# ---------------------------------------------------------------------------
+
+def _create_interval_partition(cursor, parent, table, interval):
+    """LIST partition for one interval, RANGE partitioned by unix with a default catch-all"""
+    name = interval_partition_name(table, interval)
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS {name} PARTITION OF {parent} FOR VALUES IN (%s) PARTITION BY RANGE (unix)',
+        [interval]
+    )
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {name}_pdefault PARTITION OF {name} DEFAULT")
+    return name
+
+
+def _add_month_partition(cursor, table, interval, month):
+    """
+    Create the monthly partition of `interval` starting at `month` (no-op if it exists)
+    Rows of that month that already landed in the default partition are moved into it.
+    """
+    parent = interval_partition_name(table, interval)
+    name = month_partition_name(table, interval, month)
+    if _table_exists(cursor, name):
+        return False
+
+    lo, hi = month, add_months(month, 1)
+    cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {parent}_pdefault WHERE unix >= %s AND unix < %s)", [lo, hi])
+    if not cursor.fetchone()[0]:
+        cursor.execute(f"CREATE TABLE {name} PARTITION OF {parent} FOR VALUES FROM (%s) TO (%s)", [lo, hi])
+        return True
+
+    # A partition cannot be created over rows in the default partition: move them first
+    with transaction.atomic():
+        cursor.execute(f"CREATE TABLE {name} (LIKE {parent} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute(f"""
+            WITH moved AS (DELETE FROM {parent}_pdefault WHERE unix >= %s AND unix < %s RETURNING *)
+            INSERT INTO {name} SELECT * FROM moved
+        """, [lo, hi])
+        cursor.execute(f"ALTER TABLE {parent} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", [lo, hi])
+    return True
+
+
+def ensure_partitions(table, months_ahead=None, cursor=None):
+    """
+    Create the monthly partitions up to `months_ahead` months from now for every interval,
+    and partitions for any month that has rows sitting in a default partition (e.g. backfills)
+
+    Returns: number of partitions created
+    """
+    if cursor is None:
+        with connection.cursor() as cursor:
+            return ensure_partitions(table, months_ahead, cursor)
+
+    if months_ahead is None:
+        months_ahead = getattr(settings, 'OHLC_PARTITION_MONTHS_AHEAD', 3)
+
+    created = 0
+    current_month = month_start(_now())
+    for interval, name in sorted(_interval_partitions(cursor, table).items()):
+        cursor.execute(f"SELECT DISTINCT (unix / 86400) * 86400 FROM {name}_pdefault")
+        stray_months = {month_start(day) for (day,) in cursor.fetchall()}
+
+        months = {add_months(current_month, offset) for offset in range(months_ahead + 1)} | stray_months
+        for month in sorted(months):
+            created += _add_month_partition(cursor, table, interval, month)
+    return created
+
+
+def _create_partitioned_copy(cursor, table, new_table):
+    """Empty partitioned table with the columns and CHECK constraints of `table`, plus its partitions"""
+    cursor.execute(
+        f"CREATE TABLE {new_table} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING IDENTITY) "
+        f"PARTITION BY LIST (interval)"
+    )
+
+    cursor.execute(f"SELECT interval, min(unix), max(unix) FROM {table} GROUP BY interval ORDER BY interval")
+    ranges = {interval: (lo, hi) for interval, lo, hi in cursor.fetchall()}
+    for interval in TABLE_INTERVALS.get(table, []):
+        ranges.setdefault(interval, (_now(), _now()))
+
+    months_ahead = getattr(settings, 'OHLC_PARTITION_MONTHS_AHEAD', 3)
+    for interval, (lo, hi) in sorted(ranges.items()):
+        name = _create_interval_partition(cursor, new_table, table, interval)
+        month, last = month_start(lo), add_months(max(hi, _now()), months_ahead)
+        while month <= last:
+            cursor.execute(
+                f"CREATE TABLE {month_partition_name(table, interval, month)} PARTITION OF {name} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [month, add_months(month, 1)]
+            )
+            month = add_months(month, 1)
+
+    cursor.execute(f"CREATE TABLE {table}_idefault PARTITION OF {new_table} DEFAULT")
+    return ranges
+
+
+def _copy_rows(cursor, table, new_table, ranges):
+    """Copy the rows month by month (each month its own transaction)"""
+    copied = 0
+    for interval, (lo, hi) in sorted(ranges.items()):
+        month = month_start(lo)
+        while month <= hi:
+            with transaction.atomic():
+                cursor.execute(
+                    f"INSERT INTO {new_table} SELECT * FROM {table} WHERE interval = %s AND unix >= %s AND unix < %s",
+                    [interval, month, add_months(month, 1)]
+                )
+                copied += cursor.rowcount
+            month = add_months(month, 1)
+        print(f"  📦 {table} @ {interval}s: copied up to {datetime.fromtimestamp(hi, tz=timezone.utc):%Y-%m-%d}")
+    return copied
+
+
+def _convert_to_partitioned(cursor, table, keep_old=False):
+    new_table = f"{table}_partitioned"
+    old_table = f"{table}_heap"
+    constraints, indexes = _constraints_and_indexes(cursor, table)
+
+    print(f"🏗️  Creating {new_table}...")
+    ranges = _create_partitioned_copy(cursor, table, new_table)
+    copied = _copy_rows(cursor, table, new_table, ranges)
+    print(f"  ✅ Copied {copied:,} rows")
+
+    # Keys and indexes under temporary names; unique keys must contain the partition keys
+    print("🔧 Building constraints and indexes...")
+    renames = []
+    for name, contype, definition in constraints:
+        if contype == 'p':
+            definition = "PRIMARY KEY (id, unix, interval)"
+        elif contype == 'u' and not {'unix', 'interval'} <= set(re.findall(r'\w+', definition)):
+            logger.warning(f"Skipping unique constraint {name} of {table}: it does not contain unix and interval")
+            continue
+        if contype in ('p', 'u'):
+            cursor.execute(f"ALTER TABLE {new_table} ADD CONSTRAINT {name}_p {definition}")
+            renames.append(('CONSTRAINT', name))
+    for name, statement in indexes:
+        cursor.execute(
+            statement.replace(f"INDEX {name} ON", f"INDEX {name}_p ON", 1)
+                     .replace(f" ON public.{table} ", f" ON public.{new_table} ", 1)
+                     .replace(f" ON {table} ", f" ON {new_table} ", 1)
+        )
+        renames.append(('INDEX', name))
+
+    print("🔀 Swapping tables...")
+    with transaction.atomic():
+        cursor.execute(f"LOCK TABLE {table} IN EXCLUSIVE MODE")  # reads go on, writes wait
+
+        # Bars written (or refreshed) while copying
+        resync_from = add_months(_now(), -RESYNC_MONTHS)
+        cursor.execute(f"DELETE FROM {new_table} WHERE unix >= %s", [resync_from])
+        cursor.execute(f"INSERT INTO {new_table} SELECT * FROM {table} WHERE unix >= %s", [resync_from])
+
+        cursor.execute(f"SELECT (SELECT count(*) FROM {table}), (SELECT count(*) FROM {new_table})")
+        old_count, new_count = cursor.fetchone()
+        if old_count != new_count:
+            raise RuntimeError(
+                f"Row count mismatch ({table}: {old_count}, {new_table}: {new_count}) - "
+                f"stop the fetchers / backfills and run the conversion again"
+            )
+
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+        old_sequence = cursor.fetchone()[0]
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [new_table])
+        new_sequence = cursor.fetchone()[0]
+
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {old_table}")
+        for kind, name in renames:
+            if kind == 'CONSTRAINT':
+                cursor.execute(f"ALTER TABLE {old_table} RENAME CONSTRAINT {name} TO {name}_heap")
+            else:
+                cursor.execute(f"ALTER INDEX {name} RENAME TO {name}_heap")
+        cursor.execute(f"ALTER TABLE {new_table} RENAME TO {table}")
+        for kind, name in renames:
+            if kind == 'CONSTRAINT':
+                cursor.execute(f"ALTER TABLE {table} RENAME CONSTRAINT {name}_p TO {name}")
+            else:
+                cursor.execute(f"ALTER INDEX {name}_p RENAME TO {name}")
+
+        if new_sequence and new_sequence != old_sequence:
+            # Identity column: continue numbering after the copied ids
+            cursor.execute(f"SELECT setval(%s, (SELECT COALESCE(max(id), 0) + 1 FROM {table}), false)", [new_sequence])
+        elif old_sequence:
+            # serial column: the default still points at the old sequence, move its ownership
+            cursor.execute(f"ALTER SEQUENCE {old_sequence} OWNED BY {table}.id")
+
+    cursor.execute(f"ANALYZE {table}")
+    if not keep_old:
+        cursor.execute(f"DROP TABLE {old_table}")
+        print(f"  🧹 Dropped {old_table}")
+    else:
+        print(f"  📚 Old table kept as {old_table}")
+
+
+# ---------------------------------------------------------------------------
+# TimescaleDB
+# ---------------------------------------------------------------------------
+
+def _convert_to_timescale(cursor, table):
+    cursor.execute("CREATE EXTENSION IF NOT EXISTS timescaledb")
+    # The now-function must return the type of the time column (unix is an integer column);
+    # dropped first because an earlier version returned bigint
+    cursor.execute("DROP FUNCTION IF EXISTS ohlc_unix_now()")
+    cursor.execute("""
+        CREATE FUNCTION ohlc_unix_now() RETURNS integer
+        LANGUAGE SQL STABLE AS $$ SELECT extract(epoch FROM now())::integer $$
+    """)
+
+    with transaction.atomic():
+        # Unique keys of a hypertable must contain the time column
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'p'", [table]
+        )
+        row = cursor.fetchone()
+        if row:
+            cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {row[0]}")
+            cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {row[0]} PRIMARY KEY (id, unix)")
+
+    print(f"🏗️  Converting {table} into a hypertable (migrating existing rows)...")
+    cursor.execute(
+        "SELECT create_hypertable(%s, 'unix', chunk_time_interval => %s, migrate_data => true)",
+        [table, TIMESCALE_CHUNK_SECONDS]
+    )
+    cursor.execute("SELECT set_integer_now_func(%s, 'ohlc_unix_now')", [table])
+
+
+# ---------------------------------------------------------------------------
+# Entry points
+# ---------------------------------------------------------------------------
+
+def convert_table(model, backend=None, keep_old=False):
+    """
+    Move an existing heap OHLC table to the configured (or given) storage backend
+
+    Returns: True if the table was converted, False if it already had that layout
+    """
+    backend = backend or storage_backend()
+    table = model._meta.db_table
+
+    with connection.cursor() as cursor:
+        layout = current_layout(table, cursor)
+        if layout == backend:
+            print(f"✅ {table} is already {backend}")
+            return False
+        if layout != 'heap':
+            raise ValueError(f"{table} is {layout}; only heap tables can be converted (to {backend})")
+        if backend == 'heap':
+            return False
+
+        started = time.perf_counter()
+        if backend == 'partitioned':
+            _convert_to_partitioned(cursor, table, keep_old=keep_old)
+        else:
+            _convert_to_timescale(cursor, table)
+
+    print(f"✅ {table} converted to {backend} in {time.perf_counter() - started:.1f}s")
+    return True
+
+
+def _drop_expired_partitions(cursor, table, interval, cutoff):
+    """Drop the monthly partitions of `interval` that end before `cutoff`"""
+    parent = _interval_partitions(cursor, table).get(interval)
+    if parent is None:
+        return 0
+
+    dropped = 0
+    for name, is_default in _child_partitions(cursor, parent):
+        month = None if is_default else _partition_month(name)
+        if month is not None and add_months(month, 1) <= cutoff:
+            cursor.execute(f"ALTER TABLE {parent} DETACH PARTITION {name}")
+            cursor.execute(f"DROP TABLE {name}")
+            dropped += 1
+    return dropped
+
+
+def _delete_expired_rows(cursor, table, interval, cutoff):
+    """Batched DELETE of expired rows (heap tables, intervals without own partitions)"""
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            # ids, not ctids: a ctid is only unique within one partition
+            cursor.execute(
+                f"DELETE FROM {table} WHERE interval = %s AND unix < %s AND id IN ("
+                f"SELECT id FROM {table} WHERE interval = %s AND unix < %s LIMIT %s)",
+                [interval, cutoff, interval, cutoff, DELETE_BATCH_SIZE]
+            )
+            deleted += cursor.rowcount
+        if cursor.rowcount < DELETE_BATCH_SIZE:
+            return deleted
+
+
+def apply_retention(table, cursor=None):
+    """
+    Remove bars older than settings.OHLC_RETENTION_DAYS[interval]
+
+    Partitioned tables drop whole monthly partitions (a partition goes once its last day
+    has expired); heap tables, hypertables (chunks mix intervals) and intervals stored in
+    the default partition fall back to batched DELETEs.
+    Returns: {interval: partitions dropped / rows deleted}
+    """
+    if cursor is None:
+        with connection.cursor() as cursor:
+            return apply_retention(table, cursor)
+
+    layout = current_layout(table, cursor)
+    partitions = _interval_partitions(cursor, table) if layout == 'partitioned' else {}
+    results = {}
+    for interval, days in sorted(getattr(settings, 'OHLC_RETENTION_DAYS', {}).items()):
+        if days is None:
+            continue
+        cutoff = _now() - days * 86400
+        if interval in partitions:
+            results[interval] = _drop_expired_partitions(cursor, table, interval, cutoff)
+        else:
+            results[interval] = _delete_expired_rows(cursor, table, interval, cutoff)
+    return results
+
+
+def maintain_storage():
+    """
+    Daily maintenance of all OHLC tables: upcoming partitions + retention
+
+    Returns: {table: {'layout', 'partitions_created', 'retention'}}
+    """
+    backend = storage_backend()
+    summary = {}
+    with connection.cursor() as cursor:
+        for model in OHLC_MODELS:
+            table = model._meta.db_table
+            layout = current_layout(table, cursor)
+            if layout != backend:
+                logger.warning(
+                    f"{table} is stored as {layout} but OHLC_STORAGE_BACKEND is {backend} - "
+                    f"run: python manage.py ohlc_storage convert"
+                )
+
+            created = ensure_partitions(table, cursor=cursor) if layout == 'partitioned' else 0
+            retention = apply_retention(table, cursor)
+            summary[table] = {'layout': layout, 'partitions_created': created, 'retention': retention}
+            logger.info(f"OHLC storage {table} ({layout}): {created} partitions created, retention {retention}")
+    return summary
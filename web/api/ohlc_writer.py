@@ -0,0 +1,156 @@
+"""
+OHLC writer - one INSERT ... ON CONFLICT DO UPDATE per batch of candles
+
+Every fetcher (Kraken pipeline stage, historical backfills, Bitstamp cron) writes
+candles through `upsert_ohlc`, relying on the unique (symbol, interval, unix) index of
+the OHLC tables: new bars are inserted and bars that already exist (e.g. the still-open
+last candle of the previous fetch) are refreshed, in a single round trip.
+"""
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.db import connection, transaction
+from psycopg2.extras import execute_values
+
+from api.latest_bars import invalidate_latest_bars
+from api.ohlc_archive import invalidate_archive
+from api.models import OhlcPrice
+
+OHLC_INSERT_COLUMNS = ['unix', 'date', 'symbol', 'interval', 'open', 'high', 'low', 'close',
+                       'volume', 'volume_base', 'market_id']
+OHLC_UPDATE_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume', 'market_id']
+# Typed VALUES row, so all-NULL columns (e.g. volume_base) are not read as text
+VALUES_TEMPLATE = ('(%s::bigint, %s::timestamptz, %s::varchar, %s::integer, %s::numeric, %s::numeric, '
+                   '%s::numeric, %s::numeric, %s::numeric, %s::numeric, %s::integer)')
+
+KRAKEN_MARKET_ID = 2
+BITSTAMP_MARKET_ID = 1
+
+
+def _to_decimal(value):
+    return None if value is None else Decimal(str(value))
+
+
+def ohlc_row(unix, symbol, interval, open, high, low, close, volume, volume_base=None, market_id=KRAKEN_MARKET_ID):
+    """One candle as a row dict for upsert_ohlc (unix in epoch seconds)"""
+    unix = int(float(unix))
+    return {
+        'unix': unix,
+        'date': datetime.fromtimestamp(unix, tz=timezone.utc),
+        'symbol': symbol,
+        'interval': interval,
+        'open': _to_decimal(open),
+        'high': _to_decimal(high),
+        'low': _to_decimal(low),
+        'close': _to_decimal(close),
+        'volume': _to_decimal(volume),
+        'volume_base': _to_decimal(volume_base),
+        'market_id': market_id,
+    }
+
+
+def kraken_ohlc_rows(candles, symbol, interval):
+    """
+    Kraken OHLC candles -> row dicts
+    Kraken OHLC format: [timestamp, open, high, low, close, vwap, volume, count]
+    """
+    return [
+        ohlc_row(candle[0], symbol, interval, candle[1], candle[2], candle[3], candle[4], candle[6],
+                 market_id=KRAKEN_MARKET_ID)
+        for candle in candles
+    ]
+
+
+def bitstamp_ohlc_rows(candles, symbol, interval):
+    """Bitstamp /api/v2/ohlc/ candles (dicts) -> row dicts"""
+    return [
+        ohlc_row(candle['timestamp'], symbol, interval, candle['open'], candle['high'], candle['low'],
+                 candle['close'], candle['volume'], volume_base=0, market_id=BITSTAMP_MARKET_ID)
+        for candle in candles
+    ]
+
+
+def upsert_ohlc(rows, model=OhlcPrice, cursor=None):
+    """
+    Insert or update candles with a single statement
+
+    Args:
+        rows: row dicts (see ohlc_row); a later row wins if a bar appears twice
+        model: OhlcPrice (default) or OhlcPriceMinute
+        cursor: psycopg2 cursor to use (e.g. a plain psycopg2 connection outside Django),
+                default: Django's default connection
+
+    Returns: (inserted, updated)
+    """
+    # ON CONFLICT cannot touch the same row twice in one statement
+    unique_rows = {(row['symbol'], row['interval'], row['unix']): row for row in rows}
+    if not unique_rows:
+        return 0, 0
+
+    table = model._meta.db_table
+    columns = ', '.join(OHLC_INSERT_COLUMNS)
+    updates = ', '.join(f"{column} = EXCLUDED.{column}" for column in OHLC_UPDATE_COLUMNS)
+    # Bars that already exist are counted in the same statement (the data-modifying CTE and
+    # the count see the same snapshot) - RETURNING xmax is not available on partitioned tables
+    sql = (
+        f"WITH incoming ({columns}) AS (VALUES %s), "
+        f"existing AS (SELECT count(*) AS n FROM {table} JOIN incoming USING (symbol, interval, unix)), "
+        f"written AS ("
+        f"INSERT INTO {table} ({columns}) SELECT {columns} FROM incoming "
+        f"ON CONFLICT (symbol, interval, unix) DO UPDATE SET {updates}, "
+        f"volume_base = COALESCE(EXCLUDED.volume_base, {table}.volume_base) "
+        f"RETURNING 1) "
+        f"SELECT (SELECT count(*) FROM written), (SELECT n FROM existing), {changed_sql(table, 'incoming')}"
+    )
+    values = [tuple(row[column] for column in OHLC_INSERT_COLUMNS) for row in unique_rows.values()]
+
+    if cursor is None:
+        with connection.cursor() as django_cursor:
+            result = execute_values(django_cursor.cursor, sql, values, template=VALUES_TEMPLATE,
+                                    page_size=len(values), fetch=True)
+    else:
+        result = execute_values(cursor, sql, values, template=VALUES_TEMPLATE, page_size=len(values), fetch=True)
+
+    written, updated, changed = result[0]
+    invalidate_after_write(table, {(symbol, interval) for symbol, interval, _ in unique_rows}, cursor, changed)
+    return written - updated, updated
+
+
+def changed_sql(table, source):
+    """
+    Scalar subquery: [symbol, interval, unix of the oldest changed bar] of every pair whose
+    bars in `source` are new or differ from the stored ones, as a JSON list
+
+    Used inside the writing statement - its CTEs see the rows as they were before the write.
+    """
+    return (
+        f"(SELECT COALESCE(json_agg(json_build_array(symbol, interval, since)), '[]'::json) FROM ("
+        f"SELECT s.symbol, s.interval, min(s.unix) AS since FROM {source} s "
+        f"LEFT JOIN {table} t USING (symbol, interval, unix) "
+        f"WHERE (t.open, t.high, t.low, t.close, t.volume) IS DISTINCT FROM "
+        f"(s.open, s.high, s.low, s.close, s.volume) "
+        f"GROUP BY s.symbol, s.interval) AS changed)"
+    )
+
+
+def invalidate_after_write(table, pairs, cursor=None, changed=None):
+    """
+    Invalidate the caches of the written pairs once the write is visible: the latest bar
+    cache, and the archived months (api.ohlc_archive) from the oldest changed bar on
+
+    Args:
+        changed: [symbol, interval, unix] per pair with changed bars (see changed_sql),
+                 None = drop the whole archive of the pairs
+    """
+    def invalidate():
+        invalidate_latest_bars(table, pairs)
+        if changed is None:
+            invalidate_archive(table, pairs)
+        for symbol, interval, since in changed or []:
+            invalidate_archive(table, [(symbol, interval)], since=since)
+
+    if cursor is None:
+        transaction.on_commit(invalidate)
+    else:
+        # Outside Django's transaction management (the caller commits right after)
+        invalidate()
@@ -0,0 +1,15 @@
+"""
+In-process data pipeline for Seraphim
+fetch OHLC -> indicators (incl. EMA channel) -> market regime -> trading signals
+"""
+
+from .context import PipelineContext
+from .runner import STAGES, resolve_stages, run_stage, run_pipeline
+
+__all__ = [
+    'PipelineContext',
+    'STAGES',
+    'resolve_stages',
+    'run_stage',
+    'run_pipeline',
+]
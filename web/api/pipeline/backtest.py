@@ -0,0 +1,359 @@
+"""
+Vectorized backtest of the signal strategies over the full OHLC history
+
+Replays the trend-following (generate_trend_following_signal) and mean-reversion
+(generate_mean_reversion_signal) strategies for every bar at once:
+
+    OHLC matrix -> indicator engine -> market regime -> signal per bar -> trades
+
+Indicators and the other price-only inputs are computed once per symbol (prepare_backtest);
+the signals (strategy_signals) take the strategy thresholds and the trade simulation
+(simulate_trades) the trading parameters, so a parameter sweep only repeats the cheap part.
+
+Trades follow the live signal semantics: a position is opened when the signal switches
+to buy (long) or sell (short) and closed at the close of the bar where the signal
+changes again - or earlier, when the stop loss / take profit of the entry signal is hit.
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from api.ohlc_loader import load_ohlc_matrix
+from . import scoring
+from .indicator_engine import compute_indicators
+from .market_regime import REGIME_THRESHOLDS
+
+# Same data requirements as the live stages
+MIN_SIGNAL_BARS = 30    # evaluate_signal: at least 30 bars of history
+REGIME_WINDOW = 20      # market_regime: channel occupancy / volume ratio over the last 20 bars
+
+BUY, HOLD, SELL = 1, 0, -1
+BEARISH, BULLISH = 1, -1  # volume divergence codes
+TREND_FOLLOW, MEAN_REVERSION = 'trend_follow', 'mean_reversion'
+
+# Per-bar float64 arrays of a prepared symbol (prepare_bars)
+BAR_FIELDS = [
+    'unix', 'open', 'high', 'low', 'close', 'volume',
+    'rsi', 'macd', 'macd_signal', 'adx', 'ema_high_33', 'ema_low_33',
+    'channel_position', 'deviation', 'gain_10d', 'gain_20d', 'distance_from_high', 'volume_divergence',
+    'regime_valid', 'channel_in_pct', 'volume_ratio', 'trend_direction',
+]
+
+# Strategy thresholds (the live defaults) - overridable per backtest / sweep
+DEFAULT_THRESHOLDS = {
+    **REGIME_THRESHOLDS,
+    'deviation_tiers': scoring.DEVIATION_TIERS,
+    'gain_10d_tiers': scoring.GAIN_10D_TIERS,
+    'gain_20d_tiers': scoring.GAIN_20D_TIERS,
+}
+
+DEFAULT_PARAMS = {
+    'min_confidence': 0,    # buy/sell signals below this confidence are treated as hold
+    'stop_loss': True,      # exit at the stop loss of the entry signal
+    'take_profit': True,    # exit at the take profit of the entry signal (mean reversion)
+    'fee_pct': 0.0,         # fee per side, in percent of the traded value
+    'allow_short': True,    # trade sell signals as short positions (else: flat)
+}
+
+
+def _window_mean(values, window):
+    means = np.full(len(values), np.nan)
+    if len(values) >= window:
+        means[window - 1:] = sliding_window_view(values, window).mean(axis=1)
+    return means
+
+def _is_set(values):
+    """`if value` of the live stages for nullable float columns: not NULL and not 0"""
+    return ~np.isnan(values) & (values != 0)
+
+
+def regime_inputs(close, volume, adx, ema_high, ema_low):
+    """
+    Threshold independent inputs of detect_market_regime for every bar
+
+    Returns: dict of arrays - regime_valid (a regime would be written), channel_in_pct,
+             volume_ratio, trend_direction (1 up / -1 down / 0 neutral)
+    """
+    n_bars = len(close)
+    valid = _is_set(adx) & _is_set(ema_high) & _is_set(ema_low) & (np.arange(n_bars) >= REGIME_WINDOW - 1)
+
+    # Share of the last 20 closes inside the current channel
+    channel_in_pct = np.full(n_bars, np.nan)
+    if n_bars >= REGIME_WINDOW:
+        windows = sliding_window_view(close, REGIME_WINDOW)
+        inside = (windows >= ema_low[REGIME_WINDOW - 1:, None]) & (windows <= ema_high[REGIME_WINDOW - 1:, None])
+        channel_in_pct[REGIME_WINDOW - 1:] = inside.sum(axis=1) / REGIME_WINDOW * 100
+
+    volume = np.nan_to_num(volume)
+    average_volume = _window_mean(volume, REGIME_WINDOW)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volume_ratio = np.round(np.where(average_volume > 0, volume / average_volume, np.nan), 2)
+
+    return {
+        'regime_valid': valid,
+        'channel_in_pct': channel_in_pct,
+        'volume_ratio': volume_ratio,
+        'trend_direction': np.select([close > ema_high, close < ema_low], [1, -1], default=0),
+    }
+
+def trending_regimes(bars, thresholds=None):
+    """detect_market_regime's trending / ranging decision for every bar (True = trending)"""
+    thresholds = {**REGIME_THRESHOLDS, **(thresholds or {})}
+    adx, channel_in_pct = bars['adx'], bars['channel_in_pct']
+
+    # ADX threshold + channel breakout, ADX tie-breaker for mixed signals
+    adx_trending = (adx > thresholds['adx_trending']) & (channel_in_pct < thresholds['channel_trending'])
+    adx_ranging = (adx < thresholds['adx_ranging']) & (channel_in_pct > thresholds['channel_ranging'])
+    trending = adx_trending | (~adx_ranging & (adx > thresholds['adx_tiebreak']))
+    return (bars['regime_valid'] > 0) & trending
+
+def strategy_signals(bars, thresholds=None):
+    """
+    Trading signal of every bar (the strategies of api.pipeline.signals, vectorized)
+
+    Args:
+        bars: dict of BAR_FIELDS arrays (see prepare_bars)
+        thresholds: overrides of DEFAULT_THRESHOLDS
+    Returns: dict of arrays - signal (BUY / HOLD / SELL), confidence, stop_loss,
+             take_profit (NaN if none), strategy ('trend_follow' / 'mean_reversion' / 'none')
+    """
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    close = bars['close']
+    ema_high, ema_low = bars['ema_high_33'], bars['ema_low_33']
+    rsi, macd, macd_signal = bars['rsi'], bars['macd'], bars['macd_signal']
+    position, divergence = bars['channel_position'], bars['volume_divergence']
+
+    trending = trending_regimes(bars, thresholds)
+    volume_confirmed = bars['volume_ratio'] > 1.2
+    macd_set = _is_set(macd) & _is_set(macd_signal)
+    gain_penalty = scoring.gain_penalty(bars['gain_10d'], bars['gain_20d'],
+                                        thresholds['gain_10d_tiers'], thresholds['gain_20d_tiers'])
+
+    # Trend following - buy above EMA High, with the anti-chasing penalties
+    buy_confidence = np.clip(
+        50
+        + np.select([position > 200, position > 150, position > 100, position > 80, position < 40],
+                    [-40, -30, -20, -10, 20], default=0)
+        - scoring.deviation_penalty(bars['deviation'], thresholds['deviation_tiers'])
+        + np.select([rsi > 80, rsi > 70, rsi < 60], [-25, -15, 10], default=0)
+        - gain_penalty
+        - scoring.historical_penalty(bars['distance_from_high'])
+        - 15 * (divergence == BEARISH)
+        + 15 * trending
+        + 10 * volume_confirmed
+        + 10 * (macd_set & (macd > macd_signal)),
+        0, 100)
+
+    # Trend following - sell below EMA Low, avoiding panic selling at bottoms
+    sell_confidence = np.clip(
+        50
+        - 20 * (position < 0)
+        + np.select([rsi < 30, rsi < 40], [-15, -10], default=0)
+        + 15 * (trending & (bars['trend_direction'] == -1))
+        + 10 * volume_confirmed
+        + 10 * (macd_set & (macd < macd_signal))
+        - 15 * (divergence == BULLISH),
+        0, 100)
+
+    breakout = [close > ema_high, close < ema_low]
+    trend_signal = np.select(breakout, [np.where(buy_confidence < 30, HOLD, BUY),
+                                        np.where(sell_confidence < 30, HOLD, SELL)], default=HOLD)
+    trend_confidence = np.select(breakout, [buy_confidence, sell_confidence], default=0)
+    trend_stop = np.select(breakout, [ema_low, ema_high], default=np.nan)
+
+    # Mean reversion (ranging markets) - buy near EMA Low, sell near EMA High
+    channel_width = ema_high - ema_low
+    rsi_set = _is_set(rsi)
+    near_channel = [np.abs(close - ema_low) < channel_width * 0.1,
+                    np.abs(close - ema_high) < channel_width * 0.1]
+    reversion_buy = 45 + 15 * (position < 30) + np.select([rsi_set & (rsi < 35), rsi_set & (rsi < 45)], [20, 10], default=0)
+    reversion_sell = 45 + 15 * (position > 70) + np.select([rsi_set & (rsi > 65), rsi_set & (rsi > 55)], [20, 10], default=0)
+    reversion_signal = np.select(near_channel, [BUY, SELL], default=HOLD)
+    reversion_confidence = np.select(near_channel, [np.clip(reversion_buy, 0, 100), np.clip(reversion_sell, 0, 100)], default=0)
+    reversion_stop = np.select(near_channel, [ema_low * 0.98, ema_high * 1.02], default=np.nan)
+    reversion_target = np.where(near_channel[0] | near_channel[1], (ema_high + ema_low) / 2, np.nan)
+
+    valid = ((bars['regime_valid'] > 0) & _is_set(ema_high) & _is_set(ema_low)
+             & (np.arange(len(close)) >= MIN_SIGNAL_BARS - 1))
+    signal = np.where(valid, np.where(trending, trend_signal, reversion_signal), HOLD)
+    return {
+        'signal': signal,
+        'confidence': np.where(valid, np.where(trending, trend_confidence, reversion_confidence), 0),
+        'stop_loss': np.where(signal != HOLD, np.where(trending, trend_stop, reversion_stop), np.nan),
+        'take_profit': np.where(signal != HOLD, np.where(trending, np.nan, reversion_target), np.nan),
+        'strategy': np.where(signal != HOLD, np.where(trending, TREND_FOLLOW, MEAN_REVERSION), 'none'),
+    }
+
+
+def prepare_bars(unix, open_, high, low, close, volume, indicators):
+    """
+    Everything the strategies read that depends only on the prices, for one symbol
+
+    Args:
+        unix, open_ ... volume: the symbol's own bars, oldest first
+        indicators: dict of indicator engine outputs for the same bars
+    Returns: dict of BAR_FIELDS float64 arrays
+    """
+    ema_high, ema_low = indicators['ema_high_33'], indicators['ema_low_33']
+    scores = scoring.score_history(close, volume)
+    bars = {
+        'unix': unix, 'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume,
+        'channel_position': scoring.channel_position(close, ema_low, ema_high),
+        'deviation': scoring.deviation(close, ema_high),
+        'gain_10d': scores['gain_10d'],
+        'gain_20d': scores['gain_20d'],
+        'distance_from_high': scores['distance_from_high'],
+        'volume_divergence': np.select([scores['volume_divergence'] == scoring.BEARISH_DIV,
+                                        scores['volume_divergence'] == scoring.BULLISH_DIV],
+                                       [BEARISH, BULLISH], default=0),
+    }
+    bars.update({name: indicators[name] for name in ('rsi', 'macd', 'macd_signal', 'adx', 'ema_high_33', 'ema_low_33')})
+    bars.update(regime_inputs(close, volume, indicators['adx'], ema_high, ema_low))
+    return {field: np.asarray(bars[field], dtype=np.float64) for field in BAR_FIELDS}
+
+def prepare_backtest(symbols, interval, since=None, until=None):
+    """
+    Load the OHLC history of the symbols (one query) and run the indicator engine over all
+    of them in one pass
+
+    Returns: {symbol: prepare_bars dict}; symbols without bars are left out
+    """
+    symbols = list(symbols)
+    matrix = load_ohlc_matrix(symbols, interval, since=since, until=until)
+    outputs, _, _ = compute_indicators(matrix['high'], matrix['low'], matrix['close'])
+
+    prepared = {}
+    for i, symbol in enumerate(symbols):
+        rows = np.flatnonzero(~np.isnan(matrix['close'][:, i]))
+        if not len(rows):
+            continue
+        prepared[symbol] = prepare_bars(
+            matrix['unix'][rows], *(matrix[column][rows, i] for column in ('open', 'high', 'low', 'close', 'volume')),
+            {name: values[rows, i] for name, values in outputs.items()},
+        )
+    return prepared
+
+def _trade_bars(entries, exits):
+    """Bars held by every trade - (entry, exit] - as (bar index, trade index) arrays"""
+    lengths = exits - entries
+    trade_index = np.repeat(np.arange(len(entries)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return entries[trade_index] + offsets + 1, trade_index
+
+def simulate_trades(bars, signals, min_confidence=0, stop_loss=True, take_profit=True, fee_pct=0.0,
+                    allow_short=True):
+    """
+    Trades, equity curve and statistics of one symbol
+
+    Args:
+        bars: prepare_bars dict
+        signals: strategy_signals output for the same bars
+
+    Returns: dict - trades (DataFrame), equity (Series indexed by bar time, starting at 1.0),
+             stats (dict, see _statistics)
+    """
+    close, high, low, open_ = bars['close'], bars['high'], bars['low'], bars['open']
+    n_bars = len(close)
+
+    side = np.where(signals['confidence'] >= min_confidence, signals['signal'], HOLD)
+    if not allow_short:
+        side = np.where(side == SELL, HOLD, side)
+
+    # A trade per run of the same signal: entry at the close of its first bar, exit at the
+    # close of the bar where the signal changes (or the last bar)
+    changes = np.flatnonzero(np.diff(side) != 0) + 1
+    starts = np.concatenate([[0], changes]).astype(int)
+    ends = np.append(changes, n_bars - 1).astype(int)
+    opened = (side[starts] != HOLD) & (ends > starts)
+    entries, exits = starts[opened], ends[opened]
+    sides = side[entries]
+    entry_price = close[entries]
+    exit_price = close[exits]
+    exit_reason = np.where(exits == n_bars - 1, 'end', 'signal').astype(object)
+
+    # First bar after the entry where the stop loss or the take profit is touched
+    held, trade_index = _trade_bars(entries, exits)
+    trade_side = sides[trade_index]
+    long_trade = trade_side == BUY
+    stops = signals['stop_loss'][entries][trade_index]
+    targets = signals['take_profit'][entries][trade_index]
+    stop_hit = np.zeros(len(held), dtype=bool)
+    target_hit = np.zeros(len(held), dtype=bool)
+    if stop_loss:
+        stop_hit = np.where(long_trade, low[held] <= stops, high[held] >= stops)
+    if take_profit:
+        target_hit = np.where(long_trade, high[held] >= targets, low[held] <= targets)
+
+    hit = stop_hit | target_hit
+    hit_trades, first = np.unique(trade_index[hit], return_index=True)
+    if len(hit_trades):
+        hit_rows = np.flatnonzero(hit)[first]
+        hit_bars = held[hit_rows]
+        hit_long = long_trade[hit_rows]
+        # Stop first when both are touched in the same bar; a gap through the level fills at the open
+        by_stop = stop_hit[hit_rows]
+        level = np.where(by_stop, stops[hit_rows], targets[hit_rows])
+        gap_fill = np.where(hit_long == by_stop, np.fmin(level, open_[hit_bars]), np.fmax(level, open_[hit_bars]))
+        exits[hit_trades] = hit_bars
+        exit_price[hit_trades] = gap_fill
+        exit_reason[hit_trades] = np.where(by_stop, 'stop_loss', 'take_profit')
+
+    fee = fee_pct / 100
+    returns = sides * (exit_price / entry_price - 1) - 2 * fee
+
+    # Bar returns while a position is held (marked to market at every close)
+    held, trade_index = _trade_bars(entries, exits)
+    end_price = close[held].copy()
+    last_bar = held == exits[trade_index]
+    end_price[last_bar] = exit_price[trade_index[last_bar]]
+    bar_returns = np.zeros(n_bars)
+    bar_returns[held] = sides[trade_index] * (end_price / close[held - 1] - 1)
+    np.subtract.at(bar_returns, entries + 1, fee)
+    np.subtract.at(bar_returns, exits, fee)
+
+    times = pd.to_datetime(bars['unix'].astype(np.int64), unit='s', utc=True)
+    equity = pd.Series(np.cumprod(1 + bar_returns), index=times, name='equity')
+    trades = pd.DataFrame({
+        'entry_time': times[entries],
+        'exit_time': times[exits],
+        'side': np.where(sides == BUY, 'long', 'short'),
+        'strategy': signals['strategy'][entries],
+        'confidence': signals['confidence'][entries],
+        'entry_price': entry_price,
+        'exit_price': exit_price,
+        'exit_reason': exit_reason,
+        'return_pct': returns * 100,
+        'bars': exits - entries,
+    })
+    return {'trades': trades, 'equity': equity, 'stats': _statistics(close, equity, trades, held)}
+
+def _statistics(close, equity, trades, held):
+    values = equity.to_numpy()
+    drawdown = values / np.maximum.accumulate(values) - 1
+    n_trades = len(trades)
+    return {
+        'trades': n_trades,
+        'hit_rate': float((trades['return_pct'] > 0).mean() * 100) if n_trades else None,
+        'total_return_pct': float((values[-1] - 1) * 100),
+        'max_drawdown_pct': float(drawdown.min() * 100),
+        'avg_trade_pct': float(trades['return_pct'].mean()) if n_trades else None,
+        'exposure_pct': float(len(held) / len(values) * 100),
+        'buy_and_hold_pct': float((close[-1] / close[0] - 1) * 100),
+    }
+
+def backtest_symbol(bars, thresholds=None, **params):
+    """Signals + trades of one prepared symbol; params: trading parameters, see DEFAULT_PARAMS"""
+    return simulate_trades(bars, strategy_signals(bars, thresholds), **{**DEFAULT_PARAMS, **params})
+
+def run_backtest(symbols, interval, since=None, until=None, thresholds=None, **params):
+    """
+    Backtest the signal strategies for several symbols of one interval
+
+    Args:
+        since, until: optional bounds of the history (datetime or epoch seconds)
+        thresholds: strategy thresholds, overrides of DEFAULT_THRESHOLDS
+        params: trading parameters, see DEFAULT_PARAMS
+    Returns: {symbol: simulate_trades result}
+    """
+    prepared = prepare_backtest(symbols, interval, since=since, until=until)
+    return {symbol: backtest_symbol(bars, thresholds, **params) for symbol, bars in prepared.items()}
@@ -0,0 +1,51 @@
+"""
+Shared symbol / interval configuration for the data pipeline stages
+"""
+
+# Symbols processed by the hourly pipeline
+SYMBOLS = ['BTC/USD', 'ETH/USD', 'SOL/USD', 'DOGE/USD',
+           'BCH/USD', 'LTC/USD', 'XRP/USD', 'LINK/USD', 'ETH/BTC']
+
+# Interval in seconds (for database storage)
+INTERVALS = {
+    '1H': 3600,
+    '4H': 14400,
+    '1D': 86400,
+    '1W': 604800,
+}
+
+INTERVAL_NAMES = {seconds: name for name, seconds in INTERVALS.items()}
+
+# Kraken interval mapping (in minutes)
+KRAKEN_INTERVALS = {
+    '1H': 60,
+    '4H': 240,
+    '1D': 1440,
+    '1W': 10080,
+}
+
+# Kraken pair names (different from display names)
+KRAKEN_PAIRS = {
+    'BTC/USD': 'XXBTZUSD',
+    'ETH/USD': 'XETHZUSD',
+    'SOL/USD': 'SOLUSD',
+    'DOGE/USD': 'XDGUSD',
+    'BCH/USD': 'BCHUSD',
+    'LTC/USD': 'XLTCZUSD',
+    'XRP/USD': 'XXRPZUSD',
+    'LINK/USD': 'LINKUSD',
+    'ETH/BTC': 'XETHXXBT',
+}
+
+# Higher timeframe used for multi-timeframe analysis
+HIGHER_TIMEFRAME = {
+    3600: 14400,    # 1H -> 4H
+    14400: 86400,   # 4H -> 1D
+    86400: 604800,  # 1D -> 1W
+    604800: 604800  # 1W -> 1W (no higher TF)
+}
+
+
+def interval_name(interval):
+    """Human readable name for an interval in seconds"""
+    return INTERVAL_NAMES.get(interval, f'{interval}s')
@@ -0,0 +1,114 @@
+"""
+Pipeline context - in-memory state shared between stages of one pipeline run
+"""
+from api.latest_state import latest_row, latest_rows
+from api.ohlc_loader import load_ohlc_frame, load_ohlc_frames
+from .constants import SYMBOLS, INTERVALS
+
+
+class PipelineContext:
+    """
+    State shared by all stages of a single pipeline run
+
+    OHLC history is loaded once per (symbol, interval) and reused by every
+    stage, and each stage can leave results behind (latest indicator rows,
+    market regimes, ...) for the stages that run after it.
+    """
+
+    def __init__(self, symbols=None, intervals=None, pairs=None):
+        """
+        Args:
+            symbols: symbols to process (default: SYMBOLS)
+            intervals: intervals in seconds to process (default: all INTERVALS)
+            pairs: explicit list of (symbol, interval) tuples, overrides symbols/intervals
+        """
+        if pairs is None:
+            symbols = list(symbols or SYMBOLS)
+            intervals = list(intervals or INTERVALS.values())
+            pairs = [(symbol, interval) for interval in intervals for symbol in symbols]
+
+        self.pairs = list(pairs)
+        self.ohlc_frames = {}
+        self.ohlc_tails = {}
+        self.latest_indicators = {}
+        self.regimes = {}
+        self.active_signals = {}
+        self.results = {}
+        self.timings = {}
+
+    @property
+    def symbols(self):
+        return list(dict.fromkeys(symbol for symbol, _ in self.pairs))
+
+    @property
+    def intervals(self):
+        return list(dict.fromkeys(interval for _, interval in self.pairs))
+
+    def get_ohlc(self, symbol, interval, limit=None):
+        """
+        OHLC history for a (symbol, interval) as a DataFrame (oldest first)
+        Columns: unix, date, open, high, low, close, volume (prices as float)
+
+        Args:
+            limit: only the most recent `limit` bars (served from the full history when
+                   already loaded, otherwise only those bars are read)
+        """
+        key = (symbol, interval)
+        if key in self.ohlc_frames:
+            df = self.ohlc_frames[key]
+            return df if limit is None else df.tail(limit)
+
+        if limit is None:
+            self.ohlc_frames[key] = load_ohlc_frame(symbol, interval)
+            self.ohlc_tails.pop(key, None)
+            return self.ohlc_frames[key]
+
+        loaded_limit, df = self.ohlc_tails.get(key, (0, None))
+        if limit > loaded_limit:
+            df = load_ohlc_frame(symbol, interval, limit=limit)
+            self.ohlc_tails[key] = (limit, df)
+        return df.tail(limit)
+
+    def get_latest_indicator(self, symbol, interval):
+        """Latest Indicator row for a (symbol, interval), cached for this run"""
+        key = (symbol, interval)
+        if key not in self.latest_indicators:
+            self.latest_indicators[key] = latest_row('indicator', symbol, interval)
+        return self.latest_indicators[key]
+
+    def prefetch_ohlc(self, limit):
+        """Load the most recent `limit` bars of every pair - one query per interval"""
+        for interval in self.intervals:
+            symbols = [
+                symbol for symbol, pair_interval in self.pairs
+                if pair_interval == interval and (symbol, interval) not in self.ohlc_frames
+                and self.ohlc_tails.get((symbol, interval), (0, None))[0] < limit
+            ]
+            if symbols:
+                for symbol, df in load_ohlc_frames(symbols, interval, limit=limit).items():
+                    self.ohlc_tails[(symbol, interval)] = (limit, df)
+
+    def prefetch_latest_indicators(self):
+        """Cache the latest Indicator row of every pair not cached yet - one query"""
+        missing = [pair for pair in self.pairs if pair not in self.latest_indicators]
+        latest = latest_rows('indicator', missing)
+        for pair in missing:
+            self.latest_indicators[pair] = latest.get(pair)
+
+    def prefetch_latest_regimes(self):
+        """Latest MarketRegime of every pair not detected in this run - one query"""
+        missing = [pair for pair in self.pairs if pair not in self.regimes]
+        self.regimes.update(latest_rows('regime', missing))
+
+    def prefetch_active_signals(self):
+        """Newest active TradingSignal of every pair - one query"""
+        self.active_signals = latest_rows('signal', self.pairs)
+
+    def invalidate_ohlc(self, symbol, interval):
+        """Drop cached OHLC data after new candles were written"""
+        self.ohlc_frames.pop((symbol, interval), None)
+        self.ohlc_tails.pop((symbol, interval), None)
+
+    def invalidate_indicators(self, symbol, interval):
+        """Drop the cached latest indicator after indicator rows were written"""
+        self.latest_indicators.pop((symbol, interval), None)
@@ -0,0 +1,255 @@
+"""
+Fetch OHLC stage - pulls recent candles for every symbol and timeframe from Kraken
+确保有足够的历史数据来计算所有技术指标
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+
+from api.models import OhlcPrice, SymbolInfo
+from api.ohlc_writer import kraken_ohlc_rows, upsert_ohlc
+from api.providers.kraken_async import get_async_kraken_provider
+from .constants import INTERVALS, INTERVAL_NAMES, KRAKEN_INTERVALS, KRAKEN_PAIRS
+from .context import PipelineContext
+
+
+async def fetch_ohlc_for_symbol(provider, symbol, display_name, interval_name, limit=200):
+    """
+    Fetch OHLC data for a specific symbol and interval
+
+    Args:
+        provider: AsyncKrakenProvider instance
+        symbol: Kraken pair symbol (e.g., 'XXBTZUSD')
+        display_name: Display name (e.g., 'BTC/USD')
+        interval_name: Interval name (e.g., '1H', '4H', '1D', '1W')
+        limit: Number of data points to fetch (default 200)
+
+    Returns: number of bars written (new + updated), None if the fetch failed or was empty
+    """
+    interval_minutes = KRAKEN_INTERVALS[interval_name]
+    interval_seconds = INTERVALS[interval_name]
+    pair = f"{display_name} @ {interval_name}"
+
+    print(f"📊 Fetching {pair} (last {limit} points)...")
+
+    try:
+        # Fetch OHLC data from Kraken
+        result = await provider.get_ohlc_data(symbol, interval=interval_minutes)
+
+        if not result or symbol not in result:
+            print(f"  ❌ {pair}: No data returned from Kraken for {symbol}")
+            return None
+
+        ohlc_data = result[symbol]
+
+        if not ohlc_data:
+            print(f"  ❌ {pair}: Empty OHLC data for {symbol}")
+            return None
+
+        # Take only the last 'limit' data points
+        ohlc_data = ohlc_data[-limit:]
+
+        # Insert new bars and refresh existing ones (incl. the still-open last bar) in one statement
+        inserted, updated = await sync_to_async(upsert_ohlc)(kraken_ohlc_rows(ohlc_data, display_name, interval_seconds))
+
+        print(f"  ✅ {pair}: received {len(ohlc_data)} data points, {inserted} new, {updated} updated")
+
+        return inserted + updated
+
+    except Exception as e:
+        print(f"  ❌ {pair}: Error fetching data: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+async def fetch_pairs(pairs, provider=None, limit=200):
+    """
+    Fetch the latest candles of all (symbol, interval) pairs concurrently
+
+    The requests share one keep-alive connection pool and are paced by the provider's
+    rate limit bucket instead of a fixed sleep between them.
+
+    Args:
+        pairs: (display name, interval in seconds) tuples with a Kraken mapping
+        provider: AsyncKrakenProvider to use (default: a new one, closed afterwards)
+
+    Returns: {(symbol, interval): number of candles written, None for failed fetches}
+    """
+    own_provider = provider is None
+    provider = provider or get_async_kraken_provider()
+    try:
+        counts = await asyncio.gather(*(
+            fetch_ohlc_for_symbol(provider, KRAKEN_PAIRS[symbol], symbol, INTERVAL_NAMES[interval], limit=limit)
+            for symbol, interval in pairs
+        ))
+    finally:
+        if own_provider:
+            await provider.close()
+    return dict(zip(pairs, counts))
+
+
+def ensure_symbol_info():
+    """确保 SymbolInfo 表中有所有需要的品种"""
+    print("\n📝 Ensuring SymbolInfo entries...")
+
+    symbols = {
+        'BTC/USD': {
+            'description': 'Bitcoin / US Dollar',
+            'url_symbol': 'btcusd',
+            'base_decimals': 8,
+            'counter_decimals': 2,
+            'market_id': 2,  # Kraken
+            'trading': 'Enabled'
+        },
+        'ETH/USD': {
+            'description': 'Ethereum / US Dollar',
+            'url_symbol': 'ethusd',
+            'base_decimals': 8,
+            'counter_decimals': 2,
+            'market_id': 2,  # Kraken
+            'trading': 'Enabled'
+        },
+        'SOL/USD': {
+            'description': 'Solana / US Dollar',
+            'url_symbol': 'solusd',
+            'base_decimals': 8,
+            'counter_decimals': 2,
+            'market_id': 2,  # Kraken
+            'trading': 'Enabled'
+        },
+        'DOGE/USD': {
+            'description': 'Dogecoin / US Dollar',
+            'url_symbol': 'dogeusd',
+            'base_decimals': 8,
+            'counter_decimals': 4,
+            'market_id': 2,  # Kraken
+            'trading': 'Enabled'
+        },
+        'BCH/USD': {
+            'description': 'Bitcoin Cash / US Dollar',
+            'url_symbol': 'bchusd',
+            'base_decimals': 8,
+            'counter_decimals': 2,
+            'market_id': 2,  # Kraken
+            'trading': 'Enabled'
+        },
+        'LTC/USD': {
+            'description': 'Litecoin / US Dollar',
+            'url_symbol': 'ltcusd',
+            'base_decimals': 8,
+            'counter_decimals': 2,
+            'market_id': 2,  # Kraken
+            'trading': 'Enabled'
+        },
+        'XRP/USD': {
+            'description': 'Ripple / US Dollar',
+            'url_symbol': 'xrpusd',
+            'base_decimals': 8,
+            'counter_decimals': 4,
+            'market_id': 2,  # Kraken
+            'trading': 'Enabled'
+        },
+        'LINK/USD': {
+            'description': 'Chainlink / US Dollar',
+            'url_symbol': 'linkusd',
+            'base_decimals': 8,
+            'counter_decimals': 2,
+            'market_id': 2,  # Kraken
+            'trading': 'Enabled'
+        },
+        'ETH/BTC': {
+            'description': 'Ethereum / Bitcoin',
+            'url_symbol': 'ethbtc',
+            'base_decimals': 8,
+            'counter_decimals': 8,
+            'market_id': 2,  # Kraken
+            'trading': 'Enabled'
+        },
+    }
+
+    for symbol, defaults in symbols.items():
+        obj, created = SymbolInfo.objects.get_or_create(
+            name=symbol,
+            defaults=defaults
+        )
+        if created:
+            print(f"  ✅ Created: {symbol}")
+        else:
+            print(f"  ℹ️  Exists: {symbol}")
+
+
+def run(ctx, provider=None, limit=200):
+    """
+    Pipeline stage: fetch the latest candles for every (symbol, interval) in ctx
+    All pairs are requested concurrently (see fetch_pairs).
+    Cached OHLC frames are invalidated for pairs whose candles were written (new bars or
+    refreshed ones, e.g. the still-open last bar); only failed or empty fetches are errors.
+
+    Args:
+        provider: AsyncKrakenProvider instance (default: a new one for this run)
+    """
+    ensure_symbol_info()
+
+    pairs = []
+    for symbol, interval in ctx.pairs:
+        if symbol in KRAKEN_PAIRS and interval in INTERVAL_NAMES:
+            pairs.append((symbol, interval))
+        else:
+            print(f"  ⚠️  No Kraken mapping for {symbol} @ {interval}s, skipping")
+
+    print(f"\n🔌 Fetching {len(pairs)} pairs from Kraken API...")
+    counts = asyncio.run(fetch_pairs(pairs, provider=provider, limit=limit))
+
+    total_fetched = 0
+    total_errors = 0
+    for (symbol, interval), count in counts.items():
+        if count is None:
+            total_errors += 1
+        elif count > 0:
+            total_fetched += count
+            ctx.invalidate_ohlc(symbol, interval)
+
+    return {'fetched': total_fetched, 'errors': total_errors}
+
+
+def main():
+    """Main function to fetch historical data"""
+    print("=" * 70)
+    print("🚀 Historical Data Fetcher")
+    print("=" * 70)
+
+    ctx = PipelineContext(pairs=[
+        (display_name, INTERVALS[interval_name])
+        for display_name in KRAKEN_PAIRS
+        for interval_name in ['1H', '4H', '1D', '1W']
+    ])
+
+    print("\n" + "=" * 70)
+    print("📥 Fetching OHLC data...")
+    print("=" * 70)
+
+    summary = run(ctx)
+
+    # Summary
+    print("\n" + "=" * 70)
+    print("📊 Summary")
+    print("=" * 70)
+    print(f"✅ Total OHLC records written (new + updated): {summary['fetched']}")
+    print(f"❌ Total errors: {summary['errors']}")
+
+    # Show data statistics
+    print("\n📈 Database Statistics:")
+    for display_name in KRAKEN_PAIRS.keys():
+        for interval_name in ['1H', '4H', '1D', '1W']:
+            interval_seconds = INTERVALS[interval_name]
+            count = OhlcPrice.objects.filter(
+                symbol=display_name,
+                interval=interval_seconds
+            ).count()
+            print(f"  {display_name} @ {interval_name}: {count} records")
+
+    print("\n✅ Data fetch complete!")
+    print("\n💡 Next steps:")
+    print("  1. Run: docker exec seraphim-web-1 python scripts/calculate_indicators.py (incl. EMA Channel)")
+    print("  2. Test the dashboard at: http://localhost:8000/")
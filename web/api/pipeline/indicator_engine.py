@@ -0,0 +1,306 @@
+"""
+Vectorized indicator engine - SMA, EMA, MACD, RSI, ADX and the EMA-33 channel for
+many symbols at once
+
+Prices come in as aligned (time x symbol) matrices, NaN where a symbol has no bar.
+The recursion runs once over the time axis and every step updates all symbols with
+one NumPy operation, so adding symbols costs close to nothing. A symbol without a bar
+at a given time is simply skipped, which gives the same result as computing its own
+series on its own.
+
+The smoothing state can be persisted (IndicatorState) and fed back in, so later runs
+only process the bars that are new.
+"""
+import math
+
+import numpy as np
+
+SMA_WINDOW = 20
+EMA_FAST = 12
+EMA_SLOW = 26
+MACD_SIGNAL = 9
+RSI_WINDOW = 14
+ADX_WINDOW = 14
+CHANNEL_PERIOD = 33
+
+# (state key, alpha, adjust) of every exponentially weighted series
+# adjust=True matches pandas ewm(span=n), adjust=False Wilder's smoothing / ewm(adjust=False)
+EWM_SERIES = {
+    'ema_fast': (2 / (EMA_FAST + 1), True),
+    'ema_slow': (2 / (EMA_SLOW + 1), True),
+    'macd_signal': (2 / (MACD_SIGNAL + 1), True),
+    'atr': (1 / ADX_WINDOW, False),
+    'plus_dm': (1 / ADX_WINDOW, False),
+    'minus_dm': (1 / ADX_WINDOW, False),
+    'adx': (1 / ADX_WINDOW, False),
+    'ema_high_33': (2 / (CHANNEL_PERIOD + 1), False),
+    'ema_low_33': (2 / (CHANNEL_PERIOD + 1), False),
+}
+
+# Rolling windows keep the last size - 1 values (oldest first)
+WINDOWS = {
+    'closes': SMA_WINDOW,
+    'gains': RSI_WINDOW,
+    'losses': RSI_WINDOW,
+}
+
+OUTPUTS = ['sma_20', 'ema_12', 'ema_26', 'macd', 'macd_signal', 'macd_histogram',
+           'rsi', 'adx', 'ema_high_33', 'ema_low_33']
+
+
+def new_indicator_state():
+    """
+    Empty smoothing state of one indicator series (JSON-serialisable, stored in IndicatorState)
+    EWM entries are [mean, weight] pairs, windows hold the most recent values.
+    """
+    state = {'bars': 0, 'prev_high': None, 'prev_low': None, 'prev_close': None}
+    state.update({name: [] for name in WINDOWS})
+    state.update({name: [None, 0.0] for name in EWM_SERIES})
+    return state
+
+def is_compatible_state(state):
+    """A stored state written by an older engine misses keys and needs a full recalculation"""
+    return isinstance(state, dict) and set(new_indicator_state()) <= set(state)
+
+def stack_states(states):
+    """List of per-symbol state dicts (None = fresh) -> dict of (S,) / (S, n) arrays"""
+    states = [state if state is not None else new_indicator_state() for state in states]
+
+    def floats(values):
+        return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+    stacked = {
+        'bars': np.array([state['bars'] for state in states], dtype=np.int64),
+        'prev_high': floats(state['prev_high'] for state in states),
+        'prev_low': floats(state['prev_low'] for state in states),
+        'prev_close': floats(state['prev_close'] for state in states),
+    }
+    for name, size in WINDOWS.items():
+        window = np.full((len(states), size - 1), np.nan)
+        for i, state in enumerate(states):
+            values = state[name][-(size - 1):]
+            if values:
+                window[i, size - 1 - len(values):] = values
+        stacked[name] = window
+    for name in EWM_SERIES:
+        stacked[name] = np.array([floats(state[name]) for state in states]).reshape(len(states), 2).T.copy()
+    return stacked
+
+def unstack_states(stacked):
+    """Inverse of stack_states - one JSON-serialisable dict per symbol"""
+    def value(x):
+        x = float(x)
+        return None if math.isnan(x) else x
+
+    states = []
+    for i in range(len(stacked['bars'])):
+        state = {
+            'bars': int(stacked['bars'][i]),
+            'prev_high': value(stacked['prev_high'][i]),
+            'prev_low': value(stacked['prev_low'][i]),
+            'prev_close': value(stacked['prev_close'][i]),
+        }
+        for name in WINDOWS:
+            state[name] = [float(x) for x in stacked[name][i] if not math.isnan(x)]
+        for name in EWM_SERIES:
+            state[name] = [value(stacked[name][0, i]), float(stacked[name][1, i])]
+        states.append(state)
+    return states
+
+def _copy_state(stacked):
+    return {name: values.copy() for name, values in stacked.items()}
+
+def _forward_fill(values):
+    """Carry the last non-NaN value of every column forward along the time axis"""
+    valid = ~np.isnan(values)
+    index = np.where(valid, np.arange(len(values))[:, None], 0)
+    np.maximum.accumulate(index, axis=0, out=index)
+    return values[index, np.arange(values.shape[1])]
+
+def _previous_bar(values, active, initial):
+    """
+    Value of each symbol's previous bar at every row (gaps skipped, continuing from the state)
+    Returns: (previous (T, S), last value after the final row (S,))
+    """
+    carried = _forward_fill(np.vstack([initial[None, :], np.where(active, values, np.nan)]))
+    return carried[:-1], carried[-1]
+
+def _checkpoint_symbols(checkpoint_rows, n_rows):
+    """Symbols whose checkpoint row lies inside this batch"""
+    if checkpoint_rows is None:
+        return []
+    return [s for s, row in enumerate(checkpoint_rows) if 0 <= row < n_rows]
+
+def _rolling_run(stacked, name, values, active, checkpoint_rows, checkpoint):
+    """
+    Rolling mean over each symbol's own bars, continuing from the window kept in the state
+    Runs per symbol on the compressed series - vectorized along time.
+    """
+    size = WINDOWS[name]
+    n_rows, n_symbols = values.shape
+    means = np.full((n_rows, n_symbols), np.nan)
+    window = np.full((n_symbols, size - 1), np.nan)
+    checkpoints = set(_checkpoint_symbols(checkpoint_rows, n_rows))
+
+    for s in range(n_symbols):
+        rows = np.flatnonzero(active[:, s])
+        kept = stacked[name][s]
+        kept = kept[~np.isnan(kept)]
+        series = np.concatenate([kept, values[rows, s]])
+
+        if len(series) >= size:
+            window_means = np.lib.stride_tricks.sliding_window_view(series, size).mean(axis=1)
+            ends = len(kept) + np.arange(len(rows))
+            full = ends >= size - 1
+            means[rows[full], s] = window_means[ends[full] - (size - 1)]
+
+        tail = series[-(size - 1):]
+        window[s, size - 1 - len(tail):] = tail
+
+        if s in checkpoints:
+            before = series[:len(kept) + np.count_nonzero(rows < checkpoint_rows[s])][-(size - 1):]
+            checkpoint[name][s] = np.nan
+            if len(before):
+                checkpoint[name][s, size - 1 - len(before):] = before
+
+    stacked[name] = window
+    return means
+
+def _ewm_run(stacked, names, inputs, active, checkpoint_rows, checkpoint):
+    """
+    Exponentially weighted means (pandas ewm, ignore_na=False) of several series at once
+
+    The recursion steps along time; every step updates all series x all symbols with one
+    set of array operations. A symbol without a bar is skipped, a NaN value on a bar only
+    decays the weight of the history (like a NaN inside a pandas series).
+    Returns: (T, K, S) means
+    """
+    alpha = np.array([EWM_SERIES[name][0] for name in names])[:, None]
+    adjust = np.array([EWM_SERIES[name][1] for name in names])[:, None]
+    decay = 1 - alpha
+    new_weight = np.where(adjust, 1.0, alpha)
+
+    mean = np.array([stacked[name][0] for name in names])
+    weight = np.array([stacked[name][1] for name in names])
+    values = np.stack(inputs, axis=1)
+    means = np.empty_like(values)
+    checkpoints = {}
+    for s in _checkpoint_symbols(checkpoint_rows, len(values)):
+        checkpoints.setdefault(int(checkpoint_rows[s]), []).append(s)
+
+    for t in range(len(values)):
+        if t in checkpoints:
+            for name_index, name in enumerate(names):
+                checkpoint[name][0, checkpoints[t]] = mean[name_index, checkpoints[t]]
+                checkpoint[name][1, checkpoints[t]] = weight[name_index, checkpoints[t]]
+
+        value = values[t]
+        bar = active[t]
+        started = ~np.isnan(mean)
+        observed = bar & ~np.isnan(value)
+
+        weight = np.where(bar & started, weight * decay, weight)
+        with np.errstate(invalid='ignore'):
+            blended = np.where(mean == value, mean, (weight * mean + new_weight * value) / (weight + new_weight))
+
+        update = observed & started
+        mean = np.where(update, blended, np.where(observed, value, mean))
+        weight = np.where(update, np.where(adjust, weight + new_weight, 1.0), np.where(observed, 1.0, weight))
+        means[t] = mean
+
+    for name_index, name in enumerate(names):
+        stacked[name] = np.array([mean[name_index], weight[name_index]])
+    return means
+
+def _divide(numerator, denominator):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator == 0, np.nan, numerator / denominator)
+
+def compute_indicators(high, low, close, state=None, checkpoint_rows=None):
+    """
+    Compute all indicators over (time x symbol) price matrices
+
+    Args:
+        high, low, close: (T, S) float arrays, NaN where a symbol has no bar
+        state: stacked state (stack_states) to continue from, None for a fresh start
+        checkpoint_rows: optional (S,) row index per symbol - the state of each symbol
+                         just before that row is returned as the checkpoint
+
+    Returns: (outputs, state, checkpoint)
+        outputs: dict of (T, S) arrays for OUTPUTS, NaN where undefined / no bar
+    """
+    high, low, close = (np.asarray(values, dtype=np.float64) for values in (high, low, close))
+    n_rows, n_symbols = close.shape
+    stacked = _copy_state(state) if state is not None else stack_states([None] * n_symbols)
+    checkpoint = _copy_state(stacked)
+    active = ~(np.isnan(high) | np.isnan(low) | np.isnan(close))
+
+    # Previous bar of every symbol, bar counts
+    prev_high, last_high = _previous_bar(high, active, stacked['prev_high'])
+    prev_low, last_low = _previous_bar(low, active, stacked['prev_low'])
+    prev_close, last_close = _previous_bar(close, active, stacked['prev_close'])
+    first_bar = np.isnan(prev_close)
+    bars = stacked['bars'] + np.cumsum(active, axis=0)
+
+    # Per-bar inputs, vectorized along time
+    delta = np.where(first_bar, 0.0, close - prev_close)
+    gains = np.where(delta > 0, delta, 0.0)
+    losses = np.where(delta < 0, -delta, 0.0)
+
+    high_diff = high - prev_high
+    low_diff = prev_low - low
+    plus_dm = np.where(first_bar, np.nan, np.where((high_diff < 0) | (high_diff < low_diff), 0.0, high_diff))
+    minus_dm = np.where(first_bar, np.nan, np.where((low_diff < 0) | (low_diff < high_diff), 0.0, low_diff))
+    true_range = np.where(
+        first_bar, high - low,
+        np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+    )
+
+    # Rolling means: SMA and RSI averages
+    sma = _rolling_run(stacked, 'closes', close, active, checkpoint_rows, checkpoint)
+    avg_gain = _rolling_run(stacked, 'gains', gains, active, checkpoint_rows, checkpoint)
+    avg_loss = _rolling_run(stacked, 'losses', losses, active, checkpoint_rows, checkpoint)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+
+    # EMA, Wilder's smoothing for ADX, EMA Channel (轨道当值): EMA(High, 33) / EMA(Low, 33)
+    ema_fast, ema_slow, atr, smooth_plus, smooth_minus, ema_high, ema_low = np.moveaxis(_ewm_run(
+        stacked,
+        ['ema_fast', 'ema_slow', 'atr', 'plus_dm', 'minus_dm', 'ema_high_33', 'ema_low_33'],
+        [close, close, true_range, plus_dm, minus_dm, high, low],
+        active, checkpoint_rows, checkpoint,
+    ), 1, 0)
+
+    macd = ema_fast - ema_slow
+    plus_di = _divide(smooth_plus, atr)
+    minus_di = _divide(smooth_minus, atr)
+    dx = _divide(100 * np.abs(plus_di - minus_di), plus_di + minus_di)
+
+    macd_signal, adx = np.moveaxis(_ewm_run(
+        stacked, ['macd_signal', 'adx'], [macd, dx], active, checkpoint_rows, checkpoint,
+    ), 1, 0)
+
+    # State after the last row / at the checkpoints
+    stacked['prev_high'], stacked['prev_low'], stacked['prev_close'] = last_high, last_low, last_close
+    for s in _checkpoint_symbols(checkpoint_rows, n_rows):
+        row = checkpoint_rows[s]
+        checkpoint['prev_high'][s] = prev_high[row, s]
+        checkpoint['prev_low'][s] = prev_low[row, s]
+        checkpoint['prev_close'][s] = prev_close[row, s]
+        checkpoint['bars'][s] = bars[row, s] - active[row, s]
+    stacked['bars'] = bars[-1] if n_rows else stacked['bars']
+
+    channel_ready = bars >= CHANNEL_PERIOD
+    outputs = {
+        'sma_20': sma,
+        'ema_12': ema_fast,
+        'ema_26': ema_slow,
+        'macd': macd,
+        'macd_signal': macd_signal,
+        'macd_histogram': macd - macd_signal,
+        'rsi': rsi,
+        'adx': adx,
+        'ema_high_33': np.where(channel_ready, ema_high, np.nan),
+        'ema_low_33': np.where(channel_ready, ema_low, np.nan),
+    }
+    return {name: np.where(active, values, np.nan) for name, values in outputs.items()}, stacked, checkpoint
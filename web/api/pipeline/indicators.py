@@ -0,0 +1,213 @@
+"""
+Indicator stage - calculate technical indicators from OHLC data
+"""
+import numpy as np
+import pandas as pd
+from django.db import transaction
+
+from api.latest_state import latest_rows, refresh_latest_state
+from api.models import OhlcPrice, Indicator, IndicatorState
+from api.ohlc_loader import load_ohlc_matrix
+from .constants import interval_name as get_interval_name
+from .context import PipelineContext
+from .indicator_engine import compute_indicators, is_compatible_state, stack_states, unstack_states
+
+# Bars required before a series is first calculated
+MIN_BARS = 50
+
+# Outputs that must be defined before an indicator row is written
+REQUIRED_OUTPUTS = ['sma_20', 'ema_12', 'ema_26', 'macd', 'rsi', 'adx']
+
+
+def _optional(value):
+    return None if np.isnan(value) else float(value)
+
+def calculate_indicators_for_interval(symbols, interval=86400, limit=100, ctx=None, full=False):
+    """
+    Calculate indicators (incl. EMA Channel) for several symbols of one interval in one vectorized pass
+
+    Symbols with a stored IndicatorState only process the bars after their checkpoint
+    (the last, possibly still open, bar is replayed). Symbols without one - or all of
+    them with full=True - replay their whole history and write the most recent `limit`
+    bars. All rows are upserted in a single statement.
+    """
+    symbols = list(symbols)
+    ctx = ctx or PipelineContext(pairs=[(symbol, interval) for symbol in symbols])
+
+    interval_name = get_interval_name(interval)
+    print(f"📊 Calculating indicators for {len(symbols)} symbols @ {interval_name}...")
+
+    stored = {} if full else {
+        state.symbol: state
+        for state in IndicatorState.objects.filter(symbol__in=symbols, interval=interval)
+        if is_compatible_state(state.state)
+    }
+
+    indicators_to_upsert = []
+    states_to_save = []
+
+    incremental = [symbol for symbol in symbols if symbol in stored]
+    fresh = [symbol for symbol in symbols if symbol not in stored]
+
+    for group in (incremental, fresh):
+        if not group:
+            continue
+        is_incremental = group is incremental
+
+        matrix = load_ohlc_matrix(
+            group, interval,
+            since={symbol: stored[symbol].unix for symbol in group} if is_incremental else None
+        )
+        high, low, close, volume = matrix['high'], matrix['low'], matrix['close'], matrix['volume']
+        active = ~(np.isnan(high) | np.isnan(low) | np.isnan(close))
+        bar_rows = [np.flatnonzero(active[:, i]) for i in range(len(group))]
+
+        # Checkpoint each series just before its last bar, so the next run recomputes it
+        outputs, _, checkpoint = compute_indicators(
+            high, low, close,
+            state=stack_states([stored[symbol].state if is_incremental else None for symbol in group]),
+            checkpoint_rows=np.array([rows[-1] if len(rows) else -1 for rows in bar_rows]),
+        )
+        checkpoint_states = unstack_states(checkpoint)
+        times = pd.to_datetime(matrix['unix'], unit='s', utc=True)
+
+        defined = active & ~np.isnan(volume)
+        for name in REQUIRED_OUTPUTS:
+            defined &= ~np.isnan(outputs[name])
+
+        for i, symbol in enumerate(group):
+            rows = bar_rows[i]
+            if not len(rows):
+                print(f"  ⏭️  {symbol}: no OHLC data{' since ' + str(stored[symbol].unix) if is_incremental else ''}")
+                continue
+            if not is_incremental and len(rows) < MIN_BARS:
+                print(f"  ⚠️  {symbol}: insufficient data (only {len(rows)} records)")
+                continue
+
+            write_rows = np.flatnonzero(defined[:, i])
+            if not is_incremental:
+                write_rows = write_rows[-limit:]  # Only keep recent data on a full recalculation
+
+            for row in write_rows:
+                timestamp = times[row].to_pydatetime()
+                indicators_to_upsert.append(Indicator(
+                    symbol=symbol,
+                    unix=timestamp,  # UnixDateTimeField expects datetime object
+                    timestamp=timestamp,
+                    interval=interval,
+                    # Analytic series are stored as double precision, no rounding to price decimals
+                    volume=float(volume[row, i]),
+                    ma_20=float(outputs['sma_20'][row, i]),
+                    ema=float(outputs['ema_12'][row, i]),
+                    upper_ema=float(outputs['ema_26'][row, i]),
+                    macd=float(outputs['macd'][row, i]),
+                    signal_line=_optional(outputs['macd_signal'][row, i]),   # read by the MACD confirmation of signals.py
+                    histogram=_optional(outputs['macd_histogram'][row, i]),
+                    rsi=float(outputs['rsi'][row, i]),
+                    adx=float(outputs['adx'][row, i]),
+                    ema_high_33=_optional(outputs['ema_high_33'][row, i]),  # 上轨当值
+                    ema_low_33=_optional(outputs['ema_low_33'][row, i]),    # 下轨当值
+                ))
+
+            mode = "incremental" if is_incremental else "full"
+            print(f"  📈 {symbol}: {len(rows)} bars ({mode}), {len(write_rows)} indicator records")
+
+            checkpoint_unix = times[rows[-2]].to_pydatetime() if len(rows) > 1 else stored[symbol].unix
+            states_to_save.append(IndicatorState(
+                symbol=symbol,
+                interval=interval,
+                unix=checkpoint_unix,
+                state=checkpoint_states[i],
+            ))
+
+    with transaction.atomic():
+        # Upsert - one statement for all symbols of this interval
+        if indicators_to_upsert:
+            Indicator.objects.bulk_create(
+                indicators_to_upsert,
+                update_conflicts=True,
+                unique_fields=['symbol', 'interval', 'unix'],
+                update_fields=['timestamp', 'volume', 'ma_20', 'ema', 'upper_ema', 'macd', 'signal_line',
+                               'histogram', 'rsi', 'adx', 'ema_high_33', 'ema_low_33'],
+            )
+            print(f"  💾 Saved {len(indicators_to_upsert)} indicators to database")
+            refresh_latest_state('indicator', {(row.symbol, interval) for row in indicators_to_upsert})
+        else:
+            print(f"  ⚠️  No valid indicators to save")
+
+        if states_to_save:
+            IndicatorState.objects.bulk_create(
+                states_to_save,
+                update_conflicts=True,
+                unique_fields=['symbol', 'interval'],
+                update_fields=['unix', 'state', 'updated_at'],
+            )
+
+    for symbol in symbols:
+        ctx.invalidate_indicators(symbol, interval)
+
+def calculate_indicators_for_symbol(symbol, interval=86400, limit=100, ctx=None, full=False):
+    """Calculate indicators for a specific symbol and interval"""
+    calculate_indicators_for_interval([symbol], interval, limit=limit, ctx=ctx, full=full)
+
+def run(ctx, limit=100, full=False):
+    """Pipeline stage: calculate indicators for every (symbol, interval) in ctx, one pass per interval"""
+    success_count = 0
+    error_count = 0
+
+    for interval in ctx.intervals:
+        symbols = [symbol for symbol, pair_interval in ctx.pairs if pair_interval == interval]
+        try:
+            calculate_indicators_for_interval(symbols, interval, limit=limit, ctx=ctx, full=full)
+            success_count += len(symbols)
+        except Exception as e:
+            error_count += len(symbols)
+            print(f"  ❌ Error for {get_interval_name(interval)}: {e}")
+            import traceback
+            traceback.print_exc()
+
+    return {'success': success_count, 'failed': error_count}
+
+def main(full=False):
+    """
+    Main function to calculate indicators for all symbols and intervals with OHLC data
+    full=True ignores the stored smoothing state and replays the whole history
+    """
+    print("🧮 Technical Indicators Calculator")
+    print("="*50)
+
+    # Get all unique symbol/interval combinations
+    combinations = OhlcPrice.objects.values('symbol', 'interval').distinct()
+
+    print(f"Found {len(combinations)} symbol/interval combinations:")
+    for combo in combinations:
+        print(f"  - {combo['symbol']} @ {get_interval_name(combo['interval'])}")
+
+    print("\n" + "="*50)
+
+    # Calculate indicators for each symbol/interval combination
+    ctx = PipelineContext(pairs=[(combo['symbol'], combo['interval']) for combo in combinations])
+    summary = run(ctx, limit=100, full=full)
+
+    print("\n" + "="*50)
+    print("📊 Summary:")
+    print(f"✅ Successful: {summary['success']}")
+    print(f"❌ Failed: {summary['failed']}")
+
+    # Show final statistics
+    total_indicators = Indicator.objects.count()
+
+    print(f"\nTotal indicators in database: {total_indicators}")
+
+    # Show statistics by symbol
+    print("\n📈 Indicators by symbol:")
+    symbols = Indicator.objects.values_list('symbol', flat=True).distinct()
+    latest = latest_rows('indicator', [(symbol, interval) for symbol in symbols for interval in [3600, 14400, 86400, 604800]])
+    for symbol in symbols:
+        for interval in [3600, 14400, 86400, 604800]:
+            count = Indicator.objects.filter(symbol=symbol, interval=interval).count()
+            if count > 0:
+                latest_rsi = latest[(symbol, interval)].rsi if (symbol, interval) in latest else None
+                print(f"  {symbol} @ {get_interval_name(interval)}: {count} records (Latest RSI={latest_rsi})")
+
+    print("\n✅ Indicator calculation complete!")
@@ -0,0 +1,245 @@
+"""
+Market Regime stage - identifies if market is trending or ranging
+"""
+import pandas as pd
+from datetime import datetime, timezone
+
+from django.db import transaction
+
+from api.latest_state import latest_row, latest_rows, refresh_latest_state
+from api.models import MarketRegime
+from .constants import SYMBOLS, INTERVALS, HIGHER_TIMEFRAME, interval_name as get_interval_name
+from .context import PipelineContext
+
+# Regime detection thresholds
+REGIME_THRESHOLDS = {
+    'adx_trending': 25,       # ADX above -> trending (with the channel breakout)
+    'adx_ranging': 20,        # ADX below -> ranging (with the channel occupancy)
+    'adx_tiebreak': 22,       # mixed signals: trending above this ADX
+    'channel_trending': 55,   # less than this % of the last 20 bars inside the channel = breakout
+    'channel_ranging': 70,    # more than this % inside the channel = ranging
+}
+
+
+def calculate_channel_metrics(df, ema_high, ema_low):
+    """
+    Calculate channel-related metrics
+    Returns: (in_channel_pct, channel_width_pct)
+    """
+    # How many bars are inside the channel (last 20 bars)
+    recent_df = df.tail(20)
+    inside_channel = ((recent_df['close'] >= ema_low) & (recent_df['close'] <= ema_high)).sum()
+    in_channel_pct = (inside_channel / len(recent_df)) * 100
+
+    # Channel width as percentage of price
+    channel_width_pct = ((ema_high - ema_low) / ema_low) * 100
+
+    return in_channel_pct, channel_width_pct
+
+def detect_trend_direction(df, ema_high, ema_low):
+    """
+    Detect trend direction based on price position relative to channel
+    Returns: 'up', 'down', or 'neutral'
+    """
+    close = df['close'].iloc[-1]
+
+    if close > ema_high:
+        return 'up'
+    elif close < ema_low:
+        return 'down'
+    else:
+        return 'neutral'
+
+def calculate_volume_ratio(df):
+    """Calculate current volume vs 20-period average"""
+    if len(df) < 20:
+        return None
+
+    recent_volume = df['volume'].tail(20).mean()
+    current_volume = df['volume'].iloc[-1]
+
+    if recent_volume > 0:
+        return float(current_volume / recent_volume)
+    return None
+
+def get_higher_timeframe_trend(symbol, current_interval, ctx=None):
+    """
+    Get trend from higher timeframe for multi-timeframe analysis
+    """
+    higher_interval = HIGHER_TIMEFRAME.get(current_interval, current_interval)
+
+    # Regime detected earlier in this pipeline run (higher timeframes run first)
+    if ctx is not None and (symbol, higher_interval) in ctx.regimes:
+        return ctx.regimes[(symbol, higher_interval)].trend_direction
+
+    # Get latest market regime from higher timeframe
+    try:
+        higher_regime = latest_row('regime', symbol, higher_interval)
+
+        if higher_regime:
+            return higher_regime.trend_direction
+    except:
+        pass
+
+    return None
+
+def detect_market_regime(symbol, interval=86400, lookback=50, ctx=None):
+    """
+    Detect market regime for a specific symbol and interval
+    """
+    ctx = ctx or PipelineContext(pairs=[(symbol, interval)])
+
+    interval_name = get_interval_name(interval)
+    print(f"🔍 Detecting market regime for {symbol} @ {interval_name}...")
+
+    # Get OHLC data (oldest first)
+    df = ctx.get_ohlc(symbol, interval, limit=lookback).reset_index(drop=True)
+
+    if df.empty:
+        print(f"  ❌ No OHLC data found")
+        return
+
+    if len(df) < 20:
+        print(f"  ⚠️  Insufficient data (only {len(df)} records)")
+        return
+
+    # Get latest indicator data (includes ADX and EMA Channel)
+    latest_indicator = ctx.get_latest_indicator(symbol, interval)
+
+    if not latest_indicator:
+        print(f"  ❌ No indicator data found")
+        return
+
+    # Get ADX value
+    adx = float(latest_indicator.adx) if latest_indicator.adx else None
+
+    # Get EMA Channel values
+    ema_high = float(latest_indicator.ema_high_33) if latest_indicator.ema_high_33 else None
+    ema_low = float(latest_indicator.ema_low_33) if latest_indicator.ema_low_33 else None
+
+    if not adx or not ema_high or not ema_low:
+        print(f"  ⚠️  Missing ADX or EMA Channel data")
+        return
+
+    # Calculate channel metrics
+    in_channel_pct, channel_width_pct = calculate_channel_metrics(df, ema_high, ema_low)
+
+    # Detect trend direction
+    trend_direction = detect_trend_direction(df, ema_high, ema_low)
+
+    # Calculate volume ratio
+    volume_ratio = calculate_volume_ratio(df)
+
+    # Get higher timeframe trend
+    higher_tf_trend = get_higher_timeframe_trend(symbol, interval, ctx=ctx)
+
+    # === REGIME DETECTION LOGIC ===
+
+    thresholds = REGIME_THRESHOLDS
+
+    # Method 1: ADX threshold (ADX > 25 = trending, ADX < 20 = ranging)
+    adx_trending = adx > thresholds['adx_trending']
+    adx_ranging = adx < thresholds['adx_ranging']
+
+    # Method 2: Channel breakout (price outside channel = trending)
+    price_outside_channel = in_channel_pct < thresholds['channel_trending']  # If < 55% time inside = trending
+
+    # Combined decision
+    if adx_trending and price_outside_channel:
+        regime_type = 'trending'
+    elif adx_ranging and in_channel_pct > thresholds['channel_ranging']:
+        regime_type = 'ranging'
+    else:
+        # Mixed signals - use ADX as tie-breaker
+        regime_type = 'trending' if adx > thresholds['adx_tiebreak'] else 'ranging'
+
+    print(f"  📊 Regime: {regime_type.upper()}")
+    print(f"     ADX: {adx:.2f}")
+    print(f"     Channel In: {in_channel_pct:.1f}%")
+    print(f"     Trend: {trend_direction}")
+    print(f"     Volume Ratio: {volume_ratio:.2f}" if volume_ratio else "     Volume Ratio: N/A")
+
+    # Save to database
+    timestamp = df['date'].iloc[-1].to_pydatetime()
+    unix_timestamp = int(pd.to_datetime(timestamp).timestamp())
+    unix_dt = datetime.fromtimestamp(unix_timestamp, tz=timezone.utc)
+
+    # Create new regime record
+    regime = MarketRegime(
+        symbol=symbol,
+        unix=unix_dt,
+        timestamp=timestamp,
+        interval=interval,
+        regime_type=regime_type,
+        trend_direction=trend_direction,
+        adx=round(adx, 2),
+        channel_in_pct=round(in_channel_pct, 2),
+        channel_width_pct=round(channel_width_pct, 2),
+        higher_tf_trend=higher_tf_trend,
+        volume_ratio=round(volume_ratio, 2) if volume_ratio else None
+    )
+
+    with transaction.atomic():
+        # Delete existing regime for this timestamp (update)
+        MarketRegime.objects.filter(
+            symbol=symbol,
+            interval=interval,
+            unix=unix_dt
+        ).delete()
+        regime.save()
+        refresh_latest_state('regime', [(symbol, interval)])
+    ctx.regimes[(symbol, interval)] = regime
+
+    print(f"  💾 Saved market regime")
+
+def run(ctx, lookback=50):
+    """
+    Pipeline stage: market regime for every (symbol, interval) in ctx
+    Processed from highest to lowest timeframe (for multi-TF analysis)
+    """
+    success_count = 0
+    error_count = 0
+
+    for interval in sorted(ctx.intervals, reverse=True):
+        print(f"\n📊 Processing {get_interval_name(interval)} timeframe...")
+
+        for symbol, pair_interval in ctx.pairs:
+            if pair_interval != interval:
+                continue
+            try:
+                detect_market_regime(symbol, interval, lookback=lookback, ctx=ctx)
+                success_count += 1
+            except Exception as e:
+                error_count += 1
+                print(f"  ❌ Error for {symbol} @ {get_interval_name(interval)}: {e}")
+                import traceback
+                traceback.print_exc()
+
+    return {'success': success_count, 'failed': error_count}
+
+def main():
+    """Main function to detect market regime for all symbols and intervals"""
+    print("🔍 Market Regime Detection")
+    print("="*50)
+
+    ctx = PipelineContext(symbols=SYMBOLS, intervals=INTERVALS.values())
+    summary = run(ctx, lookback=50)
+
+    print("\n" + "="*50)
+    print("📊 Summary:")
+    print(f"✅ Successful: {summary['success']}")
+    print(f"❌ Failed: {summary['failed']}")
+
+    # Show latest regimes
+    print("\n🔍 Latest Market Regimes:")
+    regimes = latest_rows('regime', [(symbol, interval) for symbol in SYMBOLS for interval in [86400, 604800]])
+    for symbol in SYMBOLS:
+        for interval_name, interval in [('1D', 86400), ('1W', 604800)]:
+            regime = regimes.get((symbol, interval))
+
+            if regime:
+                emoji = "📈" if regime.regime_type == "trending" else "📊"
+                print(f"  {emoji} {symbol} @ {interval_name}: {regime.regime_type.upper()} "
+                      f"({regime.trend_direction}, ADX={regime.adx})")
+
+    print("\n✅ Market regime detection complete!")
@@ -0,0 +1,128 @@
+"""
+Pipeline runner - executes the data pipeline stages in-process
+
+Every stage is a plain function ``run(ctx, **options)`` that works on a shared
+PipelineContext, so one warm Python runtime (Django, pandas, DB connection)
+serves the whole run and OHLC history is loaded once instead of once per script.
+"""
+import logging
+import time
+
+from django.utils import timezone
+
+from api.models import PipelineStageRun
+from . import fetch, indicators, market_regime, signals
+from .context import PipelineContext
+
+logger = logging.getLogger(__name__)
+
+
+# Stage name -> (stage function, stages it depends on)
+STAGES = {
+    'fetch': (fetch.run, []),
+    'indicators': (indicators.run, ['fetch']),  # incl. EMA Channel
+    'market_regime': (market_regime.run, ['indicators']),
+    'signals': (signals.run, ['market_regime']),
+}
+
+
+def resolve_stages(stages=None):
+    """
+    Topologically ordered list of stage names
+
+    Args:
+        stages: stage names to run (default: all). Dependencies are only used for
+                ordering - a stage that is not requested is not pulled in.
+    """
+    requested = list(STAGES) if stages is None else list(stages)
+
+    unknown = [name for name in requested if name not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown pipeline stage(s): {', '.join(unknown)}")
+
+    ordered = []
+    visiting = set()
+
+    def visit(name):
+        if name in ordered:
+            return
+        if name in visiting:
+            raise ValueError(f"Pipeline stage dependency cycle at '{name}'")
+        visiting.add(name)
+        for dependency in STAGES[name][1]:
+            visit(dependency)
+        visiting.discard(name)
+        ordered.append(name)
+
+    for name in requested:
+        visit(name)
+
+    return [name for name in ordered if name in requested]
+
+
+def record_stage_run(run_id, name, ctx, started_at, duration, result=None, error=None):
+    """Persist timing of one stage execution (one row per stage, per pair when fanned out)"""
+    symbol, interval = ctx.pairs[0] if len(ctx.pairs) == 1 else (None, None)
+    try:
+        PipelineStageRun.objects.create(
+            run_id=run_id,
+            stage=name,
+            symbol=symbol,
+            interval=interval,
+            status='error' if error else 'success',
+            started_at=started_at,
+            duration=duration,
+            result=result if isinstance(result, dict) else None,
+            error=error,
+        )
+    except Exception as e:
+        logger.warning(f"Could not record stage run '{name}': {str(e)}")
+
+
+def run_stage(name, ctx, run_id=None, **options):
+    """
+    Run a single stage on ctx, recording its result and wall time
+
+    Args:
+        run_id: when given, the timing is also stored as a PipelineStageRun row
+    """
+    stage_func = STAGES[name][0]
+
+    logger.info(f"Pipeline stage '{name}' started ({len(ctx.pairs)} pairs)")
+    started_at = timezone.now()
+    started = time.monotonic()
+    try:
+        result = stage_func(ctx, **options)
+    except Exception as e:
+        ctx.timings[name] = round(time.monotonic() - started, 3)
+        if run_id:
+            record_stage_run(run_id, name, ctx, started_at, ctx.timings[name], error=str(e))
+        raise
+
+    ctx.timings[name] = round(time.monotonic() - started, 3)
+    ctx.results[name] = result
+    if run_id:
+        record_stage_run(run_id, name, ctx, started_at, ctx.timings[name], result=result)
+
+    logger.info(f"Pipeline stage '{name}' finished in {ctx.timings[name]}s: {result}")
+    return result
+
+
+def run_pipeline(stages=None, symbols=None, intervals=None, ctx=None, run_id=None):
+    """
+    Run the pipeline stages in dependency order on one shared context
+
+    Returns: dict of stage name -> {'status', 'result' | 'error', 'duration'}
+    """
+    ctx = ctx or PipelineContext(symbols=symbols, intervals=intervals)
+    results = {}
+
+    for name in resolve_stages(stages):
+        try:
+            result = run_stage(name, ctx, run_id=run_id)
+            results[name] = {'status': 'success', 'result': result, 'duration': ctx.timings[name]}
+        except Exception as e:
+            logger.error(f"Pipeline stage '{name}' failed: {str(e)}")
+            results[name] = {'status': 'error', 'error': str(e), 'duration': ctx.timings.get(name)}
+
+    return results
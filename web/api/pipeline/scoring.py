@@ -0,0 +1,162 @@
+"""
+Vectorized scoring helpers - the multi-dimensional analysis of the signal strategies
+evaluated for every bar of a price history at once
+
+All inputs are NumPy arrays ordered oldest first; every output has one value per bar,
+computed only from that bar and the bars before it (NaN / None where the history is
+too short). The latest bar (index -1) is what the live signal stage uses; the full
+arrays serve backfills of historical confidence scores and backtests.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+BEARISH_DIV = 'BEARISH_DIV'
+BULLISH_DIV = 'BULLISH_DIV'
+
+# Penalty tiers: upper bounds (%) of each tier, the penalty of every tier is fixed
+DEVIATION_TIERS = (3, 5, 10)        # < 3% -> 5, < 5% -> 15, < 10% -> 25, above -> 40
+GAIN_10D_TIERS = (7, 10, 20)        # > 7% -> 5, > 10% -> 10, > 20% -> 20
+GAIN_20D_TIERS = (20, 40)           # > 20% -> 5, > 40% -> 15
+
+
+def _divide(numerator, denominator):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator == 0, np.nan, numerator / denominator)
+
+def _trailing(values, window, reducer):
+    """
+    reducer over the last `window` bars of every bar, shorter windows at the start
+    (the first value is repeated in front, which does not change a max or a min)
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0:
+        return values
+    padded = np.concatenate([np.full(window - 1, values[0]), values])
+    return reducer(sliding_window_view(padded, window), axis=1)
+
+def _window_mean(values, window):
+    """Mean of the last `window` bars of every bar, NaN until a full window exists"""
+    values = np.asarray(values, dtype=float)
+    means = np.full(len(values), np.nan)
+    if len(values) >= window:
+        means[window - 1:] = sliding_window_view(values, window).mean(axis=1)
+    return means
+
+def _shift(values, periods):
+    """Value `periods` bars earlier, NaN for the first bars"""
+    shifted = np.full(len(values), np.nan)
+    if periods < len(values):
+        shifted[periods:] = values[:len(values) - periods]
+    return shifted
+
+
+def channel_position(close, ema_low, ema_high):
+    """
+    Price position within the EMA channel (%)
+    0-100% = within channel, >100% = above channel; NaN without a valid channel
+    """
+    close, ema_low, ema_high = (np.asarray(a, dtype=float) for a in (close, ema_low, ema_high))
+    valid = (ema_low > 0) & (ema_high > 0) & (ema_high > ema_low)
+    position = _divide(close - ema_low, np.where(valid, ema_high - ema_low, 0))
+    return np.round(position * 100, 1)
+
+def deviation(close, ema_high):
+    """Price deviation from EMA High (%), positive = above EMA High"""
+    close, ema_high = np.asarray(close, dtype=float), np.asarray(ema_high, dtype=float)
+    return np.round(_divide(close - ema_high, ema_high) * 100, 2)
+
+def deviation_penalty(deviation, tiers=DEVIATION_TIERS):
+    """Confidence penalty of the price deviation (0 within the channel or without a value)"""
+    deviation = np.asarray(deviation, dtype=float)
+    low, mid, high = tiers
+    return np.select(
+        [np.isnan(deviation) | (deviation < 0), deviation < low, deviation < mid, deviation < high],
+        [0, 5, 15, 25],
+        default=40,
+    )
+
+def recent_gain(close, days=10):
+    """Price gain over the last `days` bars (%)"""
+    close = np.asarray(close, dtype=float)
+    past = _shift(close, days)
+    return np.round(_divide(close - past, past) * 100, 2)
+
+def gain_penalty(gain_10d, gain_20d, tiers_10d=GAIN_10D_TIERS, tiers_20d=GAIN_20D_TIERS):
+    """Confidence penalty of recent gains (NaN gains add nothing)"""
+    gain_10d, gain_20d = np.asarray(gain_10d, dtype=float), np.asarray(gain_20d, dtype=float)
+    low, mid, high = tiers_10d
+    penalty_10d = np.select([gain_10d > high, gain_10d > mid, gain_10d > low], [20, 10, 5], default=0)
+    low, high = tiers_20d
+    penalty_20d = np.select([gain_20d > high, gain_20d > low], [15, 5], default=0)
+    return penalty_10d + penalty_20d
+
+def historical_position(close, lookback=365):
+    """
+    Price position within the range of the last `lookback` bars (the bar itself included)
+
+    Returns: dict of arrays - year_high, year_low, distance_from_high, distance_from_low, position_pct
+    """
+    close = np.asarray(close, dtype=float)
+    year_high = _trailing(close, lookback, np.max)
+    year_low = _trailing(close, lookback, np.min)
+    position_pct = np.where(year_high != year_low,
+                            np.round(_divide(close - year_low, year_high - year_low) * 100, 1), 50)
+    return {
+        'year_high': year_high,
+        'year_low': year_low,
+        'distance_from_high': np.round(_divide(close - year_high, year_high) * 100, 2),
+        'distance_from_low': np.round(_divide(close - year_low, year_low) * 100, 2),
+        'position_pct': position_pct,
+    }
+
+def historical_penalty(distance_from_high):
+    """Confidence penalty of the distance from the yearly high (negative = bonus)"""
+    distance_from_high = np.asarray(distance_from_high, dtype=float)
+    return np.select([distance_from_high > -5, distance_from_high > -15, distance_from_high < -50],
+                     [20, 10, -15], default=0)
+
+def volume_divergence(close, volume, window=5):
+    """
+    Volume divergence of the last `window` bars against the `window` bars before
+    Returns: object array of BEARISH_DIV (price up >5%, volume down >20%),
+             BULLISH_DIV (price down >5%, volume down >20%) or None
+    """
+    close = np.asarray(close, dtype=float)
+    volume = np.nan_to_num(np.asarray(volume, dtype=float))
+
+    recent_price = _window_mean(close, window)
+    recent_volume = _window_mean(volume, window)
+    past_price = _shift(recent_price, window)
+    past_volume = _shift(recent_volume, window)
+
+    valid = (past_price != 0) & (past_volume != 0) & ~np.isnan(past_price) & ~np.isnan(past_volume)
+    price_change = _divide(recent_price - past_price, np.where(valid, past_price, 0))
+    volume_change = _divide(recent_volume - past_volume, np.where(valid, past_volume, 0))
+
+    divergence = np.full(len(close), None, dtype=object)
+    volume_drop = volume_change < -0.2
+    divergence[(price_change > 0.05) & volume_drop] = BEARISH_DIV
+    divergence[(price_change < -0.05) & volume_drop] = BULLISH_DIV
+    return divergence
+
+
+def score_history(close, volume):
+    """
+    Price-based metrics of the signal strategies for every bar
+
+    Args:
+        close, volume: arrays, oldest first
+    Returns: dict of arrays - gain_10d, gain_20d, gain_penalty, historical position
+             (see historical_position), historical_penalty, volume_divergence
+    """
+    gain_10d = recent_gain(close, 10)
+    gain_20d = recent_gain(close, 20)
+    position = historical_position(close, 365)
+    return {
+        'gain_10d': gain_10d,
+        'gain_20d': gain_20d,
+        'gain_penalty': gain_penalty(gain_10d, gain_20d),
+        **position,
+        'historical_penalty': historical_penalty(position['distance_from_high']),
+        'volume_divergence': volume_divergence(close, volume, 5),
+    }
@@ -0,0 +1,704 @@
+"""
+Trading Signal stage - generates buy/sell/hold signals based on market regime and indicators
+"""
+import numpy as np
+import pandas as pd
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.db import transaction
+
+from api.latest_state import refresh_latest_state
+from api.models import TradingSignal
+from . import scoring
+from .constants import SYMBOLS, INTERVALS, interval_name as get_interval_name
+from .context import PipelineContext
+
+# Bars of history used for the multi-dimensional analysis
+SIGNAL_LOOKBACK = 400
+
+# ========================================
+# Multi-Dimensional Analysis Functions
+# ========================================
+
+def _value(value):
+    """NumPy scalar -> float, NaN -> None"""
+    value = float(value)
+    return None if np.isnan(value) else value
+
+def _nan(value):
+    return np.nan if value is None else value
+
+def calculate_channel_position(price, ema_low, ema_high):
+    """
+    Calculate price position within EMA channel
+    Returns: percentage (0-100% = within channel, >100% = above channel)
+    """
+    if not ema_low or not ema_high:
+        return None
+    return _value(scoring.channel_position(price, ema_low, ema_high))
+
+def calculate_deviation(price, ema_high):
+    """
+    Calculate price deviation from EMA High
+    Returns: percentage (positive = above EMA High)
+    """
+    if not ema_high:
+        return None
+    return _value(scoring.deviation(price, ema_high))
+
+def get_deviation_penalty(deviation):
+    """
+    Calculate confidence penalty based on price deviation
+    """
+    return int(scoring.deviation_penalty(_nan(deviation)))
+
+def get_gain_penalty(gain_10d, gain_20d):
+    """
+    Calculate confidence penalty based on recent gains
+    """
+    penalty = int(scoring.gain_penalty(_nan(gain_10d), _nan(gain_20d)))
+    warnings = []
+    
+    low, mid, high = scoring.GAIN_10D_TIERS
+    if gain_10d is not None:
+        if gain_10d > high:
+            warnings.append(f"10日暴涨 {gain_10d:+.1f}%")
+        elif gain_10d > mid:
+            warnings.append(f"10日快涨 {gain_10d:+.1f}%")
+        elif gain_10d > low:
+            warnings.append(f"10日上涨 {gain_10d:+.1f}%")
+    
+    if gain_20d is not None and gain_20d > scoring.GAIN_20D_TIERS[1]:
+        warnings.append(f"20日涨幅过大 {gain_20d:+.1f}%")
+    
+    return penalty, warnings
+
+def get_historical_penalty(distance_from_high):
+    """
+    Calculate confidence penalty based on historical position
+    """
+    if distance_from_high is None:
+        return 0, []
+    
+    penalty = int(scoring.historical_penalty(distance_from_high))
+    if penalty == 20:
+        return penalty, [f"接近年度高点 {distance_from_high:+.1f}%"]
+    elif penalty == 10:
+        return penalty, [f"中高位置 {distance_from_high:+.1f}%"]
+    elif penalty == -15:
+        return penalty, [f"✅ 低位机会 {distance_from_high:+.1f}%"]  # Negative = bonus
+    else:
+        return 0, []
+
+def latest_scores(historical_data):
+    """
+    Metrics of the latest bar from the per-bar arrays of scoring.score_history
+    Returns: (gain_10d, gain_20d, historical position dict or None, volume divergence)
+    """
+    historical_pos = {
+        name: _value(historical_data[name][-1])
+        for name in ('year_high', 'year_low', 'distance_from_high', 'distance_from_low', 'position_pct')
+    }
+    return (
+        _value(historical_data['gain_10d'][-1]),
+        _value(historical_data['gain_20d'][-1]),
+        historical_pos if historical_pos['year_high'] is not None else None,
+        historical_data['volume_divergence'][-1],
+    )
+
+# ========================================
+# Strategy Functions
+# ========================================
+
+def generate_trend_following_signal(symbol, interval, latest_price, indicator, regime, historical_data):
+    """
+    Strategy 1: EMA Channel Breakout (Trend Following) with Multi-Dimensional Analysis
+    - Prevents chasing tops and bottoms
+    - Buy: Price breaks above EMA High (with safety checks)
+    - Sell: Price breaks below EMA Low or back into channel
+    historical_data: per-bar metrics from scoring.score_history (oldest first)
+    """
+    ema_high = float(indicator.ema_high_33) if indicator.ema_high_33 else None
+    ema_low = float(indicator.ema_low_33) if indicator.ema_low_33 else None
+    
+    if not ema_high or not ema_low:
+        return None
+    
+    close_price = float(latest_price)
+    rsi = float(indicator.rsi) if indicator.rsi else None
+    
+    # === Multi-Dimensional Analysis ===
+    channel_position = calculate_channel_position(close_price, ema_low, ema_high)
+    deviation = calculate_deviation(close_price, ema_high)
+    gain_10d, gain_20d, historical_pos, volume_div = latest_scores(historical_data)
+    
+    # Base confidence and warnings
+    confidence = 50
+    trigger_reasons = []
+    
+    # Initialize confidence breakdown tracker
+    breakdown = {
+        'base_score': 50,
+        'adjustments': [],
+        'final_score': 0,
+        'metrics': {
+            'channel_position': channel_position,
+            'deviation': deviation,
+            'rsi': rsi,
+            'gain_10d': gain_10d,
+            'gain_20d': gain_20d,
+            'historical_distance': historical_pos['distance_from_high'] if historical_pos else None,
+            'volume_divergence': volume_div
+        }
+    }
+    
+    # ========================================
+    # BUY SIGNAL: Price above EMA High
+    # ========================================
+    if close_price > ema_high:
+        signal_type = 'buy'
+        trigger_reasons.append(f"突破EMA High ${ema_high:.2f}")
+        
+        # 1. Channel Position Analysis (HIGHEST WEIGHT)
+        if channel_position is not None:
+            if channel_position > 200:
+                confidence -= 40
+                breakdown['adjustments'].append({'factor': '通道位置', 'value': f'{channel_position:.0f}%', 'impact': -40, 'reason': '极度超买'})
+                trigger_reasons.append(f"⚠️ 极度超买：通道位置 {channel_position:.0f}%")
+            elif channel_position > 150:
+                confidence -= 30
+                breakdown['adjustments'].append({'factor': '通道位置', 'value': f'{channel_position:.0f}%', 'impact': -30, 'reason': '严重超买'})
+                trigger_reasons.append(f"⚠️ 严重超买：通道位置 {channel_position:.0f}%")
+            elif channel_position > 100:
+                confidence -= 20
+                breakdown['adjustments'].append({'factor': '通道位置', 'value': f'{channel_position:.0f}%', 'impact': -20, 'reason': '突破通道'})
+                trigger_reasons.append(f"⚠️ 突破通道：位置 {channel_position:.0f}%")
+            elif channel_position > 80:
+                confidence -= 10
+                breakdown['adjustments'].append({'factor': '通道位置', 'value': f'{channel_position:.0f}%', 'impact': -10, 'reason': '接近上轨'})
+            elif channel_position < 40:
+                confidence += 20
+                breakdown['adjustments'].append({'factor': '通道位置', 'value': f'{channel_position:.0f}%', 'impact': +20, 'reason': '低位机会'})
+        
+        # 2. Deviation from EMA High
+        deviation_penalty = get_deviation_penalty(deviation)
+        if deviation_penalty > 0:
+            confidence -= deviation_penalty
+            breakdown['adjustments'].append({'factor': '乖离率', 'value': f'{deviation:+.1f}%', 'impact': -deviation_penalty, 'reason': '价格偏离EMA'})
+            if deviation and deviation > 0:
+                trigger_reasons.append(f"乖离率 {deviation:+.1f}%")
+        
+        # 3. RSI Overbought Check
+        if rsi is not None:
+            if rsi > 80:
+                confidence -= 25
+                breakdown['adjustments'].append({'factor': 'RSI', 'value': f'{rsi:.1f}', 'impact': -25, 'reason': 'RSI极度超买'})
+                trigger_reasons.append(f"⚠️ RSI极度超买 {rsi:.1f}")
+            elif rsi > 70:
+                confidence -= 15
+                breakdown['adjustments'].append({'factor': 'RSI', 'value': f'{rsi:.1f}', 'impact': -15, 'reason': 'RSI超买'})
+                trigger_reasons.append(f"⚠️ RSI超买 {rsi:.1f}")
+            elif rsi < 60:
+                confidence += 10
+                breakdown['adjustments'].append({'factor': 'RSI', 'value': f'{rsi:.1f}', 'impact': +10, 'reason': 'RSI健康'})
+                trigger_reasons.append(f"✅ RSI健康 {rsi:.1f}")
+        
+        # 4. Recent Gain Check
+        gain_penalty, gain_warnings = get_gain_penalty(gain_10d, gain_20d)
+        if gain_penalty > 0:
+            confidence -= gain_penalty
+            breakdown['adjustments'].append({'factor': '近期涨幅', 'value': f'10d:{gain_10d:+.1f}%', 'impact': -gain_penalty, 'reason': '涨幅过快'})
+            trigger_reasons.extend(gain_warnings)
+        
+        # 5. Historical Position Check
+        if historical_pos:
+            hist_penalty, hist_warnings = get_historical_penalty(historical_pos['distance_from_high'])
+            if hist_penalty != 0:
+                confidence -= hist_penalty
+                breakdown['adjustments'].append({'factor': '历史位置', 'value': f"{historical_pos['distance_from_high']:+.1f}%", 'impact': -hist_penalty, 'reason': '距年度高点'})
+                trigger_reasons.extend(hist_warnings)
+        
+        # 6. Volume Divergence
+        if volume_div == 'BEARISH_DIV':
+            confidence -= 15
+            breakdown['adjustments'].append({'factor': '成交量背离', 'value': '顶背离', 'impact': -15, 'reason': '价涨量缩'})
+            trigger_reasons.append("⚠️ 顶背离：价涨量缩")
+        
+        # 7. Trend Confirmation
+        if regime.regime_type == 'trending':
+            confidence += 15
+            breakdown['adjustments'].append({'factor': '市场趋势', 'value': 'trending', 'impact': +15, 'reason': '趋势市场'})
+            trigger_reasons.append("✅ 趋势市场")
+        
+        # 8. Volume Confirmation
+        if regime.volume_ratio and regime.volume_ratio > 1.2:
+            confidence += 10
+            breakdown['adjustments'].append({'factor': '成交量确认', 'value': f'{regime.volume_ratio:.1f}x', 'impact': +10, 'reason': '成交量放大'})
+            trigger_reasons.append(f"✅ 成交量 {regime.volume_ratio:.1f}x")
+        
+        # 9. MACD Confirmation
+        if indicator.macd and indicator.signal_line:
+            if float(indicator.macd) > float(indicator.signal_line):
+                confidence += 10
+                breakdown['adjustments'].append({'factor': 'MACD', 'value': '金叉', 'impact': +10, 'reason': 'MACD金叉'})
+                trigger_reasons.append("✅ MACD金叉")
+        
+        # Adjust signal type based on final confidence
+        confidence = max(0, min(100, confidence))
+        breakdown['final_score'] = confidence
+        
+        if confidence < 30:
+            signal_type = 'hold'  # Too risky, don't chase
+            trigger_reasons.insert(0, "❌ 追高风险过大")
+            breakdown['decision'] = '置信度 < 30%，改为 HOLD'
+        elif confidence < 50:
+            trigger_reasons.insert(0, "⚠️ 谨慎小仓")
+            breakdown['decision'] = '置信度 < 50%，小仓试探'
+        else:
+            breakdown['decision'] = '置信度充足，可以买入'
+        
+        # Stop loss at EMA Low
+        stop_loss = Decimal(str(ema_low))
+        risk_pct = ((close_price - float(stop_loss)) / close_price) * 100
+        
+        return {
+            'signal_type': signal_type,
+            'strategy': 'trend_follow',
+            'confidence': confidence,
+            'entry_price': Decimal(str(close_price)),
+            'stop_loss': stop_loss,
+            'take_profit': None,
+            'risk_pct': round(risk_pct, 2),
+            'reward_pct': None,
+            'trigger_reason': ' | '.join(trigger_reasons),
+            'channel_position': channel_position,
+            'deviation': deviation,
+            'confidence_breakdown': breakdown,
+        }
+    
+    # ========================================
+    # SELL SIGNAL: Price below EMA Low
+    # ========================================
+    elif close_price < ema_low:
+        signal_type = 'sell'
+        trigger_reasons.append(f"跌破EMA Low ${ema_low:.2f}")
+        
+        # For sell signals, apply reverse logic
+        # Avoid panic selling at bottoms
+        if channel_position is not None and channel_position < 0:
+            # Price is below channel - might be oversold
+            confidence -= 20
+            trigger_reasons.append(f"⚠️ 超卖：通道位置 {channel_position:.0f}%")
+        
+        if rsi is not None and rsi < 30:
+            confidence -= 15
+            trigger_reasons.append(f"⚠️ RSI超卖 {rsi:.1f}")
+        elif rsi is not None and rsi < 40:
+            confidence -= 10
+        
+        # Downtrend confirmation
+        if regime.regime_type == 'trending' and regime.trend_direction == 'down':
+            confidence += 15
+            trigger_reasons.append("✅ 下跌趋势")
+        
+        # Volume confirmation
+        if regime.volume_ratio and regime.volume_ratio > 1.2:
+            confidence += 10
+            trigger_reasons.append(f"✅ 成交量 {regime.volume_ratio:.1f}x")
+        
+        # MACD confirmation
+        if indicator.macd and indicator.signal_line:
+            if float(indicator.macd) < float(indicator.signal_line):
+                confidence += 10
+                trigger_reasons.append("✅ MACD死叉")
+        
+        # Volume divergence
+        if volume_div == 'BULLISH_DIV':
+            confidence -= 15
+            trigger_reasons.append("⚠️ 底背离：不要杀跌")
+        
+        confidence = max(0, min(100, confidence))
+        
+        if confidence < 30:
+            signal_type = 'hold'
+            trigger_reasons.insert(0, "❌ 杀跌风险过大")
+        
+        # Stop loss at EMA High
+        stop_loss = Decimal(str(ema_high))
+        risk_pct = ((float(stop_loss) - close_price) / close_price) * 100
+        
+        return {
+            'signal_type': signal_type,
+            'strategy': 'trend_follow',
+            'confidence': confidence,
+            'entry_price': Decimal(str(close_price)),
+            'stop_loss': stop_loss,
+            'take_profit': None,
+            'risk_pct': round(risk_pct, 2),
+            'reward_pct': None,
+            'trigger_reason': ' | '.join(trigger_reasons),
+            'channel_position': channel_position,
+            'deviation': deviation,
+        }
+    
+    return None
+
+def generate_mean_reversion_signal(symbol, interval, latest_price, indicator, regime, historical_data):
+    """
+    Strategy 2: Mean Reversion (for ranging markets) with Multi-Dimensional Analysis
+    - Buy: Price near EMA Low in ranging market
+    - Sell: Price near EMA High in ranging market
+    """
+    ema_high = float(indicator.ema_high_33) if indicator.ema_high_33 else None
+    ema_low = float(indicator.ema_low_33) if indicator.ema_low_33 else None
+    
+    if not ema_high or not ema_low:
+        return None
+    
+    close_price = float(latest_price)
+    channel_mid = (ema_high + ema_low) / 2
+    channel_width = ema_high - ema_low
+    rsi = float(indicator.rsi) if indicator.rsi else None
+    
+    # Only generate signals in ranging markets
+    if regime.regime_type != 'ranging':
+        return None
+    
+    # Multi-dimensional analysis
+    channel_position = calculate_channel_position(close_price, ema_low, ema_high)
+    
+    confidence = 45  # Base confidence (lower than trend following)
+    trigger_reasons = []
+    
+    # Calculate distance from channel boundaries
+    distance_to_low = abs(close_price - ema_low)
+    distance_to_high = abs(close_price - ema_high)
+    
+    # Buy signal: Price near EMA Low (within 10% of channel width)
+    if distance_to_low < (channel_width * 0.1):
+        signal_type = 'buy'
+        trigger_reasons.append(f"震荡市 - 接近EMA Low ${ema_low:.2f}")
+        
+        # Channel position bonus (lower = better for buy)
+        if channel_position is not None and channel_position < 30:
+            confidence += 15
+            trigger_reasons.append(f"✅ 通道底部 {channel_position:.0f}%")
+        
+        # Check RSI oversold
+        if rsi and rsi < 35:
+            confidence += 20
+            trigger_reasons.append(f"✅ RSI超卖 {rsi:.1f}")
+        elif rsi and rsi < 45:
+            confidence += 10
+        
+        # Target is channel mid or high
+        take_profit = Decimal(str(channel_mid))
+        stop_loss = Decimal(str(ema_low * 0.98))  # 2% below EMA Low
+        
+        risk_pct = ((close_price - float(stop_loss)) / close_price) * 100
+        reward_pct = ((float(take_profit) - close_price) / close_price) * 100
+        
+        return {
+            'signal_type': signal_type,
+            'strategy': 'mean_reversion',
+            'confidence': min(max(confidence, 0), 100),
+            'entry_price': Decimal(str(close_price)),
+            'stop_loss': stop_loss,
+            'take_profit': take_profit,
+            'risk_pct': round(risk_pct, 2),
+            'reward_pct': round(reward_pct, 2),
+            'trigger_reason': ' | '.join(trigger_reasons),
+            'channel_position': channel_position,
+        }
+    
+    # Sell signal: Price near EMA High
+    elif distance_to_high < (channel_width * 0.1):
+        signal_type = 'sell'
+        trigger_reasons.append(f"震荡市 - 接近EMA High ${ema_high:.2f}")
+        
+        # Channel position check (higher = better for sell)
+        if channel_position is not None and channel_position > 70:
+            confidence += 15
+            trigger_reasons.append(f"✅ 通道顶部 {channel_position:.0f}%")
+        
+        # Check RSI overbought
+        if rsi and rsi > 65:
+            confidence += 20
+            trigger_reasons.append(f"✅ RSI超买 {rsi:.1f}")
+        elif rsi and rsi > 55:
+            confidence += 10
+        
+        take_profit = Decimal(str(channel_mid))
+        stop_loss = Decimal(str(ema_high * 1.02))  # 2% above EMA High
+        
+        risk_pct = ((float(stop_loss) - close_price) / close_price) * 100
+        reward_pct = ((close_price - float(take_profit)) / close_price) * 100
+        
+        return {
+            'signal_type': signal_type,
+            'strategy': 'mean_reversion',
+            'confidence': min(max(confidence, 0), 100),
+            'entry_price': Decimal(str(close_price)),
+            'stop_loss': stop_loss,
+            'take_profit': take_profit,
+            'risk_pct': round(risk_pct, 2),
+            'reward_pct': round(reward_pct, 2),
+            'trigger_reason': ' | '.join(trigger_reasons),
+            'channel_position': channel_position,
+        }
+    
+    return None
+
+
+def evaluate_signal(symbol, interval, ctx):
+    """
+    Evaluate the trading signal of a symbol/interval from the data cached in ctx (nothing is saved)
+
+    Returns: (new TradingSignal, previous active TradingSignal closed by it or None),
+             or None when there is not enough data
+    """
+    interval_name = get_interval_name(interval)
+    print(f"📡 Generating signal for {symbol} @ {interval_name}...")
+    
+    # Get historical data (last 400 periods for analysis, oldest first)
+    ohlc_df = ctx.get_ohlc(symbol, interval, limit=SIGNAL_LOOKBACK)
+    
+    if ohlc_df.empty:
+        print(f"  ❌ No OHLC data found")
+        return None
+    
+    # Get latest price
+    latest_ohlc = ohlc_df.iloc[-1]
+    
+    if len(ohlc_df) < 30:
+        print(f"  ❌ Insufficient historical data ({len(ohlc_df)} periods)")
+        return None
+    
+    # Price-based metrics of every bar (oldest first), the strategies use the latest one
+    historical_data = scoring.score_history(
+        ohlc_df['close'].to_numpy(dtype=float), ohlc_df['volume'].to_numpy(dtype=float)
+    )
+    
+    # Get latest indicator
+    latest_indicator = ctx.get_latest_indicator(symbol, interval)
+    
+    if not latest_indicator:
+        print(f"  ❌ No indicator data found")
+        return None
+    
+    # Get latest market regime (detected earlier in this run, or prefetched from the database)
+    latest_regime = ctx.regimes.get((symbol, interval))
+    
+    if not latest_regime:
+        print(f"  ❌ No market regime data found")
+        return None
+    
+    # Generate signal based on market regime
+    signal_data = None
+    
+    if latest_regime.regime_type == 'trending':
+        # Use trend following strategy with multi-dimensional analysis
+        signal_data = generate_trend_following_signal(
+            symbol, interval, latest_ohlc.close, latest_indicator, latest_regime, historical_data
+        )
+    else:
+        # Use mean reversion strategy
+        signal_data = generate_mean_reversion_signal(
+            symbol, interval, latest_ohlc.close, latest_indicator, latest_regime, historical_data
+        )
+    
+    # If no signal generated, create a "hold" signal
+    if not signal_data:
+        print(f"  ⏸️  HOLD - No clear signal")
+        
+        # Create basic confidence breakdown for HOLD signal
+        confidence_breakdown = {
+            'base_score': 0,
+            'adjustments': {
+                '市场状态': f"{latest_regime.regime_type} - 无明确方向",
+            },
+            'final_score': 0,
+            'metrics': {
+                'RSI': f"{float(latest_indicator.rsi):.1f}" if latest_indicator.rsi else '--',
+                'MACD': f"{float(latest_indicator.macd):.4f}" if latest_indicator.macd else '--',
+                '市场类型': latest_regime.regime_type,
+                'ADX': f"{float(latest_regime.adx):.1f}" if latest_regime.adx else '--',
+            }
+        }
+        
+        signal_data = {
+            'signal_type': 'hold',
+            'strategy': 'none',
+            'confidence': 0,
+            'entry_price': Decimal(str(latest_ohlc.close)),
+            'stop_loss': None,
+            'take_profit': None,
+            'risk_pct': None,
+            'reward_pct': None,
+            'trigger_reason': f"Price in channel ({latest_regime.regime_type} market)",
+            'confidence_breakdown': confidence_breakdown,
+        }
+    else:
+        emoji = "✅" if signal_data['signal_type'] == 'buy' else "🔴" if signal_data['signal_type'] == 'sell' else "⏸️"
+        print(f"  {emoji} {signal_data['signal_type'].upper()} - Confidence: {signal_data['confidence']}%")
+        print(f"     Strategy: {signal_data['strategy']}")
+        print(f"     Entry: ${signal_data['entry_price']}")
+        if signal_data['stop_loss']:
+            print(f"     Stop Loss: ${signal_data['stop_loss']} (-{signal_data['risk_pct']}%)")
+        # Print trigger reasons for detailed analysis
+        if signal_data.get('trigger_reason'):
+            reasons = signal_data['trigger_reason'].split(' | ')
+            if len(reasons) > 2:  # Only print if there are multiple reasons
+                print(f"     Reasons:")
+                for reason in reasons[:5]:  # Show first 5 reasons
+                    print(f"       • {reason}")
+    
+    # Save signal to database
+    timestamp = latest_ohlc.date.to_pydatetime()
+    unix_timestamp = int(pd.to_datetime(timestamp).timestamp())
+    unix_dt = datetime.fromtimestamp(unix_timestamp, tz=timezone.utc)
+    
+    # Check if there's already an active signal for this symbol/interval
+    existing_signal = ctx.active_signals.get((symbol, interval))
+    closed_signal = None
+    
+    # If signal changed, close the old one
+    if existing_signal and existing_signal.signal_type != signal_data['signal_type']:
+        existing_signal.status = 'closed'
+        existing_signal.exit_price = Decimal(str(latest_ohlc.close))
+        existing_signal.exit_timestamp = timestamp
+        # Calculate P&L
+        if existing_signal.signal_type == 'buy':
+            pnl = ((float(latest_ohlc.close) - float(existing_signal.entry_price)) / float(existing_signal.entry_price)) * 100
+        else:
+            pnl = ((float(existing_signal.entry_price) - float(latest_ohlc.close)) / float(existing_signal.entry_price)) * 100
+        existing_signal.pnl_pct = round(pnl, 2)
+        closed_signal = existing_signal
+        print(f"  📊 Closing previous signal: {existing_signal.signal_type.upper()} (P&L: {existing_signal.pnl_pct:+.2f}%)")
+    
+    # Always create new signal (for both BUY/SELL/HOLD)
+    # This ensures HOLD signals are visible in the UI
+    signal = TradingSignal(
+        symbol=symbol,
+        unix=unix_dt,
+        timestamp=timestamp,
+        interval=interval,
+        signal_type=signal_data['signal_type'],
+        strategy=signal_data['strategy'],
+        market_regime=latest_regime.regime_type,
+        confidence=signal_data['confidence'],
+        entry_price=signal_data['entry_price'],
+        stop_loss=signal_data['stop_loss'],
+        take_profit=signal_data['take_profit'],
+        risk_pct=signal_data['risk_pct'],
+        reward_pct=signal_data['reward_pct'],
+        trigger_reason=signal_data['trigger_reason'],
+        rsi_value=round(float(latest_indicator.rsi), 2) if latest_indicator.rsi else None,
+        macd_value=latest_indicator.macd,
+        volume_ratio=latest_regime.volume_ratio,
+        confidence_breakdown=signal_data.get('confidence_breakdown'),
+        status='active'
+    )
+    return signal, closed_signal
+
+def save_signals(evaluated, ctx=None):
+    """
+    Write evaluated signals in one transaction: closures with one bulk_update,
+    new signals with one bulk_create
+    """
+    closed = [closed_signal for _, closed_signal in evaluated if closed_signal]
+    signals = [signal for signal, _ in evaluated]
+
+    with transaction.atomic():
+        if closed:
+            TradingSignal.objects.bulk_update(closed, ['status', 'exit_price', 'exit_timestamp', 'pnl_pct'])
+        TradingSignal.objects.bulk_create(signals)
+        refresh_latest_state('signal', {(signal.symbol, signal.interval) for signal in closed + signals})
+
+    for signal in signals:
+        print(f"  💾 Saved new {signal.signal_type.upper()} signal for {signal.symbol} @ "
+              f"{get_interval_name(signal.interval)} (ID: {signal.id})")
+        if ctx is not None:
+            ctx.active_signals[(signal.symbol, signal.interval)] = signal
+    if closed:
+        print(f"  📊 Closed {len(closed)} previous signals")
+
+def prefetch_signal_inputs(ctx):
+    """Load OHLC, latest indicators, regimes and active signals of all pairs in a few queries"""
+    ctx.prefetch_ohlc(SIGNAL_LOOKBACK)
+    ctx.prefetch_latest_indicators()
+    ctx.prefetch_latest_regimes()
+    ctx.prefetch_active_signals()
+
+def generate_signal_for_symbol(symbol, interval=86400, ctx=None):
+    """
+    Generate trading signal for a specific symbol and interval
+    """
+    ctx = ctx or PipelineContext(pairs=[(symbol, interval)])
+    prefetch_signal_inputs(ctx)
+
+    evaluated = evaluate_signal(symbol, interval, ctx)
+    if evaluated:
+        save_signals([evaluated], ctx)
+
+def run(ctx):
+    """
+    Pipeline stage: trading signals for every (symbol, interval) in ctx
+
+    Batch mode - the inputs of all pairs are prefetched, every strategy is evaluated
+    in memory and all signals are written in one transaction.
+    """
+    success_count = 0
+    error_count = 0
+    evaluated = []
+
+    prefetch_signal_inputs(ctx)
+    
+    for interval in ctx.intervals:
+        print(f"\n📊 Processing {get_interval_name(interval)} timeframe...")
+        
+        for symbol, pair_interval in ctx.pairs:
+            if pair_interval != interval:
+                continue
+            try:
+                result = evaluate_signal(symbol, interval, ctx)
+                if result:
+                    evaluated.append(result)
+                success_count += 1
+            except Exception as e:
+                error_count += 1
+                print(f"  ❌ Error for {symbol} @ {get_interval_name(interval)}: {e}")
+                import traceback
+                traceback.print_exc()
+
+    if evaluated:
+        print(f"\n💾 Saving {len(evaluated)} signals...")
+        save_signals(evaluated, ctx)
+    
+    return {'success': success_count, 'failed': error_count}
+
+def main():
+    """Main function to generate trading signals for all symbols and intervals"""
+    print("📡 Trading Signal Generation")
+    print("="*50)
+    
+    ctx = PipelineContext(symbols=SYMBOLS, intervals=INTERVALS.values())
+    summary = run(ctx)
+    
+    print("\n" + "="*50)
+    print("📊 Summary:")
+    print(f"✅ Successful: {summary['success']}")
+    print(f"❌ Failed: {summary['failed']}")
+    
+    # Show active signals
+    print("\n📡 Active Trading Signals:")
+    active_signals = TradingSignal.objects.filter(status='active').order_by('-confidence')
+    
+    for signal in active_signals[:20]:  # Show top 20
+        emoji = "✅" if signal.signal_type == 'buy' else "🔴" if signal.signal_type == 'sell' else "⏸️"
+        print(f"  {emoji} {signal.symbol} @ {get_interval_name(signal.interval)}: {signal.signal_type.upper()} "
+              f"({signal.confidence}% confidence, {signal.strategy})")
+    
+    print(f"\n📈 Total active signals: {active_signals.count()}")
+    print("\n✅ Signal generation complete!")
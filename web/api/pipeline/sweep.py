@@ -0,0 +1,211 @@
+"""
+Parallel parameter sweep of the strategy thresholds
+
+The price-only arrays of every symbol (OHLC, indicators, scoring inputs - see
+backtest.prepare_bars) are computed once and copied into one shared memory block.
+Worker processes attach to it without copying and evaluate chunks of the parameter
+grid (strategy_signals + simulate_trades per symbol), so a sweep uses every core.
+The combinations are ranked and written to qt_strategy_sweep_result.
+"""
+import itertools
+import math
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+from django.db import connections
+
+from api.models import StrategySweepResult
+from .backtest import BAR_FIELDS, DEFAULT_PARAMS, DEFAULT_THRESHOLDS, prepare_backtest, simulate_trades, strategy_signals
+from .constants import interval_name as get_interval_name
+
+# Grid searched when none is given: 3^7 = 2187 combinations
+DEFAULT_GRID = {
+    'adx_trending': [20, 25, 30],
+    'adx_tiebreak': [20, 22, 25],
+    'channel_trending': [45, 55, 65],
+    'channel_ranging': [60, 70, 80],
+    'deviation_tiers': [(2, 4, 8), (3, 5, 10), (5, 10, 15)],
+    'gain_10d_tiers': [(5, 8, 15), (7, 10, 20), (10, 15, 30)],
+    'min_confidence': [0, 40, 60],
+}
+
+# Aggregated metrics a sweep can be ranked by (all: higher is better)
+RANK_METRICS = ['total_return_pct', 'hit_rate', 'max_drawdown_pct', 'avg_trade_pct', 'return_to_drawdown']
+
+# Per worker process: the attached shared memory block and the per-symbol views into it
+_worker = {}
+
+
+def check_parameters(names, label="sweep parameters"):
+    """Raise ValueError for names that are neither strategy thresholds nor trading parameters"""
+    unknown = set(names) - set(DEFAULT_THRESHOLDS) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown {label}: {', '.join(sorted(unknown))}")
+
+
+def expand_grid(grid):
+    """{name: [values]} -> list of {name: value} combinations"""
+    check_parameters(grid)
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+def _views(buffer, layout, total):
+    """{symbol: {field: array}} views into the (field x bar) block"""
+    block = np.ndarray((len(BAR_FIELDS), total), dtype=np.float64, buffer=buffer)
+    return {
+        symbol: {field: block[i, offset:offset + length] for i, field in enumerate(BAR_FIELDS)}
+        for symbol, offset, length in layout
+    }
+
+def share_bars(prepared):
+    """
+    Copy the prepared symbols into one shared memory block
+
+    Returns: (SharedMemory, layout [(symbol, offset, length)], total bars) - the caller
+             closes and unlinks the block
+    """
+    layout = []
+    offset = 0
+    for symbol, bars in prepared.items():
+        length = len(bars['close'])
+        layout.append((symbol, offset, length))
+        offset += length
+
+    block = shared_memory.SharedMemory(create=True, size=max(len(BAR_FIELDS) * offset * 8, 1))
+    views = _views(block.buf, layout, offset)
+    for symbol, bars in prepared.items():
+        for field in BAR_FIELDS:
+            views[symbol][field][:] = bars[field]
+    return block, layout, offset
+
+def _init_worker(name, layout, total):
+    block = shared_memory.SharedMemory(name=name)
+    _worker['block'] = block
+    _worker['bars'] = _views(block.buf, layout, total)
+
+def _aggregate(symbol_stats, rank_by):
+    """Mean over the symbols (worst drawdown), plus the ranking score"""
+    stats = list(symbol_stats.values())
+
+    def mean(name):
+        values = [s[name] for s in stats if s[name] is not None]
+        return float(np.mean(values)) if values else None
+
+    aggregated = {
+        'trades': sum(s['trades'] for s in stats),
+        'hit_rate': mean('hit_rate'),
+        'total_return_pct': mean('total_return_pct'),
+        'max_drawdown_pct': min(s['max_drawdown_pct'] for s in stats),
+        'avg_trade_pct': mean('avg_trade_pct'),
+    }
+    if rank_by == 'return_to_drawdown':
+        drawdown = abs(aggregated['max_drawdown_pct'])
+        aggregated['score'] = aggregated['total_return_pct'] / drawdown if drawdown else None
+    else:
+        aggregated['score'] = aggregated[rank_by]
+    return aggregated
+
+def evaluate_combinations(combinations, rank_by, bars=None):
+    """
+    Backtest every combination over all symbols (in a worker: the shared bars)
+    Returns: list of (combination, aggregated stats, per-symbol stats)
+    """
+    bars = bars if bars is not None else _worker['bars']
+    results = []
+    for combination in combinations:
+        thresholds = {name: value for name, value in combination.items() if name in DEFAULT_THRESHOLDS}
+        params = {**DEFAULT_PARAMS, **{name: value for name, value in combination.items() if name in DEFAULT_PARAMS}}
+
+        symbol_stats = {
+            symbol: simulate_trades(symbol_bars, strategy_signals(symbol_bars, thresholds), **params)['stats']
+            for symbol, symbol_bars in bars.items()
+        }
+        results.append((combination, _aggregate(symbol_stats, rank_by), symbol_stats))
+    return results
+
+def run_sweep(symbols, interval, grid=None, since=None, until=None, base_params=None,
+              rank_by='total_return_pct', workers=None, save=True):
+    """
+    Grid search of strategy thresholds / trading parameters over the OHLC history
+
+    Args:
+        grid: {parameter: [values]} (default DEFAULT_GRID); parameters are keys of
+              backtest.DEFAULT_THRESHOLDS or DEFAULT_PARAMS
+        base_params: fixed values for the parameters that are not swept
+        rank_by: one of RANK_METRICS
+        workers: worker processes (default: all cores)
+        save: write the ranked results to StrategySweepResult
+
+    Returns: (sweep_id, ranked list of (combination, aggregated stats, per-symbol stats))
+    """
+    if rank_by not in RANK_METRICS:
+        raise ValueError(f"rank_by must be one of {', '.join(RANK_METRICS)}")
+    check_parameters(base_params or {}, "fixed parameters")
+    combinations = [{**(base_params or {}), **combination} for combination in expand_grid(grid or DEFAULT_GRID)]
+    workers = workers or os.cpu_count() or 1
+    sweep_id = str(uuid.uuid4())
+
+    print(f"🔬 Parameter sweep {sweep_id[:8]}: {len(combinations):,} combinations @ "
+          f"{get_interval_name(interval)}, {workers} workers")
+
+    started = time.perf_counter()
+    prepared = prepare_backtest(symbols, interval, since=since, until=until)
+    if not prepared:
+        raise ValueError("No OHLC data for the requested symbols")
+    print(f"  📊 Prepared {len(prepared)} symbols ({sum(len(b['close']) for b in prepared.values()):,} bars) "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    results = []
+    block, layout, total = share_bars(prepared)
+    del prepared
+    try:
+        # Forked workers must not share the parent's database connections
+        connections.close_all()
+        chunk_size = max(1, math.ceil(len(combinations) / (workers * 8)))
+        chunks = [combinations[i:i + chunk_size] for i in range(0, len(combinations), chunk_size)]
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'),
+                                 initializer=_init_worker, initargs=(block.name, layout, total)) as executor:
+            futures = [executor.submit(evaluate_combinations, chunk, rank_by) for chunk in chunks]
+            for done, future in enumerate(as_completed(futures), 1):
+                results.extend(future.result())
+                if done % max(1, len(chunks) // 10) == 0 or done == len(chunks):
+                    print(f"  ⏱️  {len(results):,}/{len(combinations):,} combinations "
+                          f"({time.perf_counter() - started:.1f}s)")
+    finally:
+        block.close()
+        block.unlink()
+
+    # Best first; combinations without a score last
+    results.sort(key=lambda result: (result[1]['score'] is None, -(result[1]['score'] or 0)))
+    elapsed = time.perf_counter() - started
+    print(f"  ✅ {len(results):,} combinations in {elapsed:.1f}s ({len(results) / elapsed:.1f}/s)")
+
+    if save:
+        StrategySweepResult.objects.bulk_create([
+            StrategySweepResult(
+                sweep_id=sweep_id,
+                interval=interval,
+                symbols=[symbol for symbol, _, _ in layout],
+                rank=rank,
+                rank_by=rank_by,
+                score=stats['score'],
+                params=combination,
+                trades=stats['trades'],
+                hit_rate=stats['hit_rate'],
+                total_return_pct=stats['total_return_pct'],
+                max_drawdown_pct=stats['max_drawdown_pct'],
+                avg_trade_pct=stats['avg_trade_pct'],
+                symbol_stats=symbol_stats,
+            )
+            for rank, (combination, stats, symbol_stats) in enumerate(results, 1)
+        ], batch_size=1000)
+        print(f"  💾 Saved {len(results):,} results (sweep_id={sweep_id})")
+
+    return sweep_id, results
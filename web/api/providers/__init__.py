@@ -8,6 +8,7 @@ __author__ = "Seraphina"
 
 # Import all providers for easy access
 from .kraken_provider import KrakenDataProvider, get_kraken_provider
+from .kraken_async import AsyncKrakenProvider, get_async_kraken_provider
 # Temporarily disable IBKR import to avoid uvloop conflicts during Django startup
 # from .ibkr_socket_provider import IBKRSocketProvider, get_ibkr_socket_provider
 from .ibkr_simple_provider import IBKRSimpleProvider, get_ibkr_simple_provider
@@ -15,6 +16,8 @@ from .ibkr_simple_provider import IBKRSimpleProvider, get_ibkr_simple_provider
 __all__ = [
     'KrakenDataProvider', 
     'get_kraken_provider',
+    'AsyncKrakenProvider',
+    'get_async_kraken_provider',
     'IBKRSimpleProvider',
     'get_ibkr_simple_provider',
     # Temporarily disabled - IBKR Socket providers commented out
@@ -4,6 +4,7 @@ Simple IBKR provider that avoids uvloop conflicts
 import asyncio
 import logging
 import threading
+import time
 from typing import Dict, Optional
 
 logger = logging.getLogger(__name__)
@@ -37,6 +38,15 @@ class IBKRSimpleProvider:
         
         return result
     
+    def refresh(self, symbols: list):
+        """
+        Synchronous connection check / data fetch - for the ticker service,
+        which already runs outside the request path
+        """
+        self._fetch_real_data(symbols)
+        self.last_update = time.time()
+        return self.data_cache
+
     def _try_fetch_data_background(self, symbols: list):
         """Attempt to fetch data in background thread to avoid uvloop conflicts"""
         def fetch_thread():
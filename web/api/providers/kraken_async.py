@@ -0,0 +1,262 @@
+"""
+Async Kraken Data Provider
+aiohttp client with keep-alive connection pooling and token-bucket rate limiting
+
+One provider (one session, one set of buckets) is meant to be shared by all concurrent
+requests of a process, e.g. a backfill fanning out over all pairs and intervals:
+
+    async with AsyncKrakenProvider() as kraken:
+        results = await asyncio.gather(*(kraken.get_ohlc_data(pair, 60) for pair in pairs))
+
+Rate limits (https://docs.kraken.com/api/docs/guides/spot-rest-ratelimits):
+- public endpoints: about one call per second per IP, with a small burst
+- private endpoints: a call counter per API key that each call raises by its cost
+  (ledger / trade history queries cost 2, the others 1) and that decays at a rate
+  depending on the verification tier; orders are limited per pair by the trading
+  engine instead and do not count
+Both are modelled as token buckets (capacity = max counter, refill = decay rate).
+"""
+
+import asyncio
+import logging
+import time
+import urllib.parse
+from typing import Dict, List
+
+import aiohttp
+from django.conf import settings
+
+from .kraken_provider import KRAKEN_API_URL, KRAKEN_USER_AGENT, kraken_signature
+
+logger = logging.getLogger(__name__)
+
+# Public endpoints: burst, calls per second
+KRAKEN_PUBLIC_LIMIT = (5, 1.0)
+
+# Private endpoints by verification tier: max counter, decay per second
+KRAKEN_PRIVATE_TIERS = {
+    'starter': (15, 0.33),
+    'intermediate': (20, 0.5),
+    'pro': (20, 1.0),
+}
+
+# Counter cost of private endpoints (default 1)
+KRAKEN_PRIVATE_COSTS = {
+    'Ledgers': 2,
+    'QueryLedgers': 2,
+    'TradesHistory': 2,
+    'QueryTrades': 2,
+    'AddOrder': 0,      # trading engine limit per pair
+    'CancelOrder': 0,
+}
+
+# Errors after which the request is retried once the bucket allows it again
+RATE_LIMIT_ERRORS = ('EAPI:Rate limit exceeded', 'EGeneral:Too many requests')
+
+
+class TokenBucket:
+    """
+    Token bucket for asyncio callers
+
+    Holds up to `capacity` tokens and refills `rate` tokens per second; a call of cost n
+    waits until n tokens are available. Waiters are served in arrival order.
+    """
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, cost: float = 1):
+        if cost <= 0:
+            return
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= cost:
+                    self.tokens -= cost
+                    return
+                await asyncio.sleep((cost - self.tokens) / self.rate)
+
+    def drain(self):
+        """Empty the bucket (the server reported a rate limit error)"""
+        self.tokens = 0
+        self.updated = time.monotonic()
+
+
+class AsyncKrakenProvider:
+    """
+    Async Kraken REST client
+
+    Same endpoints and result format as KrakenDataProvider (the `result` member of the
+    response), without the blocking sleeps.
+    """
+
+    def __init__(self, api_key: str = None, api_secret: str = None, tier: str = 'starter',
+                 max_connections: int = 10, max_retries: int = 3):
+        """
+        Args:
+            api_key: Kraken API Key (optional for public data only)
+            api_secret: Kraken Private Key (optional for public data only)
+            tier: account verification tier of the key - sets the private call counter
+            max_connections: size of the keep-alive connection pool
+            max_retries: retries after rate limit errors and connection failures
+        """
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+
+        self.public_bucket = TokenBucket(*KRAKEN_PUBLIC_LIMIT)
+        self.private_bucket = TokenBucket(*KRAKEN_PRIVATE_TIERS[tier])
+
+        self._session = None
+        self._last_nonce = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=30),
+                timeout=aiohttp.ClientTimeout(total=30),
+                headers={'User-Agent': KRAKEN_USER_AGENT},
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _nonce(self) -> str:
+        # Strictly increasing, also for private calls started in the same millisecond
+        self._last_nonce = max(self._last_nonce + 1, int(time.time() * 1000))
+        return str(self._last_nonce)
+
+    async def _make_request(self, uri_path: str, data: Dict = None, is_private: bool = False) -> Dict:
+        """
+        Make HTTP request to Kraken API, waiting for the rate limit bucket of the endpoint
+        """
+        if is_private and (not self.api_key or not self.api_secret):
+            raise ValueError("API credentials required for private endpoints")
+
+        method = uri_path.rsplit('/', 1)[-1]
+        bucket = self.private_bucket if is_private else self.public_bucket
+        cost = KRAKEN_PRIVATE_COSTS.get(method, 1) if is_private else 1
+        url = KRAKEN_API_URL + uri_path
+
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire(cost)
+            try:
+                if is_private:
+                    payload = dict(data or {}, nonce=self._nonce())
+                    headers = {
+                        'API-Key': self.api_key,
+                        'API-Sign': kraken_signature(uri_path, payload, self.api_secret),
+                        'Content-Type': 'application/x-www-form-urlencoded',
+                    }
+                    response = await self.session.post(url, data=urllib.parse.urlencode(payload), headers=headers)
+                else:
+                    response = await self.session.get(url, params=data)
+                async with response:
+                    result = await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    logger.error(f"Request error: {e}")
+                    raise Exception(f"Request failed: {e}")
+                logger.warning(f"Kraken request {method} failed ({e}), retrying")
+                await asyncio.sleep(2 ** attempt)
+                continue
+
+            errors = result.get('error')
+            if errors and any(error in RATE_LIMIT_ERRORS for error in errors) and attempt < self.max_retries:
+                logger.warning(f"Kraken rate limit hit on {method}, backing off")
+                bucket.drain()
+                continue
+            if errors:
+                logger.error(f"Kraken API error: {errors}")
+                raise Exception(f"Kraken API error: {errors}")
+            return result['result']
+
+    # Public API Methods
+
+    async def get_server_time(self) -> Dict:
+        """Get Kraken server time"""
+        return await self._make_request('/0/public/Time')
+
+    async def get_trading_pairs(self, pairs: List[str] = None) -> Dict:
+        """Get trading pair information"""
+        params = {'pair': ','.join(pairs)} if pairs else None
+        return await self._make_request('/0/public/AssetPairs', params)
+
+    async def get_ticker(self, pairs: List[str]) -> Dict:
+        """Get ticker information for trading pairs"""
+        return await self._make_request('/0/public/Ticker', {'pair': ','.join(pairs)})
+
+    async def get_ohlc_data(self, pair: str, interval: int = 1440, since: int = None) -> Dict:
+        """
+        Get OHLC data for a trading pair
+
+        Args:
+            pair: Trading pair symbol
+            interval: Time frame in minutes (1, 5, 15, 30, 60, 240, 1440, 10080, 21600)
+            since: Return data since this timestamp
+        """
+        params = {'pair': pair, 'interval': interval}
+        if since:
+            params['since'] = since
+        return await self._make_request('/0/public/OHLC', params)
+
+    async def get_order_book(self, pair: str, count: int = 100) -> Dict:
+        """Get order book for a trading pair"""
+        return await self._make_request('/0/public/Depth', {'pair': pair, 'count': count})
+
+    async def get_recent_trades(self, pair: str, since: int = None) -> Dict:
+        """Get recent trades for a trading pair"""
+        params = {'pair': pair}
+        if since:
+            params['since'] = since
+        return await self._make_request('/0/public/Trades', params)
+
+    # Private API Methods (require authentication)
+
+    async def get_account_balance(self) -> Dict:
+        """Get account balance"""
+        return await self._make_request('/0/private/Balance', is_private=True)
+
+    async def get_open_orders(self) -> Dict:
+        """Get open orders"""
+        return await self._make_request('/0/private/OpenOrders', is_private=True)
+
+    async def get_trades_history(self, start: int = None, end: int = None) -> Dict:
+        """Get trades history"""
+        params = {key: value for key, value in (('start', start), ('end', end)) if value}
+        return await self._make_request('/0/private/TradesHistory', params, is_private=True)
+
+    async def get_ledgers(self, asset: str = None, type: str = None) -> Dict:
+        """Get ledger entries"""
+        params = {key: value for key, value in (('asset', asset), ('type', type)) if value}
+        return await self._make_request('/0/private/Ledgers', params, is_private=True)
+
+
+def get_async_kraken_provider(**kwargs) -> AsyncKrakenProvider:
+    """Get configured async Kraken provider instance (use it as `async with`)"""
+    return AsyncKrakenProvider(
+        api_key=getattr(settings, 'KRAKEN_API_KEY', None),
+        api_secret=getattr(settings, 'KRAKEN_API_SECRET', None),
+        tier=getattr(settings, 'KRAKEN_API_TIER', 'starter'),
+        **kwargs,
+    )
@@ -17,10 +17,24 @@ from typing import Dict, List, Optional, Any, Callable
 from decimal import Decimal
 from datetime import datetime, timezone
 from django.conf import settings
-import redis
+from api.redis_client import get_redis
 
 logger = logging.getLogger(__name__)
 
+KRAKEN_API_URL = "https://api.kraken.com"
+KRAKEN_USER_AGENT = 'Seraphim Trading System 1.0'
+
+
+def kraken_signature(urlpath: str, data: Dict, api_secret: str) -> str:
+    """Kraken API signature of a private request (data includes the nonce)"""
+    postdata = urllib.parse.urlencode(data)
+    encoded = (str(data['nonce']) + postdata).encode()
+    message = urlpath.encode() + hashlib.sha256(encoded).digest()
+
+    mac = hmac.new(base64.b64decode(api_secret), message, hashlib.sha512)
+    sigdigest = base64.b64encode(mac.digest())
+    return sigdigest.decode()
+
 
 class KrakenDataProvider:
     """
@@ -42,12 +56,12 @@ class KrakenDataProvider:
         self.api_secret = api_secret
         
         # API Endpoints
-        self.api_url = "https://api.kraken.com"
+        self.api_url = KRAKEN_API_URL
         self.websocket_url = "wss://ws.kraken.com"
         
         # Redis connection for caching
         try:
-            self.redis_client = redis.Redis(host='redis', port=6379, db=0, decode_responses=True)
+            self.redis_client = get_redis(decode_responses=True)
             self.redis_client.ping()
         except Exception as e:
             logger.warning(f"Redis connection failed: {e}")
@@ -57,7 +71,11 @@ class KrakenDataProvider:
         self.ws_client = None
         self.ws_callbacks = {}
         
-        # Rate limiting
+        # HTTP session - keeps the connection to the API alive between requests
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = KRAKEN_USER_AGENT
+        
+        # Rate limiting (api.providers.kraken_async has a non-blocking provider for fan-out)
         self.last_request_time = 0
         self.min_request_interval = 1.0  # 1 second between requests
         
@@ -65,14 +83,7 @@ class KrakenDataProvider:
         """Generate Kraken API signature"""
         if not self.api_secret:
             raise ValueError("API Secret required for private endpoints")
-            
-        postdata = urllib.parse.urlencode(data)
-        encoded = (str(data['nonce']) + postdata).encode()
-        message = urlpath.encode() + hashlib.sha256(encoded).digest()
-        
-        mac = hmac.new(base64.b64decode(self.api_secret), message, hashlib.sha512)
-        sigdigest = base64.b64encode(mac.digest())
-        return sigdigest.decode()
+        return kraken_signature(urlpath, data, self.api_secret)
     
     def _make_request(self, uri_path: str, data: Dict = None, is_private: bool = False) -> Dict:
         """
@@ -83,7 +94,7 @@ class KrakenDataProvider:
         if elapsed < self.min_request_interval:
             time.sleep(self.min_request_interval - elapsed)
         
-        headers = {'User-Agent': 'Seraphim Trading System 1.0'}
+        headers = {}
         url = self.api_url + uri_path
         
         try:
@@ -100,9 +111,9 @@ class KrakenDataProvider:
                     'API-Sign': self._get_kraken_signature(uri_path, data)
                 })
                 
-                response = requests.post(url, headers=headers, data=data, timeout=30)
+                response = self.session.post(url, headers=headers, data=data, timeout=30)
             else:
-                response = requests.get(url, params=data, headers=headers, timeout=30)
+                response = self.session.get(url, params=data, headers=headers, timeout=30)
             
             self.last_request_time = time.time()
             result = response.json()
@@ -9,6 +9,10 @@ import redis
 import channels.layers
 
 from .utils import send_command_to_go, send_command_to_bot
+from .models import OhlcPrice, OhlcPriceMinute
+from .ohlc_resampler import resample_ohlc
+from .ohlc_writer import bitstamp_ohlc_rows, upsert_ohlc
+from .redis_client import get_redis
 
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -19,8 +23,6 @@ logging.basicConfig(
 # cron_logger = logging.getLogger('my_cron_job')
 min_logger = logging.getLogger('min_cron_job')
 
-REDIS_HOST = "redis"  # Use your Redis host
-REDIS_PORT = 6379  # Use your Redis port
 
 def get_starting_unix():
     now = datetime.datetime.now()
@@ -41,131 +43,32 @@ def get_starting_unix():
     
     return unixtimestamps
 
+def _ohlc_model(tablename):
+    return OhlcPriceMinute if tablename == OhlcPriceMinute._meta.db_table else OhlcPrice
+
 def initial_calc_ohlc(mydb, tablename, pair, interval, interval_base):
-    timezone = pytz.timezone("UTC")
+    """(Re)build all interval bars of a pair from its interval_base bars - one statement"""
     cursor = mydb.cursor()
-
-    cursor.execute("SELECT * from " + tablename + " \
-        where unix = (Select min(unix) from " + tablename + " where interval = " + str(interval_base) + " and symbol = '" + pair + "' ) \
-        and interval = "+str(interval_base)+" and symbol = '" + pair + "';")
-    res_cur = list(cursor.fetchone())
-    start = res_cur[1] - res_cur[1] % interval
-    print(f'Ealiest { pair } @ { interval_base } is at { start } ({ res_cur[2]}).')
-    grplimit = int(interval / interval_base) 
-    if res_cur[1] > start:
-        start += interval
-    cursor.execute("SELECT unix, date, open, high, low, close, volume, volume_base from " + tablename + " \
-        where unix >= " + str(start) + " and interval = "+str(interval_base)+" and symbol = '" + pair + f"' order by unix asc limit { grplimit + 1};")
-
-    print(f'Starting { pair } @ { interval_base } is at { start }.')
-    res_all= list(cursor.fetchall())
-    count = 0
-    for item in res_all:
-        if count == 0:
-            ts = item[0]
-            tsdate = item[1]
-            popen = item[2]
-            phigh = item[3]
-            plow = item[4]
-            pclose = item[5]
-            pvolume = item[6]
-            pvolbase = item[7]
-            pass
-        else:
-            if item[3] > phigh:
-                phigh = item[3]
-            if item[4] < plow:
-                plow = item[4]
-            pvolume += item[6]
-            pvolbase += item[7]
-        count += 1
-        # print(item)
-        if count == grplimit:
-            pclose = item[5]
-            sqlstatement = 'INSERT INTO ' + tablename + '(unix, date, symbol, open, high, low, close, volume, volume_base, market_id, interval) ' 
-            sqlstatement += 'VALUES(' + \
-            f'{ts}, \'{tsdate}\', \'{pair}\', {popen}, {phigh}, {plow}, {pclose}, {pvolume}, {pvolbase}, 1, {interval})'
-            print(sqlstatement)
-            cursor.execute(sqlstatement)
-            count = 0
-            ts = 0
-        
-    if ts != 0:
-        sqlstatement = 'INSERT INTO ' + tablename + '(unix, date, symbol, open, high, low, close, volume, volume_base, market_id, interval) ' 
-        sqlstatement += 'VALUES(' + \
-        f'{ts}, \'{tsdate}\', \'{pair}\', {popen}, {phigh}, {plow}, {pclose}, {pvolume}, {pvolbase}, 1, {interval})'
-        print(sqlstatement)
-        cursor.execute(sqlstatement)
-    
+    cursor.execute("SELECT min(unix) FROM " + tablename + " WHERE interval = %s AND symbol = %s", [interval_base, pair])
+    first = cursor.fetchone()[0]
+    if first is None:
+        print(f"No {pair}@{interval_base} bars to resample")
+        cursor.close()
+        return
+    # Start at the first full bucket - a partial first bucket has no earlier base bars to complete it
+    since = first + (-first) % interval
+    inserted, updated = resample_ohlc([pair], interval, interval_base, model=_ohlc_model(tablename),
+                                      since=since, cursor=cursor)
+    print(f"Resample {pair}@{interval} from {interval_base}: {inserted} inserted, {updated} updated")
     mydb.commit()
     cursor.close()
 
 def update_calc_ohlc(mydb, tablename, pair, interval, interval_base):
-    timezone = pytz.timezone("UTC")
+    """Refresh the interval bars of a pair from its latest stored interval bar on"""
     cursor = mydb.cursor()
-
-    # Find the latest record in DB and calculate number of records to fetch
-    cursor.execute("SELECT * from " + tablename + " \
-        where unix = (Select max(unix) from " + tablename + " where interval = " + str(interval) + " and symbol = '" + pair + "' ) \
-        and interval = "+str(interval)+" and symbol = '" + pair + "';")
-    res_cur = list(cursor.fetchone())
-    start = res_cur[1] - res_cur[1] % interval
-    print(f'Latest { pair } @ { interval } is at { start } ({ res_cur[2]}).')
-    end = int(time.time())
-    grplimit = int(interval / interval_base) 
-    cursor.execute("SELECT unix, date, open, high, low, close, volume, volume_base from " + tablename + " \
-        where unix >= " + str(start) + " and interval = "+str(interval_base)+" and symbol = '" + pair + "' order by unix asc;")
-
-    res_all= list(cursor.fetchall())
-    count = 0
-    for item in res_all:
-        if count == 0:
-            ts = item[0]
-            tsdate = item[1]
-            popen = item[2]
-            phigh = item[3]
-            plow = item[4]
-            pclose = item[5]
-            pvolume = item[6]
-            pvolbase = item[7]
-            pass
-        else:
-            if item[3] > phigh:
-                phigh = item[3]
-            if item[4] < plow:
-                plow = item[4]
-            pvolume += item[6]
-            pvolbase += item[7]
-        count += 1
-        # print(item)
-        if count == grplimit:
-            pclose = item[5]
-            if ts == start:     # have grplimit of interval_base and have existing interval
-                print(f"Update {pair}@{interval} at {start} - {tsdate}")
-        #         # print(f"Update {pair}@{interval}: {rec}")
-                sqlstatement = 'UPDATE ' + tablename + f' SET open = {popen}, high = {phigh}, low = {plow}, close = {pclose}, volume = {pvolume}, volume_base = {pvolbase}' + \
-                f' WHERE unix = {start} AND symbol = \'{pair}\' AND interval = {interval};'
-                print(sqlstatement)
-            else:               # have grplimit of interval_base and need to insert new interval
-                sqlstatement = 'INSERT INTO ' + tablename + '(unix, date, symbol, open, high, low, close, volume, volume_base, market_id, interval) ' 
-                sqlstatement += 'VALUES(' + \
-                f'{ts}, \'{tsdate}\', \'{pair}\', {popen}, {phigh}, {plow}, {pclose}, {pvolume}, {pvolbase}, 1, {interval})'
-                # print(sqlstatement)
-            cursor.execute(sqlstatement)
-            count = 0
-            ts = 0
-
-    if ts != 0:    
-        if ts != start:     # less than grplimit of interval_base and need to insert new intereval
-            sqlstatement = 'INSERT INTO ' + tablename + '(unix, date, symbol, open, high, low, close, volume, volume_base, market_id, interval) ' 
-            sqlstatement += 'VALUES(' + \
-            f'{ts}, \'{tsdate}\', \'{pair}\', {popen}, {phigh}, {plow}, {pclose}, {pvolume}, {pvolbase}, 1, {interval})'
-        else:               # less than grplimit of interval_base and have existing interval
-            sqlstatement = 'UPDATE ' + tablename + f' SET open = {popen}, high = {phigh}, low = {plow}, close = {pclose}, volume = {pvolume}, volume_base = {pvolbase}' + \
-            f' WHERE unix = {start} AND symbol = \'{pair}\' AND interval = {interval};'
-        print(sqlstatement)
-        cursor.execute(sqlstatement)
-
+    inserted, updated = resample_ohlc([pair], interval, interval_base, model=_ohlc_model(tablename),
+                                      incremental=True, cursor=cursor)
+    print(f"Resample {pair}@{interval} from {interval_base}: {inserted} inserted, {updated} updated")
     mydb.commit()
     cursor.close()
 
@@ -191,22 +94,9 @@ def update_ohlc(mydb, tablename, pair, interval):
     # print(ohlc_url)
     resp = requests.get(ohlc_url)
     if resp.status_code == 200:
-        for rec in resp.json()['data']['ohlc']:
-            ts = int(float(rec['timestamp']))
-            rec['timestamp']=ts
-            rec['tsdate']= timezone.localize(datetime.datetime.utcfromtimestamp(ts))
-            if ts == start:
-                print(f"Update {pair}@{interval} at {start} - {rec['tsdate']}")
-                # print(f"Update {pair}@{interval}: {rec}")
-                sqlstatement = 'UPDATE ' + tablename + f' SET open = {rec["open"]}, high = {rec["high"]}, low = {rec["low"]}, close = {rec["close"]}, volume = {rec["volume"]}' + \
-                    f' WHERE unix = {start} AND symbol = \'{pair}\' AND interval = {interval};'
-            else:
-                print(f"Insert {pair}@{interval}: {rec}")
-                sqlstatement = 'INSERT INTO ' + tablename + '(unix, date, symbol, open, high, low, close, volume, volume_base, market_id, interval) ' 
-                sqlstatement += 'VALUES(' + \
-                f'{rec["timestamp"]}, \'{rec["tsdate"]}\', \'{pair}\', {rec["open"]}, {rec["high"]}, {rec["low"]}, {rec["close"]}, {rec["volume"]}, 0, 1, {interval})'
-            # print(sqlstatement)
-            cursor.execute(sqlstatement)
+        # Bar at `start` is updated, newer bars inserted - one statement
+        inserted, updated = upsert_ohlc(bitstamp_ohlc_rows(resp.json()['data']['ohlc'], pair, interval), cursor=cursor)
+        print(f"Upsert {pair}@{interval}: {inserted} inserted, {updated} updated")
 
     mydb.commit()
     cursor.close()
@@ -260,21 +150,13 @@ def send_ws_data(r, tick_data):
         "content": message,
     })
     pair += "_Price"
-    if not (r == True):       # redis connected
-        min_logger.info(f"redis connected log for timer hmset: {pair}")
-        # print(f"redis connected for timer hmset: {pair}")
-        r.hmset(pair, {"price": tick_data["last"], "timestamp": tick_data["timestamp"], "source": "timer"})
+    # r: redis pipeline, executed by the caller
+    r.hset(pair, mapping={"price": tick_data["last"], "timestamp": tick_data["timestamp"], "source": "timer"})
 
 def min_cron_job():
     min_logger.info(f"Cron Min: Started. {datetime.datetime.now()}\n")
-    try:
-        r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
-        if not r.ping():
-            r = True    # not connected
-            print("Connection to Redis failed.")
-    except redis.ConnectionError as e:
-        r = True        # not connected
-        print(f"Connection error: {e}")
+    # All price hashes of one run go out in one round trip
+    r = get_redis().pipeline(transaction=False)
     ticker_base = "https://www.bitstamp.net/api/v2/ticker/"
     resp = requests.get(ticker_base)
     if resp.status_code == 200:
@@ -286,6 +168,10 @@ def min_cron_job():
         send_ws_data(r, respdata[16])      # eth/usd
         send_ws_data(r, respdata[15])      # eth/btc
         send_ws_data(r, respdata[0])       # btc/usd
+        try:
+            r.execute()
+        except redis.RedisError as e:
+            print(f"Connection error: {e}")
     # send_command_to_bot(f"hello - {datetime.datetime.now()}")
     # send_command_to_go(f"hello - {datetime.datetime.now()}")
     print(f"Cron Min: Completed. {datetime.datetime.now()}\n")
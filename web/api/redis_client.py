@@ -0,0 +1,75 @@
+"""
+Shared Redis clients
+
+Every code path (views, Celery tasks, websocket client threads, cron jobs) gets its
+client from here instead of opening a new connection per call: one connection pool
+per process (and per decode_responses flavour), sized by REDIS_MAX_CONNECTIONS.
+redis-py pools are thread-safe and reset themselves in forked children (Celery
+workers), so the clients can be shared freely.
+
+Asyncio code (consumers, the streaming candle builder) uses get_async_redis(); its pool
+is bound to the running event loop, so one is kept per loop.
+"""
+import asyncio
+import threading
+import weakref
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+
+_lock = threading.Lock()
+_clients = {}  # decode_responses -> redis.Redis
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> {decode_responses: redis.asyncio.Redis}
+
+
+def redis_url():
+    return getattr(settings, 'REDIS_URL', 'redis://redis:6379/0')
+
+
+def get_redis(decode_responses=False):
+    """Process-wide Redis client (shared connection pool)"""
+    client = _clients.get(decode_responses)
+    if client is None:
+        with _lock:
+            client = _clients.get(decode_responses)
+            if client is None:
+                pool = redis.ConnectionPool.from_url(
+                    redis_url(),
+                    max_connections=getattr(settings, 'REDIS_MAX_CONNECTIONS', 50),
+                    decode_responses=decode_responses,
+                    health_check_interval=30,
+                )
+                client = _clients[decode_responses] = redis.Redis(connection_pool=pool)
+    return client
+
+
+def get_async_redis(decode_responses=False):
+    """redis.asyncio client sharing one pool within the running event loop"""
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+    client = clients.get(decode_responses)
+    if client is None:
+        pool = aioredis.ConnectionPool.from_url(
+            redis_url(),
+            max_connections=getattr(settings, 'REDIS_MAX_CONNECTIONS', 50),
+            decode_responses=decode_responses,
+            health_check_interval=30,
+        )
+        client = clients[decode_responses] = aioredis.Redis(connection_pool=pool)
+    return client
+
+
+def hgetall_many(keys, client=None):
+    """
+    HGETALL of many hashes in one pipelined round trip
+
+    Returns: {key: {field: value}} (decoded strings, {} for missing keys)
+    """
+    keys = list(keys)
+    if not keys:
+        return {}
+    pipe = (client or get_redis(decode_responses=True)).pipeline(transaction=False)
+    for key in keys:
+        pipe.hgetall(key)
+    return dict(zip(keys, pipe.execute()))
@@ -1,167 +1,72 @@
 """
 Celery tasks for automated data updates and calculations
+
+Stages run in-process through api.pipeline (no subprocess per script), so the
+worker's warm Django/pandas runtime and DB connection are reused.
 """
-import subprocess
 import logging
-from celery import shared_task
-from django.conf import settings
+import uuid
+from datetime import timedelta
+from celery import shared_task, chain, chord
+
+from api.models import PipelineStageRun
+from api.pipeline import PipelineContext, run_stage, run_pipeline
 
 logger = logging.getLogger(__name__)
 
 
+def _run_single_stage(name, label):
+    """Run one pipeline stage for all symbols/intervals and wrap the result for Celery"""
+    logger.info(f"Starting {label}...")
+    ctx = PipelineContext()
+    try:
+        result = run_stage(name, ctx)
+        logger.info(f"{label} completed successfully in {ctx.timings[name]}s")
+        return {'status': 'success', 'output': result, 'duration': ctx.timings[name]}
+    except Exception as e:
+        logger.error(f"{label} exception: {str(e)}")
+        return {'status': 'error', 'error': str(e)}
+
+
 @shared_task(bind=True, name='api.tasks.fetch_ohlc_data')
 def fetch_ohlc_data(self):
     """
-    Fetch OHLC data from Kraken API
-    Runs: Every hour at 5 minutes past
+    Fetch OHLC data from Kraken API (all pairs, manual trigger)
     """
-    logger.info("Starting OHLC data fetch...")
-    try:
-        result = subprocess.run(
-            ['python', '/app/scripts/fetch_historical_data.py'],
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 minutes timeout
-        )
-        
-        if result.returncode == 0:
-            logger.info(f"OHLC fetch completed successfully")
-            logger.debug(result.stdout)
-            return {'status': 'success', 'output': result.stdout}
-        else:
-            logger.error(f"OHLC fetch failed: {result.stderr}")
-            return {'status': 'error', 'error': result.stderr}
-    
-    except subprocess.TimeoutExpired:
-        logger.error("OHLC fetch timed out")
-        return {'status': 'error', 'error': 'Timeout after 5 minutes'}
-    except Exception as e:
-        logger.error(f"OHLC fetch exception: {str(e)}")
-        return {'status': 'error', 'error': str(e)}
+    return _run_single_stage('fetch', 'OHLC data fetch')
 
 
 @shared_task(bind=True, name='api.tasks.calculate_indicators')
 def calculate_indicators(self):
     """
     Calculate technical indicators (RSI, MACD, SMA, EMA, ADX)
-    Runs: Every hour at 10 minutes past (after OHLC fetch)
     """
-    logger.info("Starting indicator calculations...")
-    try:
-        result = subprocess.run(
-            ['python', '/app/scripts/calculate_indicators.py'],
-            capture_output=True,
-            text=True,
-            timeout=600  # 10 minutes timeout
-        )
-        
-        if result.returncode == 0:
-            logger.info("Indicator calculations completed successfully")
-            logger.debug(result.stdout)
-            return {'status': 'success', 'output': result.stdout}
-        else:
-            logger.error(f"Indicator calculation failed: {result.stderr}")
-            return {'status': 'error', 'error': result.stderr}
-    
-    except subprocess.TimeoutExpired:
-        logger.error("Indicator calculation timed out")
-        return {'status': 'error', 'error': 'Timeout after 10 minutes'}
-    except Exception as e:
-        logger.error(f"Indicator calculation exception: {str(e)}")
-        return {'status': 'error', 'error': str(e)}
+    return _run_single_stage('indicators', 'Indicator calculations')
 
 
 @shared_task(bind=True, name='api.tasks.calculate_ema_channel')
 def calculate_ema_channel(self):
     """
     Calculate EMA Channel (EMA High 33, EMA Low 33)
-    Runs: Every hour at 15 minutes past
+    The channel is calculated by the indicator engine together with the other indicators.
     """
-    logger.info("Starting EMA channel calculations...")
-    try:
-        result = subprocess.run(
-            ['python', '/app/scripts/calculate_ema_channel.py'],
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 minutes timeout
-        )
-        
-        if result.returncode == 0:
-            logger.info("EMA channel calculations completed successfully")
-            logger.debug(result.stdout)
-            return {'status': 'success', 'output': result.stdout}
-        else:
-            logger.error(f"EMA channel calculation failed: {result.stderr}")
-            return {'status': 'error', 'error': result.stderr}
-    
-    except subprocess.TimeoutExpired:
-        logger.error("EMA channel calculation timed out")
-        return {'status': 'error', 'error': 'Timeout after 5 minutes'}
-    except Exception as e:
-        logger.error(f"EMA channel calculation exception: {str(e)}")
-        return {'status': 'error', 'error': str(e)}
+    return _run_single_stage('indicators', 'EMA channel calculations')
 
 
 @shared_task(bind=True, name='api.tasks.calculate_market_regime')
 def calculate_market_regime(self):
     """
     Calculate market regime (trending/ranging, ADX, channel metrics)
-    Runs: Every hour at 20 minutes past
     """
-    logger.info("Starting market regime calculations...")
-    try:
-        result = subprocess.run(
-            ['python', '/app/scripts/calculate_market_regime.py'],
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 minutes timeout
-        )
-        
-        if result.returncode == 0:
-            logger.info("Market regime calculations completed successfully")
-            logger.debug(result.stdout)
-            return {'status': 'success', 'output': result.stdout}
-        else:
-            logger.error(f"Market regime calculation failed: {result.stderr}")
-            return {'status': 'error', 'error': result.stderr}
-    
-    except subprocess.TimeoutExpired:
-        logger.error("Market regime calculation timed out")
-        return {'status': 'error', 'error': 'Timeout after 5 minutes'}
-    except Exception as e:
-        logger.error(f"Market regime calculation exception: {str(e)}")
-        return {'status': 'error', 'error': str(e)}
+    return _run_single_stage('market_regime', 'Market regime calculations')
 
 
 @shared_task(bind=True, name='api.tasks.generate_trading_signals')
 def generate_trading_signals(self):
     """
     Generate trading signals based on market regime and indicators
-    Runs: Every hour at 25 minutes past
     """
-    logger.info("Starting trading signal generation...")
-    try:
-        result = subprocess.run(
-            ['python', '/app/scripts/generate_trading_signals.py'],
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 minutes timeout
-        )
-        
-        if result.returncode == 0:
-            logger.info("Trading signal generation completed successfully")
-            logger.debug(result.stdout)
-            return {'status': 'success', 'output': result.stdout}
-        else:
-            logger.error(f"Trading signal generation failed: {result.stderr}")
-            return {'status': 'error', 'error': result.stderr}
-    
-    except subprocess.TimeoutExpired:
-        logger.error("Trading signal generation timed out")
-        return {'status': 'error', 'error': 'Timeout after 5 minutes'}
-    except Exception as e:
-        logger.error(f"Trading signal generation exception: {str(e)}")
-        return {'status': 'error', 'error': str(e)}
+    return _run_single_stage('signals', 'Trading signal generation')
 
 
 @shared_task(bind=True, name='api.tasks.manual_update_all')
@@ -169,26 +74,195 @@ def manual_update_all(self):
     """
     Manual trigger to update all data (OHLC + Indicators + Signals)
     Can be called from Django Admin or API endpoint
+
+    All stages share one PipelineContext, so OHLC history is read once
+    and reused by indicators, market regime and signals.
     """
     logger.info("Starting manual full data update...")
     
-    results = {}
-    
-    # Step 1: Fetch OHLC
-    results['ohlc'] = fetch_ohlc_data()
-    
-    # Step 2: Calculate Indicators
-    results['indicators'] = calculate_indicators()
-    
-    # Step 3: Calculate EMA Channel
-    results['ema_channel'] = calculate_ema_channel()
-    
-    # Step 4: Calculate Market Regime
-    results['market_regime'] = calculate_market_regime()
-    
-    # Step 5: Generate Trading Signals
-    results['signals'] = generate_trading_signals()
+    results = run_pipeline()
     
     logger.info("Manual full data update completed")
     return results
 
+
+# ---------------------------------------------------------------------------
+# Event-driven pipeline: each stage starts as soon as the previous one is done
+#
+#   fetch all pairs                                                  (one task, one Kraken provider)
+#   -> indicators + EMA channel per interval, all symbols           (fanned out)
+#   -> market_regime per symbol, 1W -> 1D -> 4H -> 1H              (higher TF first)
+#   -> signals per (symbol, interval)
+#   -> finalize (timing summary)
+# ---------------------------------------------------------------------------
+
+@shared_task(bind=True, name='api.tasks.fetch_run_ohlc')
+def fetch_run_ohlc(self, run_id, symbols=None, intervals=None):
+    """
+    Fetch the latest candles of all pairs of a run in one task
+    All requests share one AsyncKrakenProvider: one connection pool and one rate limit budget.
+    """
+    ctx = PipelineContext(symbols=symbols, intervals=intervals)
+    try:
+        result = run_stage('fetch', ctx, run_id=run_id)
+        return {'status': 'success', 'output': result, 'duration': ctx.timings['fetch']}
+    except Exception as e:
+        logger.error(f"OHLC fetch failed: {str(e)}")
+        return {'status': 'error', 'error': str(e)}
+
+
+@shared_task(bind=True, name='api.tasks.process_interval')
+def process_interval(self, run_id, symbols, interval):
+    """
+    Calculate indicators (incl. EMA channel) for all symbols of one interval
+    The indicator engine runs once over the (time x symbol) matrix with one bulk upsert.
+    """
+    ctx = PipelineContext(pairs=[(symbol, interval) for symbol in symbols])
+    try:
+        result = run_stage('indicators', ctx, run_id=run_id)
+    except Exception as e:
+        logger.error(f"Indicators failed for {interval}s: {str(e)}")
+        return {'status': 'error', 'stage': 'indicators', 'error': str(e)}
+    return {'status': 'success', 'output': result, 'timings': ctx.timings}
+
+
+@shared_task(bind=True, name='api.tasks.detect_pair_regime')
+def detect_pair_regime(self, run_id, symbol, interval):
+    """Market regime for one (symbol, interval)"""
+    ctx = PipelineContext(pairs=[(symbol, interval)])
+    try:
+        result = run_stage('market_regime', ctx, run_id=run_id)
+        return {'status': 'success', 'output': result, 'duration': ctx.timings['market_regime']}
+    except Exception as e:
+        logger.error(f"Market regime failed for {symbol} @ {interval}s: {str(e)}")
+        return {'status': 'error', 'error': str(e)}
+
+
+@shared_task(bind=True, name='api.tasks.generate_pair_signal')
+def generate_pair_signal(self, run_id, symbol, interval):
+    """Trading signal for one (symbol, interval)"""
+    ctx = PipelineContext(pairs=[(symbol, interval)])
+    try:
+        result = run_stage('signals', ctx, run_id=run_id)
+        return {'status': 'success', 'output': result, 'duration': ctx.timings['signals']}
+    except Exception as e:
+        logger.error(f"Signal generation failed for {symbol} @ {interval}s: {str(e)}")
+        return {'status': 'error', 'error': str(e)}
+
+
+@shared_task(bind=True, name='api.tasks.pipeline_stage_done')
+def pipeline_stage_done(self, run_id, label):
+    """Chord barrier - the next stage group starts once every task of this one finished"""
+    logger.info(f"Pipeline {run_id[:8]}: '{label}' complete")
+    return label
+
+
+@shared_task(bind=True, name='api.tasks.finalize_pipeline_run')
+def finalize_pipeline_run(self, run_id):
+    """Summarise per-stage timing of a finished pipeline run"""
+    summary = {}
+    for run in PipelineStageRun.objects.filter(run_id=run_id).order_by('started_at'):
+        stage = summary.setdefault(run.stage, {'runs': 0, 'errors': 0, 'total': 0.0, 'max': 0.0,
+                                               'first_start': run.started_at, 'last_end': run.started_at})
+        stage['runs'] += 1
+        stage['errors'] += 1 if run.status == 'error' else 0
+        stage['total'] += run.duration
+        stage['max'] = max(stage['max'], run.duration)
+        stage['last_end'] = max(stage['last_end'], run.started_at + timedelta(seconds=run.duration))
+
+    runs = list(summary.values())
+    wall_time = (max(s['last_end'] for s in runs) - min(s['first_start'] for s in runs)).total_seconds() if runs else 0
+
+    for name, stage in summary.items():
+        logger.info(f"Pipeline {run_id[:8]} {name}: {stage['runs']} runs, {stage['errors']} errors, "
+                    f"total {stage['total']:.2f}s, max {stage['max']:.2f}s")
+        stage['total'] = round(stage['total'], 3)
+        stage['first_start'] = stage['first_start'].isoformat()
+        stage['last_end'] = stage['last_end'].isoformat()
+    logger.info(f"Pipeline {run_id[:8]} finished in {wall_time:.2f}s")
+
+    return {'status': 'success', 'run_id': run_id, 'wall_time': round(wall_time, 3), 'stages': summary}
+
+
+def build_pipeline(run_id, symbols=None, intervals=None, fetch=True):
+    """Celery canvas for one pipeline run over all (symbol, interval) pairs"""
+    ctx = PipelineContext(symbols=symbols, intervals=intervals)
+
+    # fetch=False: the candles are already stored (e.g. written by the streaming candle builder)
+    steps = [fetch_run_ohlc.si(run_id, symbols, intervals)] if fetch else []
+    steps.append(chord(
+        [process_interval.si(run_id, [symbol for symbol, pair_interval in ctx.pairs if pair_interval == interval],
+                             interval)
+         for interval in ctx.intervals],
+        pipeline_stage_done.si(run_id, 'indicators'),
+    ))
+
+    # Higher timeframes first: lower timeframe regimes read the higher timeframe trend
+    for interval in sorted(ctx.intervals, reverse=True):
+        steps.append(chord(
+            [detect_pair_regime.si(run_id, symbol, pair_interval)
+             for symbol, pair_interval in ctx.pairs if pair_interval == interval],
+            pipeline_stage_done.si(run_id, f'market_regime {interval}s'),
+        ))
+
+    steps.append(chord(
+        [generate_pair_signal.si(run_id, symbol, interval) for symbol, interval in ctx.pairs],
+        finalize_pipeline_run.si(run_id),
+    ))
+
+    return chain(*steps)
+
+
+@shared_task(bind=True, name='api.tasks.run_pipeline_workflow')
+def run_pipeline_workflow(self, symbols=None, intervals=None, fetch=True):
+    """
+    Start an event-driven pipeline run
+    Runs: Every hour at 5 minutes past (replaces the fixed 5/10/15/20/25 offsets),
+          and with fetch=False when the streaming candle builder closes hourly / daily bars
+    """
+    run_id = str(uuid.uuid4())
+    logger.info(f"Starting pipeline run {run_id}...")
+    build_pipeline(run_id, symbols=symbols, intervals=intervals, fetch=fetch).apply_async()
+    return {'status': 'success', 'run_id': run_id}
+
+
+@shared_task(bind=True, name='api.tasks.maintain_ohlc_storage')
+def maintain_ohlc_storage(self):
+    """
+    Create upcoming OHLC partitions and apply the per-interval retention policy
+    Runs: Daily at 00:30
+    """
+    from api.ohlc_storage import maintain_storage
+
+    logger.info("Starting OHLC storage maintenance...")
+    try:
+        return {'status': 'success', 'tables': maintain_storage()}
+    except Exception as e:
+        logger.error(f"OHLC storage maintenance exception: {str(e)}")
+        return {'status': 'error', 'error': str(e)}
+
+
+@shared_task(bind=True, name='api.tasks.archive_ohlc_history')
+def archive_ohlc_history(self):
+    """
+    Append the newly closed months of every pipeline pair to the Parquet OHLC archive
+    Runs: Daily at 00:45
+    """
+    from api.ohlc_archive import archive_enabled, archive_pair
+    from api.pipeline.constants import INTERVALS, SYMBOLS
+
+    if not archive_enabled():
+        return {'status': 'skipped', 'reason': 'OHLC archive disabled or pyarrow missing'}
+
+    logger.info("Starting OHLC archive update...")
+    written = {}
+    try:
+        for symbol in SYMBOLS:
+            for name, interval in INTERVALS.items():
+                months = archive_pair(symbol, interval)
+                if months:
+                    written[f'{symbol} {name}'] = months
+        return {'status': 'success', 'months': written}
+    except Exception as e:
+        logger.error(f"OHLC archive update exception: {str(e)}")
+        return {'status': 'error', 'error': str(e), 'months': written}
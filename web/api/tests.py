@@ -1,3 +1,262 @@
-from django.test import TestCase
+import importlib.util
+import tempfile
+import types
+from datetime import datetime, timezone
+from unittest import skipUnless
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from api import ohlc_archive, ohlc_loader
+from api.candles import CandleAggregator
+from api.ohlc_writer import ohlc_row, upsert_ohlc
+from api.pipeline import backtest, scoring, signals
+from api.pipeline.indicator_engine import OUTPUTS, compute_indicators, stack_states, unstack_states
+
+
+def random_ohlc(n_rows, seed=1):
+    """Random-walk high / low / close / volume arrays"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_rows)))
+    high = close * (1 + np.abs(rng.normal(0, 0.01, n_rows)))
+    low = close * (1 - np.abs(rng.normal(0, 0.01, n_rows)))
+    volume = np.abs(rng.normal(100, 40, n_rows))
+    return high, low, close, volume
+
+
+def reference_indicators(high, low, close):
+    """The pandas formulas of the original scripts/calculate_indicators.py"""
+    high, low, close = pd.Series(high), pd.Series(low), pd.Series(close)
+
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+
+    high_diff, low_diff = high.diff(), -low.diff()
+    plus_dm, minus_dm = high_diff.copy(), low_diff.copy()
+    plus_dm[plus_dm < 0] = 0
+    plus_dm[high_diff < low_diff] = 0
+    minus_dm[minus_dm < 0] = 0
+    minus_dm[low_diff < high_diff] = 0
+    tr = pd.concat([high - low, (high - close.shift(1)).abs(), (low - close.shift(1)).abs()], axis=1).max(axis=1)
+    atr = tr.ewm(alpha=1 / 14, adjust=False).mean()
+    plus_di = 100 * plus_dm.ewm(alpha=1 / 14, adjust=False).mean() / atr
+    minus_di = 100 * minus_dm.ewm(alpha=1 / 14, adjust=False).mean() / atr
+    dx = 100 * (plus_di - minus_di).abs() / (plus_di + minus_di)
+
+    ema_12, ema_26 = close.ewm(span=12).mean(), close.ewm(span=26).mean()
+    macd = ema_12 - ema_26
+    macd_signal = macd.ewm(span=9).mean()
+    # EMA-33 channel: defined from the 33rd bar on
+    ema_high_33 = high.ewm(span=33, adjust=False).mean().where(high.index >= 32)
+    ema_low_33 = low.ewm(span=33, adjust=False).mean().where(low.index >= 32)
+    return {
+        'sma_20': close.rolling(window=20).mean(),
+        'ema_12': ema_12,
+        'ema_26': ema_26,
+        'macd': macd,
+        'macd_signal': macd_signal,
+        'macd_histogram': macd - macd_signal,
+        'rsi': 100 - 100 / (1 + gain / loss),
+        'adx': dx.ewm(alpha=1 / 14, adjust=False).mean(),
+        'ema_high_33': ema_high_33,
+        'ema_low_33': ema_low_33,
+    }
+
+
+class IndicatorEngineTests(SimpleTestCase):
+
+    def setUp(self):
+        # Three symbols with different listing dates and a gap in the second one
+        n_rows = 300
+        self.high, self.low, self.close = (np.full((n_rows, 3), np.nan) for _ in range(3))
+        for i, start in enumerate((0, 40, 120)):
+            high, low, close, _ = random_ohlc(n_rows - start, seed=i)
+            self.high[start:, i], self.low[start:, i], self.close[start:, i] = high, low, close
+        self.high[200:210, 1] = self.low[200:210, 1] = self.close[200:210, 1] = np.nan
+
+    def assertOutputsEqual(self, expected, actual, name):
+        np.testing.assert_array_equal(np.isnan(expected), np.isnan(actual), err_msg=name)
+        np.testing.assert_allclose(actual, expected, rtol=1e-10, equal_nan=True, err_msg=name)
+
+    def test_matches_pandas_formulas(self):
+        outputs, _, _ = compute_indicators(self.high, self.low, self.close)
+        for i in range(3):
+            rows = ~np.isnan(self.close[:, i])
+            expected = reference_indicators(self.high[rows, i], self.low[rows, i], self.close[rows, i])
+            for name in OUTPUTS:
+                self.assertOutputsEqual(expected[name].to_numpy(), outputs[name][rows, i], name)
+
+    def test_resume_from_state(self):
+        full, _, _ = compute_indicators(self.high, self.low, self.close)
+        cut = 150
+        _, state, _ = compute_indicators(self.high[:cut], self.low[:cut], self.close[:cut])
+        state = stack_states(unstack_states(state))  # round trip through IndicatorState
+        resumed, _, _ = compute_indicators(self.high[cut:], self.low[cut:], self.close[cut:], state=state)
+        for name in OUTPUTS:
+            self.assertOutputsEqual(full[name][cut:], resumed[name], name)
+
+    def test_resume_from_checkpoint(self):
+        full, _, _ = compute_indicators(self.high, self.low, self.close)
+        rows = np.array([250, 205, 280])
+        _, _, checkpoint = compute_indicators(self.high, self.low, self.close, checkpoint_rows=rows)
+        checkpoints = unstack_states(checkpoint)
+        for i, row in enumerate(rows):
+            resumed, _, _ = compute_indicators(self.high[row:, i:i + 1], self.low[row:, i:i + 1],
+                                               self.close[row:, i:i + 1], state=stack_states([checkpoints[i]]))
+            for name in OUTPUTS:
+                self.assertOutputsEqual(full[name][row:, i], resumed[name][:, 0], name)
+
+
+class BacktestSignalTests(SimpleTestCase):
+
+    def test_strategy_signals_match_live_signals(self):
+        n_rows = 600
+        high, low, close, volume = random_ohlc(n_rows)
+        open_ = np.r_[close[0], close[:-1]]
+        outputs, _, _ = compute_indicators(high[:, None], low[:, None], close[:, None])
+        indicators = {name: values[:, 0] for name, values in outputs.items()}
+        bars = backtest.prepare_bars(np.arange(n_rows) * 3600.0, open_, high, low, close, volume, indicators)
+        vectorized = backtest.strategy_signals(bars)
+        trending = backtest.trending_regimes(bars)
+
+        checked = 0
+        for t in range(backtest.MIN_SIGNAL_BARS, n_rows):
+            if not bars['regime_valid'][t]:
+                continue
+            indicator = types.SimpleNamespace(
+                ema_high_33=indicators['ema_high_33'][t], ema_low_33=indicators['ema_low_33'][t],
+                rsi=indicators['rsi'][t], macd=indicators['macd'][t], signal_line=indicators['macd_signal'][t],
+            )
+            regime = types.SimpleNamespace(
+                regime_type='trending' if trending[t] else 'ranging',
+                volume_ratio=bars['volume_ratio'][t],
+                trend_direction={1: 'up', -1: 'down', 0: 'neutral'}[int(bars['trend_direction'][t])],
+            )
+            history = scoring.score_history(close[:t + 1], volume[:t + 1])
+            strategy = (signals.generate_trend_following_signal if trending[t]
+                        else signals.generate_mean_reversion_signal)
+            live = strategy('BTC/USD', 3600, close[t], indicator, regime, history)
+
+            expected = 'hold' if live is None else live['signal_type']
+            self.assertEqual({backtest.BUY: 'buy', backtest.HOLD: 'hold', backtest.SELL: 'sell'}
+                             [int(vectorized['signal'][t])], expected, f"bar {t}")
+            if expected != 'hold':
+                self.assertEqual(vectorized['confidence'][t], live['confidence'], f"bar {t}")
+            checked += 1
+        self.assertGreater(checked, 100)
+
+
+class CandleAggregatorTests(SimpleTestCase):
+
+    def setUp(self):
+        self.aggregator = CandleAggregator(intervals=[60], publish_interval=0)
+        self.aggregator.complete_from = 0
+
+    def test_next_period_trade_closes_bar(self):
+        self.aggregator.add_trade('BTC/USD', 100, 1, 1200)
+        self.aggregator.add_trade('BTC/USD', 110, 2, 1230)
+        self.aggregator.add_trade('BTC/USD', 95, 3, 1259.9)
+        self.aggregator.add_trade('BTC/USD', 105, 1, 1260)
+
+        bar, = self.aggregator.closed
+        self.assertEqual((bar['unix'], bar['open'], bar['high'], bar['low'], bar['close'], bar['volume']),
+                         (1200, 100, 110, 95, 95, 6))
+        self.assertEqual(self.aggregator.snapshot('BTC/USD')[0]['unix'], 1260)
+
+    def test_clock_closes_bar_after_grace(self):
+        self.aggregator.add_trade('BTC/USD', 100, 1, 1200)
+        self.aggregator.close_due(now=1261)
+        self.assertEqual(self.aggregator.closed, [])
+        self.aggregator.close_due(now=1262)
+        self.assertEqual([bar['unix'] for bar in self.aggregator.closed], [1200])
+
+    def test_late_trade_after_clock_close(self):
+        self.aggregator.add_trade('BTC/USD', 100, 1, 1200)
+        self.aggregator.add_trade('BTC/USD', 110, 5, 1230)
+        self.aggregator.close_due(now=1263)
+        # Delivered after the clock closed its bar: counted, no second bar for 1200
+        self.aggregator.add_trade('BTC/USD', 90, 0.1, 1259.5)
+        self.aggregator.close_due(now=1400)
+
+        bar, = self.aggregator.closed
+        self.assertEqual((bar['open'], bar['low'], bar['volume']), (100, 100, 6))
+        self.assertEqual(self.aggregator.snapshot(), [])
+        self.assertEqual(self.aggregator.stats['late'], 1)
+
+    def test_bar_open_at_start_is_not_written(self):
+        self.aggregator.complete_from = 1230
+        self.aggregator.add_trade('BTC/USD', 100, 1, 1240)
+        self.aggregator.add_trade('BTC/USD', 101, 1, 1300)
+        self.assertEqual(self.aggregator.closed, [])
+        self.assertEqual(self.aggregator.stats['partial'], 1)
+
+
+@skipUnless(importlib.util.find_spec('pyarrow'), "pyarrow not installed")
+class OhlcArchiveLoaderTests(TestCase):
+    SYMBOLS = ['BTC/USD', 'ETH/USD']
+    INTERVAL = 86400
+    START = int(datetime(2023, 1, 1, tzinfo=timezone.utc).timestamp())
+    NOW = int(datetime(2023, 4, 15, tzinfo=timezone.utc).timestamp())
+
+    def setUp(self):
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        settings_override = override_settings(OHLC_ARCHIVE_DIR=archive_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.n_rows = (self.NOW - self.START) // self.INTERVAL
+        rows = []
+        for i, symbol in enumerate(self.SYMBOLS):
+            high, low, close, volume = (np.round(values, 2) for values in random_ohlc(self.n_rows, seed=i))
+            # ETH/USD starts later, in the second archived month
+            for n in range(40 if i else 0, self.n_rows):
+                rows.append(ohlc_row(self.START + n * self.INTERVAL, symbol, self.INTERVAL,
+                                     close[n], high[n], low[n], close[n], volume[n]))
+        upsert_ohlc(rows)
+        for symbol in self.SYMBOLS:
+            ohlc_archive.archive_pair(symbol, self.INTERVAL, now=self.NOW)
+
+    def load(self, symbols, **filters):
+        archived = ohlc_loader._load('qt_ohlc', symbols, self.INTERVAL, **filters)
+        database = ohlc_loader._load_db('qt_ohlc', symbols, self.INTERVAL, **filters)
+        return archived, database
+
+    def assertColumnsEqual(self, expected, actual):
+        self.assertEqual(set(expected), set(actual))
+        if 'symbol_index' in expected:
+            # Bars of different symbols at the same unix come in no particular order
+            expected, actual = ({column: values[np.lexsort((columns['symbol_index'], columns['unix']))]
+                                 for column, values in columns.items()} for columns in (expected, actual))
+        for column in expected:
+            np.testing.assert_array_equal(actual[column], expected[column], err_msg=column)
+
+    def test_archive_holds_closed_months(self):
+        april = int(datetime(2023, 4, 1, tzinfo=timezone.utc).timestamp())
+        self.assertEqual(len(ohlc_archive.archived_months('qt_ohlc', 'BTC/USD', self.INTERVAL)), 3)
+        self.assertEqual(ohlc_archive.archive_end('qt_ohlc', 'BTC/USD', self.INTERVAL), april - self.INTERVAL)
+
+    def test_archive_and_database_split(self):
+        march = int(datetime(2023, 3, 10, tzinfo=timezone.utc).timestamp())
+        april = int(datetime(2023, 4, 5, tzinfo=timezone.utc).timestamp())
+        for symbols in ('BTC/USD', self.SYMBOLS):
+            for filters in ({}, {'since': march}, {'until': march}, {'since': march, 'until': april}):
+                archived, database = self.load(symbols, **filters)
+                self.assertColumnsEqual(database, archived)
+
+        # The split actually reads from the archive
+        archived, _ = self.load('BTC/USD')
+        self.assertEqual(len(archived['unix']), self.n_rows)
+
+    def test_changed_bar_drops_archived_months(self):
+        february = int(datetime(2023, 2, 10, tzinfo=timezone.utc).timestamp())
+        with self.captureOnCommitCallbacks(execute=True):
+            upsert_ohlc([ohlc_row(february, 'BTC/USD', self.INTERVAL, 1, 2, 0.5, 1.5, 10)])
+        months = ohlc_archive.archived_months('qt_ohlc', 'BTC/USD', self.INTERVAL)
+        self.assertEqual(months, [self.START])
+
+        archived, database = self.load('BTC/USD')
+        self.assertColumnsEqual(database, archived)
+        self.assertEqual(archived['close'][archived['unix'] == february], [1.5])
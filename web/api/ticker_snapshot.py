@@ -0,0 +1,109 @@
+"""
+Ticker snapshot - live quotes of all venues, refreshed in the background
+
+The ticker service (python manage.py ticker_service) polls Kraken once per cycle for all
+pairs (one REST call), checks the IBKR gateway, keeps the Bitstamp live-trade websocket
+client running, and stores the result in Redis (ticker_snapshot). Views only read the
+snapshot, so page latency does not depend on exchange round trips or rate-limit sleeps.
+
+Snapshot:
+    {'kraken': {symbol: {price, bid, ask, volume_24h, source}},   # prices as strings
+     'ibkr': {symbol: {price, source, status, timestamp}},
+     'updated': unix time of the refresh}
+"""
+import json
+import logging
+import time
+
+import redis
+
+from api.pipeline.constants import KRAKEN_PAIRS
+from api.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+TICKER_SNAPSHOT_KEY = 'ticker_snapshot'
+TICKER_SNAPSHOT_TTL = 120        # seconds - views fall back to database prices when it expires
+TICKER_REFRESH_INTERVAL = 10     # seconds between refreshes of the ticker service
+
+EMPTY_SNAPSHOT = {'kraken': {}, 'ibkr': {}, 'updated': None}
+
+
+def fetch_kraken_tickers(provider=None):
+    """Last price / bid / ask / 24h volume of all Kraken pairs in one request"""
+    from api.providers.kraken_provider import get_kraken_provider
+
+    provider = provider or get_kraken_provider()
+    live_ticker = provider.get_ticker(list(KRAKEN_PAIRS.values()))
+    tickers = {}
+    for symbol, kraken_pair in KRAKEN_PAIRS.items():
+        if kraken_pair in live_ticker:
+            ticker_data = live_ticker[kraken_pair]
+            tickers[symbol] = {
+                'price': ticker_data['c'][0],  # strings keep the full precision
+                'bid': ticker_data['b'][0],
+                'ask': ticker_data['a'][0],
+                'volume_24h': ticker_data['v'][1],
+                'source': 'Kraken Live',
+            }
+    return tickers
+
+
+def fetch_ibkr_status(symbols):
+    """IBKR gateway state of the stock symbols (the simple provider has no quotes yet)"""
+    from api.providers.ibkr_simple_provider import get_ibkr_simple_provider
+
+    provider = get_ibkr_simple_provider()
+    provider.refresh(symbols)
+    connected = provider.connection_status == 'connected'
+    return {
+        symbol: (connected and provider.data_cache.get(symbol)) or {
+            'price': 0.0,
+            'source': f"IBKR ({provider.connection_status.replace('_', ' ').title()})",
+            'status': provider.connection_status,
+            'timestamp': None,
+        }
+        for symbol in symbols
+    }
+
+
+def refresh_ticker_snapshot(stock_symbols=None, previous=None):
+    """
+    Fetch all venues and store the snapshot in Redis
+
+    A venue that fails keeps its entries of the previous snapshot (until the TTL expires).
+    Returns: the snapshot
+    """
+    previous = previous or get_ticker_snapshot()
+    snapshot = {'updated': time.time()}
+
+    try:
+        snapshot['kraken'] = fetch_kraken_tickers()
+    except Exception as e:
+        logger.warning(f"Kraken ticker refresh failed: {e}")
+        snapshot['kraken'] = previous['kraken']
+
+    if stock_symbols is None:
+        from api.models import SymbolInfo
+        stock_symbols = list(SymbolInfo.objects.filter(market_id=2).values_list('name', flat=True))
+    try:
+        snapshot['ibkr'] = fetch_ibkr_status(stock_symbols) if stock_symbols else {}
+    except Exception as e:
+        logger.warning(f"IBKR status refresh failed: {e}")
+        snapshot['ibkr'] = previous['ibkr']
+
+    try:
+        get_redis().setex(TICKER_SNAPSHOT_KEY, TICKER_SNAPSHOT_TTL, json.dumps(snapshot))
+    except redis.RedisError as e:
+        logger.warning(f"Ticker snapshot write failed: {e}")
+    return snapshot
+
+
+def get_ticker_snapshot():
+    """Latest snapshot (EMPTY_SNAPSHOT when the ticker service is not running)"""
+    try:
+        value = get_redis(decode_responses=True).get(TICKER_SNAPSHOT_KEY)
+    except redis.RedisError as e:
+        logger.warning(f"Ticker snapshot unavailable: {e}")
+        return dict(EMPTY_SNAPSHOT)
+    return json.loads(value) if value else dict(EMPTY_SNAPSHOT)
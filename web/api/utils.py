@@ -1,6 +1,6 @@
 import logging
 import asyncio
-import redis
+from .redis_client import get_redis
 import smtplib, ssl
 from email.mime.text import MIMEText
 from email.utils import formataddr
@@ -10,8 +10,6 @@ logger = logging.getLogger("listen_for_commands")
 logger.setLevel(logging.INFO)
 main_logger = logging.getLogger('main')
 
-REDIS_HOST = "redis"  # Use your Redis host
-REDIS_PORT = 6379  # Use your Redis port
 
 def semail(info):
     ret = True
@@ -55,7 +53,7 @@ def semail(info):
 
 
 async def RedisTrigger():
-    r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
+    r = get_redis()
     previous_btc_usd_data = None
 
     while True:
@@ -70,17 +68,14 @@ async def RedisTrigger():
 
 
 async def send_command_to_bot(command: str):
-    r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
-    r.publish("bot_commands", command)
+    get_redis().publish("bot_commands", command)
 
 async def send_command_to_go(command: str):
-    r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
-    r.publish("go_commands", command)
+    get_redis().publish("go_commands", command)
 
 async def listen_for_commands():
     print("Listening for web commands...")
-    r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
-    pubsub = r.pubsub()
+    pubsub = get_redis().pubsub()
     pubsub.subscribe("web_commands")
 
     while True:
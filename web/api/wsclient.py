@@ -1,33 +1,56 @@
+"""
+Bitstamp live-trade websocket client
+
+WebSocketClient keeps the thread interface (start / send / stop / is_alive) used by the
+views, ticker_service and stream_candles, but the thread only hosts an asyncio event loop.
+Inside the loop one task reads the websocket and a publisher task fans the trades out:
+
+- every message is parsed once; on_trade callbacks get the trade right away
+- the latest price of every symbol is coalesced and written to Redis (<symbol>_Price)
+  in one pipelined round trip per publish window, through the pooled async client
+- trades are batched per channel-layer group: one group_send per group and window
+  (live_ticks_batch, forwarded message by message by TicksAsyncConsumer)
+
+Throughput and latency counters are kept in stats / feed_latency / publish_latency and
+logged every STATS_LOG_INTERVAL seconds.
+"""
+import asyncio
+import json
 import logging
+import ssl
 import threading
-import websocket
 import time
-import ssl, json
-try:
-    import thread
-except ImportError:
-    import _thread as thread
-import redis
+from collections import defaultdict
+from functools import lru_cache
+
 import channels.layers
-from asgiref.sync import async_to_sync
+import redis
+import websockets
+from websockets.asyncio.client import connect
+
+from api.redis_client import get_async_redis
+
 logger = logging.getLogger('WebSocketClient')
 logger.setLevel(logging.INFO)
 
-REDIS_HOST = "redis"  # Use your Redis host
-REDIS_PORT = 6379  # Use your Redis port
+BITSTAMP_WS_URL = "wss://ws.bitstamp.net"
+PUBLISH_INTERVAL = 0.05  # seconds - trades arriving within one window share a group_send / Redis round trip
+STATS_LOG_INTERVAL = 60  # seconds
+
+# Subscribed on open unless the client gets its own channels
+TRADING_PAIRS = [
+    "live_trades_btcusd",   # BTC/USD
+    "live_trades_ethusd",   # ETH/USD
+    "live_trades_ltcusd",   # LTC/USD
+    "live_trades_xrpusd",   # XRP/USD
+    "live_trades_bchusd",   # BCH/USD
+    "live_trades_linkusd",  # LINK/USD
+    "live_trades_dogeusd",  # DOGE/USD
+    "live_trades_ethbtc"    # ETH/BTC
+]
 
 wsCli = None
-# try:
-#     thread.start_new_thread(print, ("Thread is imported",))
-# except NameError:
-#     print("Thread is not imported")
-
-# unsubsample = {
-#     "event": "bts:unsubscribe",
-#     "data": {
-#         "channel": "live_trades_ethusd"
-#     }
-# }
+
 
 def eventdata(event_act, cha_name):
     return(
@@ -39,106 +62,228 @@ def eventdata(event_act, cha_name):
         }
     )
 
+
+@lru_cache(maxsize=None)
+def channel_route(channel):
+    """'live_trades_btcusd' -> ('BTC/USD', 'live_trades'): symbol and channel-layer group"""
+    sym = channel[channel.rfind('_') + 1:].upper()
+    return sym[:-3] + '/' + sym[-3:], channel[:channel.find('_', -10)]
+
+
+class LatencyCounter:
+    """Count / average / max of latencies (seconds) since the last reset"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def __str__(self):
+        if not self.count:
+            return "-"
+        return f"avg {self.total / self.count * 1000:.0f}ms max {self.max * 1000:.0f}ms"
+
+
 class WebSocketClient(threading.Thread):
 
-    def __init__(self, url):
+    def __init__(self, url, on_trade=None, channels=None, publish_interval=PUBLISH_INTERVAL):
+        """
+        on_trade: optional callable(symbol, price, amount, timestamp) for every live trade
+                  (e.g. CandleAggregator.submit_trade), called in the client's event loop
+        channels: channels subscribed on open (default: live trades of all trading pairs)
+        publish_interval: seconds trades are collected before one Redis / group_send flush
+        """
         self.url = url
+        self.on_trade = on_trade
+        self.channels = channels
+        self.publish_interval = publish_interval
         threading.Thread.__init__(self)
-        self.setDaemon(True)
+        self.daemon = True
+
+        self.loop = asyncio.new_event_loop()
+        self.task = None
+        self.outgoing = asyncio.Queue()  # subscribe / unsubscribe events from any thread
+        self.pending = asyncio.Event()
+        self.prices = {}  # symbol -> latest price mapping (coalesced)
+        self.ticks = defaultdict(list)  # group -> raw trade messages (batched)
+        self.first_pending = None  # monotonic receive time of the oldest unpublished trade
+
+        self.stats = {'messages': 0, 'trades': 0, 'published': 0, 'group_sends': 0,
+                      'redis_writes': 0, 'errors': 0}
+        self.feed_latency = LatencyCounter()  # exchange trade time -> received
+        self.publish_latency = LatencyCounter()  # received -> Redis / group_send done
 
     def run(self):
-        # Running the run_forever() in a seperate thread.
-        # websocket.enableTrace(True)
-        self.ws = websocket.WebSocketApp(self.url,
-                                         on_message = self.on_message,
-                                         on_error = self.on_error,
-                                         on_close = self.on_close)
-        self.ws.on_open = self.on_open
-        self.ws.run_forever(sslopt={"cert_reqs": ssl.CERT_NONE})
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._run())
+        except Exception as e:
+            logger.error(f"Websocket client error: {e}")
+        finally:
+            self.loop.close()
 
     def stop(self):
-        print('Stopping the websocket...')
-        self.ws.keep_running = False
+        logger.info('Stopping the websocket...')
+        try:
+            self.loop.call_soon_threadsafe(self._cancel)
+        except RuntimeError:
+            pass  # Loop already closed
+
+    def _cancel(self):
+        if self.task is not None:
+            self.task.cancel()
 
     def send(self, data):
-        # Wait till websocket is connected.
-        while not self.ws.sock.connected:
-            time.sleep(0.25)
-        print('Sending: ', data)
-        self.ws.send(json.dumps(data))
-
-    def on_message(self, ws, message):
-        if json.loads(message)['event'] == "trade":
+        """Queue an event (e.g. eventdata('subscribe', channel)) - sent once connected"""
+        self.loop.call_soon_threadsafe(self.outgoing.put_nowait, data)
+
+    async def _run(self):
+        self.task = asyncio.current_task()
+        self.channel_layer = channels.layers.get_channel_layer()
+        self.redis = get_async_redis()
+        ssl_context = ssl.create_default_context()
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE
+
+        try:
+            async with connect(self.url, ssl=ssl_context if self.url.startswith('wss') else None) as ws:
+                logger.info('Opened the connection...')
+                for channel in self.channels or TRADING_PAIRS:
+                    self.outgoing.put_nowait(eventdata("subscribe", channel))
+                tasks = [asyncio.create_task(coro) for coro in
+                         (self._send_loop(ws), self._publish_loop(), self._stats_loop())]
+                try:
+                    async for message in ws:
+                        self.on_message(message)
+                finally:
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.wait_for(self._flush(), timeout=5)  # Trades still queued
+        except asyncio.CancelledError:
+            pass
+        except (websockets.ConnectionClosed, OSError) as e:
+            logger.warning(f"Websocket connection lost: {e}")
+        finally:
+            logger.info('Closed the connection...')
+
+    async def _send_loop(self, ws):
+        while True:
+            data = await self.outgoing.get()
+            await ws.send(json.dumps(data))
+            logger.info(f"Sent: {data}")
+
+    def on_message(self, message):
+        received = time.time()
+        self.stats['messages'] += 1
+        try:
+            message_data = json.loads(message)
+        except ValueError:
+            self.stats['errors'] += 1
+            return
+        if message_data.get('event') != "trade":
+            return
+
+        symbol, group = channel_route(message_data['channel'])
+        data = message_data['data']
+        timestamp = int(data["microtimestamp"]) / 1e6 if data.get("microtimestamp") else float(data["timestamp"])
+        self.stats['trades'] += 1
+        self.feed_latency.add(received - timestamp)
+
+        if self.on_trade is not None:
             try:
-                r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
-                if not r.ping():
-                    r = True    # not connected
-                    print("Connection to Redis failed.")
-                    logger.info(f"Connection to Redis failed.")
-            except redis.ConnectionError as e:
-                r = True        # not connected
-                logger.info(f"Connection error: {e}")
-                print(f"Connection error: {e}")
-            channel_layer = channels.layers.get_channel_layer()
-            grp_name= json.loads(message)['channel']
-            if not (r == True):       # redis connected
-                sym= grp_name[grp_name.rfind('_')+1:].upper()
-                pair = sym[:len(sym)-3]+'/'+sym[len(sym)-3:] + "_Price"
-                data= json.loads(message)['data']
-                r.hmset(pair, {"price": data["price_str"], "timestamp": data["timestamp"], "source":"BitStamp Live"})
-
-            grp_name = grp_name[:grp_name.find('_', -10)]
-            # print(grp_name)
+                self.on_trade(symbol, data["price"], data["amount"], timestamp)
+            except Exception as e:
+                logger.error(f"Trade callback error: {e}")
+
+        # Only the newest price of a window reaches Redis, every trade reaches the group
+        self.prices[symbol] = {"price": data["price_str"], "timestamp": data["timestamp"], "source": "BitStamp Live"}
+        self.ticks[group].append(message)
+        if self.first_pending is None:
+            self.first_pending = time.monotonic()
+        self.pending.set()
+
+    async def _publish_loop(self):
+        while True:
+            await self.pending.wait()
+            await asyncio.sleep(self.publish_interval)  # Collect the rest of the window
+            await self._flush()
+
+    async def _flush(self):
+        prices, ticks, first_pending = self.prices, self.ticks, self.first_pending
+        self.prices, self.ticks, self.first_pending = {}, defaultdict(list), None
+        self.pending.clear()
+        if not prices and not ticks:
+            return
+
+        await asyncio.gather(self._write_prices(prices),
+                             *(self._send_group(group, messages) for group, messages in ticks.items()))
+        if first_pending is not None:
+            self.publish_latency.add(time.monotonic() - first_pending)
+
+    async def _write_prices(self, prices):
+        if not prices:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for symbol, mapping in prices.items():
+                pipe.hset(symbol + "_Price", mapping=mapping)
+            await pipe.execute()
+            self.stats['redis_writes'] += len(prices)
+        except (redis.RedisError, OSError) as e:
+            self.stats['errors'] += 1
+            logger.info(f"Connection error: {e}")
+
+    async def _send_group(self, group, messages):
+        if self.channel_layer is None:
+            return
+        try:
             # sending data to vanilla websocket channel
-            async_to_sync(channel_layer.group_send)(
-                grp_name, {
-                "type": 'live_ticks',
-                "content": message,
+            await self.channel_layer.group_send(group, {
+                "type": 'live_ticks_batch',
+                "messages": messages,
             })
-    #    f.write(message  +  "\n" )
-    #    f.flush()
-
-    def on_open(self, ws):
-        print('Opened the connection...')
-        # Auto-subscribe to all trading pairs
-        trading_pairs = [
-            "live_trades_btcusd",   # BTC/USD
-            "live_trades_ethusd",   # ETH/USD  
-            "live_trades_ltcusd",   # LTC/USD
-            "live_trades_xrpusd",   # XRP/USD
-            "live_trades_bchusd",   # BCH/USD
-            "live_trades_linkusd",  # LINK/USD
-            "live_trades_dogeusd",  # DOGE/USD
-            "live_trades_ethbtc"    # ETH/BTC
-        ]
-        for pair in trading_pairs:
-            subscribe_msg = eventdata("subscribe", pair)
-            ws.send(json.dumps(subscribe_msg))
-            print(f'Subscribed to: {pair}')
-
-    def on_close(self, ws):
-        print('Closed the connection...')
-
-    def on_error(self, ws, error):
-        print('Websocket received error...')
-        print(error)
-
-
-#f = open("webSocketTester.log", "a")
+            self.stats['group_sends'] += 1
+            self.stats['published'] += len(messages)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.warning(f"group_send to {group} failed: {e}")
+
+    async def _stats_loop(self):
+        last = dict(self.stats)
+        while True:
+            await asyncio.sleep(STATS_LOG_INTERVAL)
+            delta = {key: value - last[key] for key, value in self.stats.items()}
+            last = dict(self.stats)
+            logger.info(
+                f"📈 {delta['trades'] / STATS_LOG_INTERVAL:.1f} trades/s, {delta['group_sends']} group_send, "
+                f"{delta['redis_writes']} Redis writes, {delta['errors']} errors | "
+                f"feed latency {self.feed_latency}, publish latency {self.publish_latency}"
+            )
+            self.feed_latency.reset()
+            self.publish_latency.reset()
+
 
 # ws_client handles the market websocket client
-def ws_client(action, chaname = None):
+def ws_client(action, chaname = None, channels = None):
+    """channels: channels subscribed on 'start' (default TRADING_PAIRS)"""
     global wsCli
     if action == 'start':
         if wsCli is None or not wsCli.is_alive():
-            wsCli = WebSocketClient("wss://ws.bitstamp.net")
+            wsCli = WebSocketClient(BITSTAMP_WS_URL, channels=channels)
             wsCli.start()
             logger.info("WebSocketClient started.")
         else:
             logger.info("WebSocketClient is already running.")
     elif chaname != None and wsCli and wsCli.is_alive():
         wsCli.send(eventdata(action, chaname))      ## ws client using full bitstamp channel name now
-        # wsCli.send(eventdata(action,"live_trades_"+chaname))
     elif action == 'stop' and wsCli:
         wsCli.stop()
         wsCli = None
@@ -146,13 +291,9 @@ def ws_client(action, chaname = None):
 
 
 if __name__ == "__main__":
-    wsCli = WebSocketClient("wss://ws.bitstamp.net")
-    # wsCli.daemon = True
+    wsCli = WebSocketClient(BITSTAMP_WS_URL, channels=["live_trades_btcusd"])
     wsCli.start()
-    wsCli.send(eventdata("subscribe","live_trades_btcusd"))
-    # wsCli.send(eventdata("subscribe", "order_book_ethbtc"))
     time.sleep(15)
     wsCli.stop()
-    time.sleep(3)
-    #wsCli.join()
-    print('After closing client...')
\ No newline at end of file
+    wsCli.join()
+    print('After closing client...', wsCli.stats)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmark the qt_ohlc lookup indexes on a synthetic table
+Usage: python scripts/benchmark_ohlc_indexes.py [--rows=4000000] [--symbols=20] [--repeat=50] [--keep]
+  --rows     number of synthetic candles (default 4,000,000)
+  --symbols  number of synthetic symbols, each with 1H/4H/1D/1W series (default 20)
+  --repeat   executions per query for the latency figures (default 50)
+  --keep     keep the bench_qt_ohlc table afterwards
+
+Builds bench_qt_ohlc with the same columns as qt_ohlc, runs the queries the views and
+the pipeline issue (EXPLAIN ANALYZE + median latency) without indexes, then creates the
+indexes declared on OhlcPrice (unique key + Meta.indexes, see migrations 0015/0016)
+and runs them again.
+"""
+import os
+import sys
+import random
+import statistics
+import time
+import django
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'seraphim.settings')
+django.setup()
+
+from django.db import connection
+
+from api.models import OhlcPrice
+
+BENCH_TABLE = 'bench_qt_ohlc'
+INTERVALS = [3600, 14400, 86400, 604800]
+END_UNIX = 1760000000
+
+# (name, sql) - %(symbol)s / %(interval)s / %(day)s are filled in per execution
+QUERIES = [
+    ('latest 100 bars (MarketDataView, Ohlc)',
+     f"SELECT * FROM {BENCH_TABLE} WHERE symbol = %(symbol)s AND interval = %(interval)s "
+     f"ORDER BY date DESC LIMIT 100"),
+    ('latest bar of a symbol (DashboardView)',
+     f"SELECT * FROM {BENCH_TABLE} WHERE symbol = %(symbol)s ORDER BY date DESC LIMIT 1"),
+    ('previous bar (TradingListView)',
+     f"SELECT * FROM {BENCH_TABLE} WHERE symbol = %(symbol)s AND interval = %(interval)s "
+     f"ORDER BY date DESC LIMIT 1 OFFSET 1"),
+    ('last 400 prices (pipeline stages)',
+     f"SELECT date, open, high, low, close, volume FROM {BENCH_TABLE} "
+     f"WHERE symbol = %(symbol)s AND interval = %(interval)s ORDER BY date DESC LIMIT 400"),
+    ('one day of bars (Ohlc by date)',
+     f"SELECT * FROM {BENCH_TABLE} WHERE symbol = %(symbol)s AND interval = %(interval)s "
+     f"AND date >= to_timestamp(%(day)s) AND date < to_timestamp(%(day)s + 86400) ORDER BY date DESC"),
+]
+
+
+def parse_option(name, default):
+    for arg in sys.argv[1:]:
+        if arg.startswith(f'--{name}='):
+            return int(arg.split('=', 1)[1])
+    return default
+
+
+def create_bench_table(cursor, rows, symbols):
+    """Synthetic candles: `symbols` symbols x 4 intervals, newest bar at END_UNIX"""
+    bars = max(rows // (symbols * len(INTERVALS)), 1)
+    print(f"🏗️  Creating {BENCH_TABLE}: {symbols} symbols x {len(INTERVALS)} intervals x {bars:,} bars...")
+
+    started = time.perf_counter()
+    cursor.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+    cursor.execute(f"""
+        CREATE UNLOGGED TABLE {BENCH_TABLE} AS
+        SELECT row_number() OVER ()::bigint AS id,
+               t.unix, to_timestamp(t.unix) AS date, s.symbol,
+               p.price::numeric(18, 8) AS open, (p.price * 1.01)::numeric(18, 8) AS high,
+               (p.price * 0.99)::numeric(18, 8) AS low, (p.price * 1.001)::numeric(18, 8) AS close,
+               (random() * 1000)::numeric(20, 8) AS volume, 0::numeric(18, 8) AS volume_base,
+               2 AS market_id, i.interval
+        FROM (SELECT format('S%%s/USD', lpad(n::text, 3, '0'))::varchar(10) AS symbol
+              FROM generate_series(1, %s) AS n) AS s
+        CROSS JOIN unnest(%s::int[]) AS i(interval)
+        CROSS JOIN LATERAL (SELECT %s - k::bigint * i.interval AS unix
+                            FROM generate_series(0, %s - 1) AS k) AS t
+        CROSS JOIN LATERAL (SELECT 100 + random() * 50000 AS price) AS p
+        ORDER BY t.unix, s.symbol, i.interval
+    """, [symbols, INTERVALS, END_UNIX, bars])
+    cursor.execute(f"ALTER TABLE {BENCH_TABLE} ADD PRIMARY KEY (id)")
+    cursor.execute(f"VACUUM ANALYZE {BENCH_TABLE}")
+
+    cursor.execute(f"SELECT count(*), pg_size_pretty(pg_total_relation_size('{BENCH_TABLE}')) FROM {BENCH_TABLE}")
+    count, size = cursor.fetchone()
+    print(f"  ✅ {count:,} rows ({size}) in {time.perf_counter() - started:.1f}s")
+
+
+def index_statements():
+    """CREATE INDEX statements for the indexes declared on OhlcPrice, against the bench table"""
+    statements = []
+    for fields in OhlcPrice._meta.unique_together:
+        statements.append(f"CREATE UNIQUE INDEX ON {BENCH_TABLE} ({', '.join(fields)})")
+    for index in OhlcPrice._meta.indexes:
+        columns = ', '.join(f"{field.lstrip('-')}{' DESC' if field.startswith('-') else ''}" for field in index.fields)
+        include = f" INCLUDE ({', '.join(index.include)})" if index.include else ''
+        statements.append(f"CREATE INDEX ON {BENCH_TABLE} ({columns}){include}")
+    return statements
+
+
+def random_params(symbols):
+    interval = random.choice(INTERVALS)
+    return {
+        'symbol': f"S{random.randint(1, symbols):03d}/USD",
+        'interval': interval,
+        'day': END_UNIX - random.randint(1, 300) * 86400,
+    }
+
+
+def run_queries(cursor, symbols, repeat, label):
+    """EXPLAIN ANALYZE + median latency of every query; returns {name: median ms}"""
+    print(f"\n{'='*80}")
+    print(f"📊 {label}")
+    print(f"{'='*80}")
+
+    latencies = {}
+    for name, sql in QUERIES:
+        cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", random_params(symbols))
+        plan = [line for (line,) in cursor.fetchall()]
+
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            cursor.execute(sql, random_params(symbols))
+            cursor.fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        latencies[name] = statistics.median(timings)
+
+        print(f"\n▶ {name}: median {latencies[name]:.2f} ms over {repeat} runs")
+        for line in plan:
+            print(f"    {line}")
+    return latencies
+
+
+def main():
+    rows = parse_option('rows', 4_000_000)
+    symbols = parse_option('symbols', 20)
+    repeat = parse_option('repeat', 50)
+
+    print("⏱️  qt_ohlc Index Benchmark")
+    print("="*80)
+
+    with connection.cursor() as cursor:
+        create_bench_table(cursor, rows, symbols)
+
+        before = run_queries(cursor, symbols, repeat, "Without indexes (primary key only)")
+
+        print("\n🔧 Creating indexes...")
+        for statement in index_statements():
+            started = time.perf_counter()
+            cursor.execute(statement)
+            print(f"  ✅ {statement} ({time.perf_counter() - started:.1f}s)")
+        cursor.execute(f"VACUUM ANALYZE {BENCH_TABLE}")  # visibility map for index-only scans
+
+        after = run_queries(cursor, symbols, repeat, "With the OhlcPrice indexes")
+
+        print(f"\n{'='*80}")
+        print("📈 Summary (median latency)")
+        print(f"{'='*80}")
+        for name, _ in QUERIES:
+            speedup = before[name] / after[name] if after[name] else float('inf')
+            print(f"  {name:<42} {before[name]:>10.2f} ms -> {after[name]:>8.2f} ms  ({speedup:,.0f}x)")
+
+        if '--keep' not in sys.argv:
+            cursor.execute(f"DROP TABLE {BENCH_TABLE}")
+            print(f"\n🧹 Dropped {BENCH_TABLE}")
+
+
+if __name__ == '__main__':
+    main()
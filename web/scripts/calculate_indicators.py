@@ -1,247 +1,25 @@
 #!/usr/bin/env python3
 """
 Calculate technical indicators from OHLC data
+Usage: python scripts/calculate_indicators.py [--full]
+  --full  ignore the stored incremental state and recalculate from the whole history
+
+Thin CLI wrapper - the stage itself lives in api.pipeline.indicators and is
+also run in-process by the Celery tasks in api/tasks.py.
 """
 import os
 import sys
 import django
-import pandas as pd
-import numpy as np
-from datetime import datetime, timezone
 
 # Add project root to Python path
-sys.path.append('/app')
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
 
 # Setup Django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'seraphim.settings')
 django.setup()
 
-from api.models import OhlcPrice, Indicator
-
-def calculate_sma(data, window):
-    """Simple Moving Average"""
-    return data.rolling(window=window).mean()
-
-def calculate_ema(data, window):
-    """Exponential Moving Average"""
-    return data.ewm(span=window).mean()
-
-def calculate_rsi(data, window=14):
-    """Relative Strength Index"""
-    delta = data.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-def calculate_macd(data, fast=12, slow=26, signal=9):
-    """MACD (Moving Average Convergence Divergence)"""
-    ema_fast = calculate_ema(data, fast)
-    ema_slow = calculate_ema(data, slow)
-    macd_line = ema_fast - ema_slow
-    signal_line = calculate_ema(macd_line, signal)
-    histogram = macd_line - signal_line
-    return macd_line, signal_line, histogram
-
-def calculate_adx(high, low, close, window=14):
-    """
-    Average Directional Index (ADX) - measures trend strength
-    Returns: ADX values (0-100, typically >25 indicates strong trend)
-    """
-    # Calculate +DM and -DM
-    high_diff = high.diff()
-    low_diff = -low.diff()
-    
-    plus_dm = high_diff.copy()
-    minus_dm = low_diff.copy()
-    
-    # Set conditions for +DM and -DM
-    plus_dm[plus_dm < 0] = 0
-    plus_dm[(high_diff < low_diff)] = 0
-    
-    minus_dm[minus_dm < 0] = 0
-    minus_dm[(low_diff < high_diff)] = 0
-    
-    # Calculate True Range (TR)
-    tr1 = high - low
-    tr2 = abs(high - close.shift(1))
-    tr3 = abs(low - close.shift(1))
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    
-    # Smooth the TR, +DM, -DM using Wilder's smoothing (similar to EMA)
-    atr = tr.ewm(alpha=1/window, adjust=False).mean()
-    plus_di = 100 * (plus_dm.ewm(alpha=1/window, adjust=False).mean() / atr)
-    minus_di = 100 * (minus_dm.ewm(alpha=1/window, adjust=False).mean() / atr)
-    
-    # Calculate DX
-    dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
-    
-    # Calculate ADX (smoothed DX)
-    adx = dx.ewm(alpha=1/window, adjust=False).mean()
-    
-    return adx
-
-def calculate_indicators_for_symbol(symbol, interval=86400, limit=100):
-    """Calculate indicators for a specific symbol and interval"""
-    
-    interval_name = {3600: '1H', 14400: '4H', 86400: '1D', 604800: '1W'}.get(interval, f'{interval}s')
-    print(f"📊 Calculating indicators for {symbol} @ {interval_name}...")
-    
-    # Get counter_decimals for proper precision
-    from api.models import SymbolInfo
-    try:
-        symbol_info = SymbolInfo.objects.get(name=symbol)
-        # Use counter_decimals for price-based indicators, minimum 4 for better precision
-        price_decimals = max(symbol_info.counter_decimals, 4)
-        print(f"  💎 Using {price_decimals} decimal places (counter_decimals={symbol_info.counter_decimals})")
-    except SymbolInfo.DoesNotExist:
-        price_decimals = 8  # Default to high precision if symbol not found
-        print(f"  ⚠️  Symbol not found in SymbolInfo, using default {price_decimals} decimals")
-    
-    # Get OHLC data for specific interval
-    ohlc_data = OhlcPrice.objects.filter(
-        symbol=symbol,
-        interval=interval
-    ).order_by('date').values('date', 'open', 'high', 'low', 'close', 'volume')
-    
-    if not ohlc_data:
-        print(f"  ❌ No OHLC data found for {symbol}")
-        return
-    
-    # Convert to DataFrame
-    df = pd.DataFrame(list(ohlc_data))
-    df['close'] = df['close'].astype(float)
-    df['high'] = df['high'].astype(float)
-    df['low'] = df['low'].astype(float)
-    df['open'] = df['open'].astype(float)
-    
-    if len(df) < 50:
-        print(f"  ⚠️  Insufficient data for {symbol} (only {len(df)} records)")
-        return
-    
-    print(f"  ✅ Processing {len(df)} OHLC records")
-    
-    # Calculate indicators
-    df['sma_20'] = calculate_sma(df['close'], 20)
-    df['ema_12'] = calculate_ema(df['close'], 12)
-    df['ema_26'] = calculate_ema(df['close'], 26)
-    df['rsi'] = calculate_rsi(df['close'], 14)
-    
-    macd, signal, histogram = calculate_macd(df['close'])
-    df['macd'] = macd
-    df['macd_signal'] = signal
-    df['macd_histogram'] = histogram
-    
-    # Calculate ADX for trend strength
-    df['adx'] = calculate_adx(df['high'], df['low'], df['close'], window=14)
-    
-    # Remove rows with NaN values (insufficient data for calculation)
-    df = df.dropna()
-    
-    print(f"  📈 Generated {len(df)} indicator records")
-    
-    # Clear existing indicators for this symbol and interval
-    Indicator.objects.filter(symbol=symbol, interval=interval).delete()
-    
-    # Save indicators to database (limit to recent data to avoid too much data)
-    indicators_to_create = []
-    recent_df = df.tail(limit)  # Only keep recent data
-    
-    for _, row in recent_df.iterrows():
-        timestamp = row['date']
-        # Handle different timestamp types
-        if isinstance(timestamp, (int, float)):
-            unix_timestamp = int(timestamp)
-        elif hasattr(timestamp, 'timestamp'):
-            unix_timestamp = int(timestamp.timestamp())
-        elif hasattr(timestamp, 'to_pydatetime'):
-            unix_timestamp = int(timestamp.to_pydatetime().timestamp())
-        else:
-            # Fallback: try to convert to datetime then to timestamp
-            dt = pd.to_datetime(timestamp)
-            unix_timestamp = int(dt.timestamp())
-        
-        # Convert timestamp to datetime for UnixDateTimeField
-        unix_dt = datetime.fromtimestamp(unix_timestamp, tz=timezone.utc)
-        
-        indicator = Indicator(
-            symbol=symbol,
-            unix=unix_dt,  # UnixDateTimeField expects datetime object
-            timestamp=row['date'],
-            interval=interval,
-            ma_20=round(float(row['sma_20']), price_decimals) if not pd.isna(row['sma_20']) else None,
-            ema=round(float(row['ema_12']), price_decimals) if not pd.isna(row['ema_12']) else None,
-            upper_ema=round(float(row['ema_26']), price_decimals) if not pd.isna(row['ema_26']) else None,
-            macd=round(float(row['macd']), price_decimals + 2) if not pd.isna(row['macd']) else None,  # MACD needs more precision
-            rsi=round(float(row['rsi']), 2) if not pd.isna(row['rsi']) else None,  # RSI is always 0-100, 2 decimals is fine
-            adx=round(float(row['adx']), 2) if not pd.isna(row['adx']) else None,  # ADX is 0-100, 2 decimals is fine
-        )
-        indicators_to_create.append(indicator)
-    
-    # Bulk create
-    if indicators_to_create:
-        Indicator.objects.bulk_create(indicators_to_create, batch_size=1000)
-        print(f"  💾 Saved {len(indicators_to_create)} indicators to database")
-    else:
-        print(f"  ⚠️  No valid indicators to save")
-
-def main():
-    """Main function to calculate indicators for all symbols and intervals with OHLC data"""
-    print("🧮 Technical Indicators Calculator")
-    print("="*50)
-    
-    # Get all unique symbol/interval combinations
-    combinations = OhlcPrice.objects.values('symbol', 'interval').distinct()
-    
-    print(f"Found {len(combinations)} symbol/interval combinations:")
-    for combo in combinations:
-        interval_name = {3600: '1H', 14400: '4H', 86400: '1D', 604800: '1W'}.get(combo['interval'], f"{combo['interval']}s")
-        print(f"  - {combo['symbol']} @ {interval_name}")
-    
-    print("\n" + "="*50)
-    
-    # Calculate indicators for each symbol/interval combination
-    success_count = 0
-    error_count = 0
-    
-    for combo in combinations:
-        try:
-            calculate_indicators_for_symbol(
-                symbol=combo['symbol'], 
-                interval=combo['interval'],
-                limit=100
-            )
-            success_count += 1
-        except Exception as e:
-            error_count += 1
-            interval_name = {3600: '1H', 14400: '4H', 86400: '1D', 604800: '1W'}.get(combo['interval'], f"{combo['interval']}s")
-            print(f"  ❌ Error for {combo['symbol']} @ {interval_name}: {e}")
-            import traceback
-            traceback.print_exc()
-    
-    print("\n" + "="*50)
-    print("📊 Summary:")
-    print(f"✅ Successful: {success_count}")
-    print(f"❌ Failed: {error_count}")
-    
-    # Show final statistics
-    total_indicators = Indicator.objects.count()
-    
-    print(f"\nTotal indicators in database: {total_indicators}")
-    
-    # Show statistics by symbol
-    print("\n📈 Indicators by symbol:")
-    symbols = Indicator.objects.values_list('symbol', flat=True).distinct()
-    for symbol in symbols:
-        for interval in [3600, 14400, 86400, 604800]:
-            count = Indicator.objects.filter(symbol=symbol, interval=interval).count()
-            if count > 0:
-                interval_name = {3600: '1H', 14400: '4H', 86400: '1D', 604800: '1W'}[interval]
-                latest = Indicator.objects.filter(symbol=symbol, interval=interval).order_by('-timestamp').first()
-                print(f"  {symbol} @ {interval_name}: {count} records (Latest RSI={latest.rsi})")
-    
-    print("\n✅ Indicator calculation complete!")
+from api.pipeline.indicators import main
 
 if __name__ == '__main__':
-    main()
+    main(full='--full' in sys.argv)
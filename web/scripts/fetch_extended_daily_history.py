@@ -7,7 +7,6 @@ import os
 import sys
 import django
 from datetime import datetime, timezone
-from decimal import Decimal
 import time
 
 sys.path.append('/app')
@@ -15,6 +14,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'seraphim.settings')
 django.setup()
 
 from api.models import OhlcPrice
+from api.ohlc_writer import kraken_ohlc_rows, upsert_ohlc
 from api.providers.kraken_provider import KrakenDataProvider
 
 def fetch_daily_history_from_date(provider, kraken_symbol, display_name, start_date_str):
@@ -80,42 +80,14 @@ def fetch_daily_history_from_date(provider, kraken_symbol, display_name, start_d
                 print(f"  ⚠️  Batch {batch_count}: Empty data")
                 break
             
-            # Prepare records
-            new_records = []
-            last_timestamp = None
+            # Insert new bars and refresh existing ones in one statement
+            last_timestamp = int(ohlc_data[-1][0])
+            inserted, _ = upsert_ohlc(kraken_ohlc_rows(ohlc_data, display_name, interval_seconds))
             
-            for candle in ohlc_data:
-                timestamp = int(candle[0])
-                date = datetime.fromtimestamp(timestamp, tz=timezone.utc)
-                last_timestamp = timestamp
-                
-                # Check if exists
-                exists = OhlcPrice.objects.filter(
-                    symbol=display_name,
-                    interval=interval_seconds,
-                    unix=date
-                ).exists()
-                
-                if not exists:
-                    new_records.append(OhlcPrice(
-                        unix=date,
-                        date=date,
-                        symbol=display_name,
-                        interval=interval_seconds,
-                        open=Decimal(str(candle[1])),
-                        high=Decimal(str(candle[2])),
-                        low=Decimal(str(candle[3])),
-                        close=Decimal(str(candle[4])),
-                        volume=Decimal(str(candle[6])),
-                        market_id=2  # Kraken
-                    ))
-            
-            # Save new records
-            if new_records:
-                OhlcPrice.objects.bulk_create(new_records, ignore_conflicts=True)
-                total_saved += len(new_records)
+            if inserted:
+                total_saved += inserted
                 date_str = datetime.fromtimestamp(last_timestamp, tz=timezone.utc).strftime('%Y-%m-%d')
-                print(f"  Batch {batch_count}: +{len(new_records)} records (up to {date_str})")
+                print(f"  Batch {batch_count}: +{inserted} records (up to {date_str})")
             else:
                 print(f"  Batch {batch_count}: No new records (all exist)")
             
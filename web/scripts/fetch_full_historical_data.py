@@ -3,6 +3,10 @@
 Fetch comprehensive historical OHLC data from Kraken
 This script downloads as much historical data as available without deleting existing data.
 
+All 9 pairs x 4 intervals are fetched concurrently by a resumable backfill job
+(api.backfill): one keep-alive connection pool, requests paced by the rate limit
+bucket, every page checkpointed - run it again after a failure to continue.
+
 Recommended data ranges:
 - BTC/USD, ETH/USD: From earliest available (2013/2015+) for 10+ years of data
 - Other major pairs: From 2020 or when trading started
@@ -10,8 +14,6 @@ Recommended data ranges:
 import os
 import sys
 import django
-from datetime import datetime, timezone
-from decimal import Decimal
 
 # Add project root to Python path
 sys.path.append('/app')
@@ -20,8 +22,8 @@ sys.path.append('/app')
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'seraphim.settings')
 django.setup()
 
-from api.models import OhlcPrice, SymbolInfo
-from api.providers.kraken_provider import KrakenDataProvider
+from api.backfill import BackfillJob
+from api.models import OhlcPrice
 
 # Kraken interval mapping (in minutes)
 INTERVALS = {
@@ -51,168 +53,34 @@ KRAKEN_PAIRS = {
     'ETH/BTC': 'XETHXXBT',
 }
 
-def fetch_historical_data_batch(provider, symbol, display_name, interval_name, since_timestamp=None):
-    """
-    Fetch a batch of historical OHLC data starting from since_timestamp
-    
-    Args:
-        provider: KrakenDataProvider instance
-        symbol: Kraken pair symbol
-        display_name: Display name (e.g., 'BTC/USD')
-        interval_name: Interval name (e.g., '1D')
-        since_timestamp: Unix timestamp to start from (None = earliest available)
-    
-    Returns:
-        (num_records_saved, last_timestamp)
-    """
-    interval_minutes = INTERVALS[interval_name]
-    interval_seconds = INTERVAL_SECONDS[interval_name]
-    
-    try:
-        # Fetch data from Kraken with 'since' parameter
-        result = provider.get_ohlc_data(symbol, interval=interval_minutes, since=since_timestamp)
-        
-        if not result or symbol not in result:
-            return 0, None
-        
-        ohlc_data = result[symbol]
-        
-        if not ohlc_data:
-            return 0, None
-        
-        # Prepare bulk insert (only insert records that don't exist)
-        ohlc_records = []
-        last_timestamp = None
-        
-        for candle in ohlc_data:
-            timestamp = int(candle[0])
-            date = datetime.fromtimestamp(timestamp, tz=timezone.utc)
-            last_timestamp = timestamp
-            
-            # Check if this record already exists
-            exists = OhlcPrice.objects.filter(
-                symbol=display_name,
-                interval=interval_seconds,
-                unix=date
-            ).exists()
-            
-            if not exists:
-                ohlc_records.append(OhlcPrice(
-                    unix=date,
-                    date=date,
-                    symbol=display_name,
-                    interval=interval_seconds,
-                    open=Decimal(str(candle[1])),
-                    high=Decimal(str(candle[2])),
-                    low=Decimal(str(candle[3])),
-                    close=Decimal(str(candle[4])),
-                    volume=Decimal(str(candle[6])),
-                    market_id=2  # Kraken
-                ))
-        
-        # Bulk insert
-        if ohlc_records:
-            OhlcPrice.objects.bulk_create(ohlc_records, ignore_conflicts=True)
-        
-        return len(ohlc_records), last_timestamp
-        
-    except Exception as e:
-        print(f"  ❌ Error: {e}")
-        return 0, None
-
-def fetch_full_history_for_symbol(provider, symbol, display_name, interval_name, target_years=None):
-    """
-    Fetch complete historical data for a symbol by making multiple batched requests
-    
-    Args:
-        provider: KrakenDataProvider instance
-        symbol: Kraken pair symbol
-        display_name: Display name
-        interval_name: Interval name
-        target_years: Target number of years to fetch (None = all available)
-    """
-    print(f"\n{'='*80}")
-    print(f"📊 Fetching full history: {display_name} @ {interval_name}")
-    if target_years:
-        print(f"   Target: {target_years} years of data")
-    print(f"{'='*80}")
-    
+def print_existing_data(display_name, interval_name):
+    """Show the stored data of a pair before fetching"""
     interval_seconds = INTERVAL_SECONDS[interval_name]
     
     # Check existing data
-    existing_count = OhlcPrice.objects.filter(
-        symbol=display_name,
-        interval=interval_seconds
-    ).count()
-    
-    existing_earliest = OhlcPrice.objects.filter(
-        symbol=display_name,
-        interval=interval_seconds
-    ).order_by('date').first()
-    
-    existing_latest = OhlcPrice.objects.filter(
-        symbol=display_name,
-        interval=interval_seconds
-    ).order_by('-date').first()
+    existing = OhlcPrice.objects.filter(symbol=display_name, interval=interval_seconds)
+    existing_count = existing.count()
     
     if existing_count > 0:
-        print(f"📚 Existing data: {existing_count} records")
-        print(f"   From: {existing_earliest.date.strftime('%Y-%m-%d')}")
-        print(f"   To:   {existing_latest.date.strftime('%Y-%m-%d')}")
+        existing_earliest = existing.order_by('date').first()
+        existing_latest = existing.order_by('-date').first()
+        print(f"📚 {display_name} @ {interval_name}: {existing_count} records "
+              f"({existing_earliest.date.strftime('%Y-%m-%d')} to {existing_latest.date.strftime('%Y-%m-%d')})")
     else:
-        print(f"📚 No existing data")
-    
-    # Start fetching from earliest available (or from where we left off)
-    since_timestamp = None
-    total_saved = 0
-    batch_count = 0
-    max_batches = 50  # Prevent infinite loops
-    
-    print(f"\n🔄 Starting data fetch...")
-    
-    while batch_count < max_batches:
-        batch_count += 1
-        
-        saved, last_timestamp = fetch_historical_data_batch(
-            provider, symbol, display_name, interval_name, since_timestamp
-        )
-        
-        total_saved += saved
-        
-        if saved > 0:
-            # Show progress
-            date_str = datetime.fromtimestamp(last_timestamp, tz=timezone.utc).strftime('%Y-%m-%d')
-            print(f"  Batch {batch_count}: +{saved} records (up to {date_str})")
-        
-        # If we got less than 720 records (typical Kraken limit), we've reached the end
-        if last_timestamp is None or saved < 500:
-            break
-        
-        # Continue from the last timestamp
-        since_timestamp = last_timestamp
-        
-        # Small delay to respect API rate limits
-        import time
-        time.sleep(0.5)
+        print(f"📚 {display_name} @ {interval_name}: no existing data")
+
+def print_history_stats(display_name, interval_name, total_saved):
+    """Show the stored data of a pair after fetching"""
+    interval_seconds = INTERVAL_SECONDS[interval_name]
     
     # Final statistics
-    final_count = OhlcPrice.objects.filter(
-        symbol=display_name,
-        interval=interval_seconds
-    ).count()
-    
-    final_earliest = OhlcPrice.objects.filter(
-        symbol=display_name,
-        interval=interval_seconds
-    ).order_by('date').first()
+    final = OhlcPrice.objects.filter(symbol=display_name, interval=interval_seconds)
+    final_count = final.count()
+    final_earliest = final.order_by('date').first()
+    final_latest = final.order_by('-date').first()
     
-    final_latest = OhlcPrice.objects.filter(
-        symbol=display_name,
-        interval=interval_seconds
-    ).order_by('-date').first()
-    
-    print(f"\n✅ Fetch complete:")
-    print(f"   New records saved: {total_saved}")
+    print(f"\n✅ {display_name} @ {interval_name}:")
+    print(f"   Records written by the backfill: {total_saved}")
     print(f"   Total records now: {final_count}")
     if final_earliest and final_latest:
         days_span = (final_latest.date - final_earliest.date).days
@@ -226,85 +94,35 @@ def main():
     print("🏦 Kraken Historical Data Downloader")
     print("="*80)
     
-    provider = KrakenDataProvider()
-    
-    # Priority 1: Core pairs with maximum history
-    print("\n" + "="*80)
-    print("📈 PRIORITY 1: Core Trading Pairs (Maximum History)")
-    print("="*80)
-    
-    core_pairs = {
-        'BTC/USD': ['1D', '1W', '4H', '1H'],  # All timeframes
-        'ETH/USD': ['1D', '1W', '4H', '1H'],  # All timeframes
-    }
+    # All pairs x all timeframes
+    jobs = [(display_name, interval_name) for display_name in KRAKEN_PAIRS for interval_name in INTERVALS]
     
-    for display_name, intervals in core_pairs.items():
-        kraken_symbol = KRAKEN_PAIRS[display_name]
-        for interval in intervals:
-            fetch_full_history_for_symbol(
-                provider, kraken_symbol, display_name, interval
-            )
+    for display_name, interval_name in jobs:
+        print_existing_data(display_name, interval_name)
     
-    # Priority 2: Major altcoins - daily and weekly data
     print("\n" + "="*80)
-    print("📊 PRIORITY 2: Major Altcoins (Multi-year History)")
+    print(f"🔄 Fetching {len(jobs)} pairs concurrently...")
     print("="*80)
     
-    major_altcoins = {
-        'SOL/USD': ['1D', '1W'],
-        'DOGE/USD': ['1D', '1W'],
-        'LTC/USD': ['1D', '1W'],
-        'XRP/USD': ['1D', '1W'],
-        'LINK/USD': ['1D', '1W'],
-        'BCH/USD': ['1D', '1W'],
-    }
+    job = BackfillJob([(display_name, INTERVAL_SECONDS[interval_name]) for display_name, interval_name in jobs])
+    checkpoints = job.run()
     
-    for display_name, intervals in major_altcoins.items():
-        kraken_symbol = KRAKEN_PAIRS[display_name]
-        for interval in intervals:
-            fetch_full_history_for_symbol(
-                provider, kraken_symbol, display_name, interval
-            )
-    
-    # Priority 3: Additional pairs and shorter timeframes
-    print("\n" + "="*80)
-    print("📉 PRIORITY 3: Additional Timeframes")
-    print("="*80)
-    
-    additional = {
-        'ETH/BTC': ['1D', '1W'],
-        'SOL/USD': ['4H'],
-        'DOGE/USD': ['4H'],
-    }
-    
-    for display_name, intervals in additional.items():
-        kraken_symbol = KRAKEN_PAIRS[display_name]
-        for interval in intervals:
-            fetch_full_history_for_symbol(
-                provider, kraken_symbol, display_name, interval
-            )
+    for (display_name, interval_name), checkpoint in zip(jobs, checkpoints):
+        print_history_stats(display_name, interval_name, checkpoint.rows)
     
     # Final summary
     print("\n" + "="*80)
     print("📊 FINAL SUMMARY")
     print("="*80)
     
-    for display_name in ['BTC/USD', 'ETH/USD', 'SOL/USD', 'DOGE/USD']:
+    for display_name in KRAKEN_PAIRS:
         print(f"\n{display_name}:")
         for interval_name, interval_seconds in INTERVAL_SECONDS.items():
-            count = OhlcPrice.objects.filter(
-                symbol=display_name,
-                interval=interval_seconds
-            ).count()
+            records = OhlcPrice.objects.filter(symbol=display_name, interval=interval_seconds)
+            count = records.count()
             if count > 0:
-                earliest = OhlcPrice.objects.filter(
-                    symbol=display_name,
-                    interval=interval_seconds
-                ).order_by('date').first()
-                latest = OhlcPrice.objects.filter(
-                    symbol=display_name,
-                    interval=interval_seconds
-                ).order_by('-date').first()
+                earliest = records.order_by('date').first()
+                latest = records.order_by('-date').first()
                 years = (latest.date - earliest.date).days / 365.25
                 print(f"  {interval_name}: {count:,} records ({earliest.date.strftime('%Y-%m-%d')} to {latest.date.strftime('%Y-%m-%d')}, {years:.1f} years)")
     
@@ -314,4 +132,3 @@ def main():
 
 if __name__ == '__main__':
     main()
-
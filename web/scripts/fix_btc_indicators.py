@@ -17,6 +17,7 @@ sys.path.append('/app')
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'seraphim.settings')
 django.setup()
 
+from api.latest_state import refresh_latest_state
 from api.models import OhlcPrice, Indicator
 
 def calculate_rsi(data, window=14):
@@ -117,6 +118,7 @@ def fix_btc_indicators():
             print(f"❌ Error creating indicator for {index}: {e}")
             continue
     
+    refresh_latest_state('indicator', [('BTC/USD', 86400)])
     print(f"✅ Created {created_count} indicators for BTC/USD")
 
 if __name__ == '__main__':
@@ -9,7 +9,6 @@
 import os
 import sys
 import django
-from decimal import Decimal
 import pandas as pd
 from datetime import datetime, timezone, timedelta
 
@@ -21,7 +20,9 @@ sys.path.append(project_root)
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'seraphim.settings')
 django.setup()
 
+from api.latest_state import refresh_latest_state
 from api.models import OhlcPrice, Indicator
+from api.ohlc_resampler import resample_ohlc
 
 def calculate_ema(prices, period):
     """计算指数移动平均线 (EMA)"""
@@ -32,66 +33,21 @@ def calculate_ema(prices, period):
     ema = series.ewm(span=period, adjust=False).mean()
     return ema.tolist()
 
-def aggregate_ohlc_data(source_interval, target_interval, limit=1000):
+def aggregate_ohlc_data(source_interval, target_interval, symbols=('BTC/USD',)):
     """
-    从小时间周期聚合为大时间周期
+    从小时间周期聚合为大时间周期 (一条 GROUP BY SQL, 见 api/ohlc_resampler.py)
     source_interval: 源时间周期(秒)
-    target_interval: 目标时间周期(秒)  
+    target_interval: 目标时间周期(秒)
     """
     print(f"🔄 从 {source_interval}s 聚合到 {target_interval}s...")
-    
-    # 获取源数据
-    source_data = OhlcPrice.objects.filter(
-        symbol='BTC/USD',
-        interval=source_interval
-    ).order_by('date')[:limit * (target_interval // source_interval)]
-    
-    if not source_data:
+
+    # 跳过不完整的组
+    inserted, updated = resample_ohlc(symbols, target_interval, source_interval, complete_only=True)
+    if not inserted and not updated:
         print(f"❌ 没有找到源数据 ({source_interval}s)")
         return
-    
-    print(f"📊 找到 {len(source_data)} 条源数据")
-    
-    # 计算聚合倍数
-    ratio = target_interval // source_interval
-    aggregated_count = 0
-    
-    # 按组聚合
-    for i in range(0, len(source_data), ratio):
-        group = source_data[i:i+ratio]
-        if len(group) < ratio:
-            continue  # 跳过不完整的组
-            
-        # 聚合OHLC
-        agg_open = group[0].open
-        agg_close = group[-1].close
-        agg_high = max(item.high for item in group)
-        agg_low = min(item.low for item in group)
-        agg_volume = sum(item.volume for item in group)
-        agg_date = group[0].date
-        
-        # 检查是否已存在
-        existing = OhlcPrice.objects.filter(
-            symbol='BTC/USD',
-            interval=target_interval,
-            date=agg_date
-        ).first()
-        
-        if not existing:
-            OhlcPrice.objects.create(
-                symbol='BTC/USD',
-                interval=target_interval,
-                date=agg_date,
-                open=agg_open,
-                high=agg_high,
-                low=agg_low,
-                close=agg_close,
-                volume=agg_volume,
-                market_id=1
-            )
-            aggregated_count += 1
-    
-    print(f"✅ 聚合完成: 新增 {aggregated_count} 条记录")
+
+    print(f"✅ 聚合完成: 新增 {inserted} 条, 更新 {updated} 条记录")
 
 def calculate_ema_channel_for_interval(interval_seconds, symbol='BTC/USD', limit=500):
     """为指定时间周期计算轨道当值"""
@@ -148,8 +104,8 @@ def calculate_ema_channel_for_interval(interval_seconds, symbol='BTC/USD', limit
             defaults={
                 'timestamp': ohlc.date,
                 'volume': ohlc.volume,
-                'ema_high_33': Decimal(str(ema_high_val)),
-                'ema_low_33': Decimal(str(ema_low_val)),
+                'ema_high_33': float(ema_high_val),
+                'ema_low_33': float(ema_low_val),
             }
         )
         
@@ -157,10 +113,11 @@ def calculate_ema_channel_for_interval(interval_seconds, symbol='BTC/USD', limit
             saved_count += 1
         else:
             # 更新现有记录的EMA Channel值
-            indicator.ema_high_33 = Decimal(str(ema_high_val))
-            indicator.ema_low_33 = Decimal(str(ema_low_val))
+            indicator.ema_high_33 = float(ema_high_val)
+            indicator.ema_low_33 = float(ema_low_val)
             indicator.save()
             updated_count += 1
+    refresh_latest_state('indicator', [(symbol, interval_seconds)])
     
     print(f"✅ {interval_desc} 轨道当值计算完成:")
     print(f"   📝 新增记录: {saved_count}")
@@ -171,14 +128,14 @@ def main():
     
     # 1. 从1H数据生成4H数据
     try:
-        aggregate_ohlc_data(3600, 14400, limit=2000)  # 生成约500条4H数据
+        aggregate_ohlc_data(3600, 14400)
         print()
     except Exception as e:
         print(f"❌ 生成4H数据失败: {e}\n")
     
     # 2. 从1D数据生成1W数据
     try:
-        aggregate_ohlc_data(86400, 604800, limit=1400)  # 生成约200条1W数据
+        aggregate_ohlc_data(86400, 604800)
         print()
     except Exception as e:
         print(f"❌ 生成1W数据失败: {e}\n")
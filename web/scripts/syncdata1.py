@@ -2,9 +2,23 @@
 This program is to update OHLC data from bitstamp
 '''
 
+import os
+import sys
 import requests
 import psycopg2
 import datetime, time, pytz, math, logging
+import django
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'seraphim.settings')
+django.setup()
+
+# Higher timeframes are built by the shared set-based resampler (api/ohlc_resampler.py)
+from api.pycrons import initial_calc_ohlc, update_calc_ohlc
 
 #from unixtimestampfield.fields import UnixTimeStampField
 
@@ -27,134 +41,6 @@ def get_starting_unix():
     
     return unixtimestamps
 
-def initial_calc_ohlc(mydb, tablename, pair, interval, interval_base):
-    timezone = pytz.timezone("UTC")
-    cursor = mydb.cursor()
-
-    cursor.execute("SELECT * from " + tablename + " \
-        where unix = (Select min(unix) from " + tablename + " where interval = " + str(interval_base) + " and symbol = '" + pair + "' ) \
-        and interval = "+str(interval_base)+" and symbol = '" + pair + "';")
-    res_cur = list(cursor.fetchone())
-    start = res_cur[1] - res_cur[1] % interval
-    print(f'Ealiest { pair } @ { interval_base } is at { start } ({ res_cur[2]}).')
-    grplimit = int(interval / interval_base) 
-    if res_cur[1] > start:
-        start += interval
-    cursor.execute("SELECT unix, date, open, high, low, close, volume, volume_base from " + tablename + " \
-        where unix >= " + str(start) + " and interval = "+str(interval_base)+" and symbol = '" + pair + f"' order by unix asc limit { grplimit + 1};")
-
-    print(f'Starting { pair } @ { interval_base } is at { start }.')
-    res_all= list(cursor.fetchall())
-    count = 0
-    for item in res_all:
-        if count == 0:
-            ts = item[0]
-            tsdate = item[1]
-            popen = item[2]
-            phigh = item[3]
-            plow = item[4]
-            pclose = item[5]
-            pvolume = item[6]
-            pvolbase = item[7]
-            pass
-        else:
-            if item[3] > phigh:
-                phigh = item[3]
-            if item[4] < plow:
-                plow = item[4]
-            pvolume += item[6]
-            pvolbase += item[7]
-        count += 1
-        # print(item)
-        if count == grplimit:
-            pclose = item[5]
-            sqlstatement = 'INSERT INTO ' + tablename + '(unix, date, symbol, open, high, low, close, volume, volume_base, market_id, interval) ' 
-            sqlstatement += 'VALUES(' + \
-            f'{ts}, \'{tsdate}\', \'{pair}\', {popen}, {phigh}, {plow}, {pclose}, {pvolume}, {pvolbase}, 1, {interval})'
-            print(sqlstatement)
-            cursor.execute(sqlstatement)
-            count = 0
-            ts = 0
-        
-    if ts != 0:
-        sqlstatement = 'INSERT INTO ' + tablename + '(unix, date, symbol, open, high, low, close, volume, volume_base, market_id, interval) ' 
-        sqlstatement += 'VALUES(' + \
-        f'{ts}, \'{tsdate}\', \'{pair}\', {popen}, {phigh}, {plow}, {pclose}, {pvolume}, {pvolbase}, 1, {interval})'
-        print(sqlstatement)
-        cursor.execute(sqlstatement)
-    
-    mydb.commit()
-    cursor.close()
-
-def update_calc_ohlc(mydb, tablename, pair, interval, interval_base):
-    timezone = pytz.timezone("UTC")
-    cursor = mydb.cursor()
-
-    # Find the latest record in DB and calculate number of records to fetch
-    cursor.execute("SELECT * from " + tablename + " \
-        where unix = (Select max(unix) from " + tablename + " where interval = " + str(interval) + " and symbol = '" + pair + "' ) \
-        and interval = "+str(interval)+" and symbol = '" + pair + "';")
-    res_cur = list(cursor.fetchone())
-    start = res_cur[1] - res_cur[1] % interval
-    print(f'Latest { pair } @ { interval } is at { start } ({ res_cur[2]}).')
-    end = int(time.time())
-    grplimit = int(interval / interval_base) 
-    cursor.execute("SELECT unix, date, open, high, low, close, volume, volume_base from " + tablename + " \
-        where unix >= " + str(start) + " and interval = "+str(interval_base)+" and symbol = '" + pair + "' order by unix asc;")
-
-    res_all= list(cursor.fetchall())
-    count = 0
-    for item in res_all:
-        if count == 0:
-            ts = item[0]
-            tsdate = item[1]
-            popen = item[2]
-            phigh = item[3]
-            plow = item[4]
-            pclose = item[5]
-            pvolume = item[6]
-            pvolbase = item[7]
-            pass
-        else:
-            if item[3] > phigh:
-                phigh = item[3]
-            if item[4] < plow:
-                plow = item[4]
-            pvolume += item[6]
-            pvolbase += item[7]
-        count += 1
-        # print(item)
-        if count == grplimit:
-            pclose = item[5]
-            if ts == start:     # have grplimit of interval_base and have existing interval
-                print(f"Update {pair}@{interval} at {start} - {tsdate}")
-        #         # print(f"Update {pair}@{interval}: {rec}")
-                sqlstatement = 'UPDATE ' + tablename + f' SET open = {popen}, high = {phigh}, low = {plow}, close = {pclose}, volume = {pvolume}, volume_base = {pvolbase}' + \
-                f' WHERE unix = {start} AND symbol = \'{pair}\' AND interval = {interval};'
-                print(sqlstatement)
-            else:               # have grplimit of interval_base and need to insert new interval
-                sqlstatement = 'INSERT INTO ' + tablename + '(unix, date, symbol, open, high, low, close, volume, volume_base, market_id, interval) ' 
-                sqlstatement += 'VALUES(' + \
-                f'{ts}, \'{tsdate}\', \'{pair}\', {popen}, {phigh}, {plow}, {pclose}, {pvolume}, {pvolbase}, 1, {interval})'
-                # print(sqlstatement)
-            cursor.execute(sqlstatement)
-            count = 0
-            ts = 0
-
-    if ts != 0:    
-        if ts != start:     # less than grplimit of interval_base and need to insert new intereval
-            sqlstatement = 'INSERT INTO ' + tablename + '(unix, date, symbol, open, high, low, close, volume, volume_base, market_id, interval) ' 
-            sqlstatement += 'VALUES(' + \
-            f'{ts}, \'{tsdate}\', \'{pair}\', {popen}, {phigh}, {plow}, {pclose}, {pvolume}, {pvolbase}, 1, {interval})'
-        else:               # less than grplimit of interval_base and have existing interval
-            sqlstatement = 'UPDATE ' + tablename + f' SET open = {popen}, high = {phigh}, low = {plow}, close = {pclose}, volume = {pvolume}, volume_base = {pvolbase}' + \
-            f' WHERE unix = {start} AND symbol = \'{pair}\' AND interval = {interval};'
-        print(sqlstatement)
-        cursor.execute(sqlstatement)
-
-    mydb.commit()
-    cursor.close()
-
 def update_ohlc(mydb, tablename, pair, interval):
     timezone = pytz.timezone("UTC")
     cursor = mydb.cursor()
@@ -21,30 +21,22 @@ app.autodiscover_tasks()
 
 # Celery Beat schedule for periodic tasks
 app.conf.beat_schedule = {
-    # Fetch OHLC data every hour
-    'fetch-ohlc-data-hourly': {
-        'task': 'api.tasks.fetch_ohlc_data',
+    # Hourly data pipeline: fetch -> indicators (incl. EMA channel) -> market regime -> signals
+    # Stages are chained (Celery chain/chord) and fanned out per (symbol, interval),
+    # so each stage starts as soon as the previous one has finished.
+    'run-pipeline-hourly': {
+        'task': 'api.tasks.run_pipeline_workflow',
         'schedule': crontab(minute='5'),  # Every hour at 5 minutes past
     },
-    # Calculate indicators every hour (after OHLC fetch)
-    'calculate-indicators-hourly': {
-        'task': 'api.tasks.calculate_indicators',
-        'schedule': crontab(minute='10'),  # Every hour at 10 minutes past
+    # OHLC partitions for the coming months + per-interval retention (api/ohlc_storage.py)
+    'maintain-ohlc-storage-daily': {
+        'task': 'api.tasks.maintain_ohlc_storage',
+        'schedule': crontab(hour='0', minute='30'),
     },
-    # Calculate EMA channel every hour
-    'calculate-ema-channel-hourly': {
-        'task': 'api.tasks.calculate_ema_channel',
-        'schedule': crontab(minute='15'),  # Every hour at 15 minutes past
-    },
-    # Calculate market regime every hour
-    'calculate-market-regime-hourly': {
-        'task': 'api.tasks.calculate_market_regime',
-        'schedule': crontab(minute='20'),  # Every hour at 20 minutes past
-    },
-    # Generate trading signals every hour
-    'generate-trading-signals-hourly': {
-        'task': 'api.tasks.generate_trading_signals',
-        'schedule': crontab(minute='25'),  # Every hour at 25 minutes past
+    # Closed OHLC months -> Parquet archive read by api/ohlc_loader.py (api/ohlc_archive.py)
+    'archive-ohlc-daily': {
+        'task': 'api.tasks.archive_ohlc_history',
+        'schedule': crontab(hour='0', minute='45'),
     },
 }
 
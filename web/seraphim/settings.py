@@ -118,13 +118,17 @@ DATABASES = {
     }
 }
 
+# Redis (docker service redis) - channels, Celery and the shared client pools of api/redis_client.py
+REDIS_URL = config('REDIS_URL', default='redis://redis:6379/0')
+REDIS_MAX_CONNECTIONS = config('REDIS_MAX_CONNECTIONS', default=50, cast=int)
+
 CHANNEL_LAYERS = {
     "default": {
         # "BACKEND": "channels.layers.InMemoryChannelLayer",
         "BACKEND": "channels_redis.core.RedisChannelLayer",
         "CONFIG": {
             # "hosts": [("localhost", 6379)],
-            "hosts": [("redis", 6379)],
+            "hosts": [REDIS_URL],
             # "hosts": [("redis-server-name", 6379)],  #  'redis://h:<password>;@<redis Endpoint>:<port>'
         },
     },
@@ -152,6 +156,7 @@ AUTH_PASSWORD_VALIDATORS = [
 # Kraken API - loaded from environment variables
 KRAKEN_API_KEY = config('KRAKEN_API_KEY', default='')
 KRAKEN_API_SECRET = config('KRAKEN_API_SECRET', default='')
+KRAKEN_API_TIER = config('KRAKEN_API_TIER', default='starter')  # starter / intermediate / pro - private call rate limit
 
 # Interactive Brokers API (to be configured later)
 IBKR_API_ENABLED = config('IBKR_API_ENABLED', default=False, cast=bool)
@@ -255,11 +260,29 @@ X_FRAME_OPTIONS = 'SAMEORIGIN'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Celery Configuration
-CELERY_BROKER_URL = 'redis://redis:6379/0'
-CELERY_RESULT_BACKEND = 'redis://redis:6379/0'
+CELERY_BROKER_URL = REDIS_URL
+CELERY_RESULT_BACKEND = REDIS_URL
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes max per task
+
+# OHLC storage (api/ohlc_storage.py): heap | partitioned (monthly range partitions per interval) | timescale
+# Switching backend: python manage.py ohlc_storage convert
+OHLC_STORAGE_BACKEND = config('OHLC_STORAGE_BACKEND', default='heap')
+OHLC_PARTITION_MONTHS_AHEAD = 3
+# Parquet archive of closed OHLC months (api/ohlc_archive.py), empty = disabled
+OHLC_ARCHIVE_DIR = config('OHLC_ARCHIVE_DIR', default=str(BASE_DIR / 'data' / 'ohlc_archive'))
+# Retention per interval (seconds -> days to keep, None = keep forever)
+# Opt-in: e.g. 60: 90 deletes 1m bars older than 90 days in the daily maintain_ohlc_storage task
+OHLC_RETENTION_DAYS = {
+    60: None,
+    300: None,
+    900: None,
+    3600: None,
+    14400: None,
+    86400: None,
+    604800: None,
+}
@@ -5,14 +5,14 @@ from django.http import JsonResponse
 from django.utils.safestring import mark_safe
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from api.wsclient import ws_client
-from api.models import SymbolInfo, OhlcPrice, Indicator, MarketRegime, TradingSignal
-from api.providers.kraken_provider import get_kraken_provider
-# Delay IBKR import to avoid uvloop conflicts during Django startup
-# from api.providers.ibkr_socket_provider import get_ibkr_socket_provider
-from api.providers.ibkr_simple_provider import get_ibkr_simple_provider
-import redis
+from api.candles import get_live_candle
+from api.latest_bars import latest_bars
+from api.latest_state import latest_active_signals, latest_rows
+from api.redis_client import get_redis
+from api.ticker_snapshot import get_ticker_snapshot
+from api.models import SymbolInfo, OhlcPrice, Indicator, TradingSignal
 import json
+from decimal import Decimal
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,9 +22,6 @@ class DashboardView(View):
     """Main dashboard view for Seraphim Trading System"""
     
     def get(self, request):
-        # Start market websocket client for real-time data
-        ws_client('start')
-        
         # Get basic market data with custom ordering
         symbols = SymbolInfo.objects.all()
         
@@ -45,101 +42,62 @@ class DashboardView(View):
         
         symbols = sorted(symbols, key=symbol_sort_key)
         
-        # Initialize Kraken provider for live data
+        # Live quotes of all venues, kept fresh by the ticker service (no exchange calls here)
+        snapshot = get_ticker_snapshot()
+
+        # Kraken live data (strings in the snapshot - keep full precision)
         kraken_live_data = {}
-        try:
-            kraken_provider = get_kraken_provider()
-            
-            # Map database symbols to Kraken pairs (Kraken uses extended names)
-            kraken_symbol_map = {
-                'BTC/USD': 'XXBTZUSD',
-                'ETH/USD': 'XETHZUSD', 
-                'SOL/USD': 'SOLUSD',
-                'LTC/USD': 'XLTCZUSD',
-                'XRP/USD': 'XXRPZUSD',
-                'BCH/USD': 'BCHUSD',
-                'LINK/USD': 'LINKUSD',
-                'DOGE/USD': 'XDGUSD',
-                'ETH/BTC': 'XETHXXBT'
+        for symbol_name, ticker_data in snapshot['kraken'].items():
+            kraken_live_data[symbol_name] = {
+                'price': Decimal(ticker_data['price']),
+                'bid': Decimal(ticker_data['bid']),
+                'ask': Decimal(ticker_data['ask']),
+                'volume_24h': Decimal(ticker_data['volume_24h']),
+                'source': ticker_data['source'],
             }
-            
-            # Get live prices from Kraken for mapped symbols
-            kraken_pairs = [pair for pair in kraken_symbol_map.values()]
-            try:
-                live_ticker = kraken_provider.get_ticker(kraken_pairs)
-                logger.info(f"Retrieved live data for {len(live_ticker)} pairs from Kraken")
-                
-                # Convert to our format (keep string precision for prices)
-                from decimal import Decimal
-                for symbol_name, kraken_pair in kraken_symbol_map.items():
-                    if kraken_pair in live_ticker:
-                        ticker_data = live_ticker[kraken_pair]
-                        kraken_live_data[symbol_name] = {
-                            'price': Decimal(ticker_data['c'][0]),  # Keep full precision
-                            'bid': Decimal(ticker_data['b'][0]),
-                            'ask': Decimal(ticker_data['a'][0]),
-                            'volume_24h': Decimal(ticker_data['v'][1]),
-                            'source': 'Kraken Live'
-                        }
-                        
-            except Exception as e:
-                logger.warning(f"Failed to get live Kraken data: {e}")
-                
-        except Exception as e:
-            logger.error(f"Failed to initialize Kraken provider: {e}")
         
-        # Initialize IBKR provider for stock data  
+        # IBKR stock data (market_id=2 for IBKR stocks)
         ibkr_stock_data = {}
-        try:
-            ibkr_provider = get_ibkr_simple_provider()
-            
-            # Get stock symbols from database (market_id=2 for IBKR stocks)
-            stock_symbols_in_db = [s.name for s in symbols if s.market_id == 2]
-            logger.info(f"Found {len(stock_symbols_in_db)} IBKR stock symbols in database")
-            
-            if stock_symbols_in_db:
-                # Get market data using simple provider (avoids uvloop conflicts)
-                ibkr_stock_data = ibkr_provider.get_market_data(stock_symbols_in_db)
-                logger.info(f"IBKR data provider initialized for {len(stock_symbols_in_db)} symbols")
-            
-        except Exception as e:
-            logger.error(f"Failed to initialize IBKR simple provider: {e}")
-            # Fallback to placeholder
-            stock_symbols_in_db = [s for s in symbols if s.market_id == 2]
-            for symbol in stock_symbols_in_db:
-                ibkr_stock_data[symbol.name] = {
+        for symbol in symbols:
+            if symbol.market_id == 2:
+                ibkr_stock_data[symbol.name] = snapshot['ibkr'].get(symbol.name) or {
                     'price': 0.0,
-                    'source': 'IBKR (Error)',
-                    'status': 'error'
+                    'source': 'IBKR (Connecting...)',
+                    'status': 'connecting',
+                    'timestamp': None
                 }
         
+        # Latest database bar of every symbol - one cached lookup instead of queries per symbol
+        latest_db_bars = {symbol_name: bars[0] if bars else None
+                          for (symbol_name, _), bars in latest_bars([s.name for s in symbols]).items()}
+
         # Get Redis connection for fallback prices  
         live_prices = {}
         try:
-            r = redis.Redis(host='redis', port=6379, db=0, decode_responses=True)
-            for symbol in symbols:
-                price_key = f"live_price_{symbol.name.replace('/', '')}"
-                price_data = r.get(price_key)
+            # One MGET for all symbols
+            price_keys = [f"live_price_{symbol.name.replace('/', '')}" for symbol in symbols]
+            cached_prices = get_redis(decode_responses=True).mget(price_keys) if price_keys else []
+            for symbol, price_data in zip(symbols, cached_prices):
                 if price_data:
                     live_prices[symbol.name] = json.loads(price_data)
                 else:
                     # Fallback to latest database price
-                    latest_price = OhlcPrice.objects.filter(symbol=symbol.name).order_by('-date').first()
-                    if latest_price and latest_price.close:
+                    latest_price = latest_db_bars.get(symbol.name)
+                    if latest_price and latest_price['close']:
                         live_prices[symbol.name] = {
-                            'price': float(latest_price.close),
-                            'timestamp': latest_price.date.isoformat(),
+                            'price': float(latest_price['close']),
+                            'timestamp': latest_price['date'].isoformat(),
                             'source': 'database'
                         }
         except Exception as e:
             logger.warning(f"Redis connection failed: {e}")
             # Fallback to database prices for all symbols
             for symbol in symbols:
-                latest_price = OhlcPrice.objects.filter(symbol=symbol.name).order_by('-date').first()
-                if latest_price and latest_price.close:
+                latest_price = latest_db_bars.get(symbol.name)
+                if latest_price and latest_price['close']:
                     live_prices[symbol.name] = {
-                        'price': float(latest_price.close),
-                        'timestamp': latest_price.date.isoformat(),
+                        'price': float(latest_price['close']),
+                        'timestamp': latest_price['date'].isoformat(),
                         'source': 'database'
                     }
         
@@ -157,10 +115,10 @@ class DashboardView(View):
             # WebSocket will update to real-time prices immediately after page load
             if symbol.name in kraken_live_data:
                 # Use database OHLC close for initial display (preserves full decimal precision)
-                latest_ohlc = OhlcPrice.objects.filter(symbol=symbol.name).order_by('-date').first()
-                if latest_ohlc and latest_ohlc.close:
+                latest_ohlc = latest_db_bars.get(symbol.name)
+                if latest_ohlc and latest_ohlc['close']:
                     symbol_data.update({
-                        'price': latest_ohlc.close,  # Use DB for full precision
+                        'price': latest_ohlc['close'],  # Use DB for full precision
                         'price_source': 'Kraken Live',  # Show Kraken Live badge (WebSocket is active)
                     })
                 else:
@@ -191,9 +149,9 @@ class DashboardView(View):
             
             # If still no price, use latest OHLC close from database (highest precision)
             if symbol_data['price'] is None or symbol_data['price'] == 0:
-                latest_ohlc = OhlcPrice.objects.filter(symbol=symbol.name).order_by('-date').first()
-                if latest_ohlc and latest_ohlc.close:
-                    symbol_data['price'] = latest_ohlc.close
+                latest_ohlc = latest_db_bars.get(symbol.name)
+                if latest_ohlc and latest_ohlc['close']:
+                    symbol_data['price'] = latest_ohlc['close']
                     symbol_data['price_source'] = 'database (latest OHLC)'
             
             symbols_with_prices.append(symbol_data)
@@ -276,7 +234,9 @@ class MarketDataView(View):
                     'ema_high_33': float(item.ema_high_33) if item.ema_high_33 else None,  # 上轨当值
                     'ema_low_33': float(item.ema_low_33) if item.ema_low_33 else None,    # 下轨当值
                 } for item in indicators
-            ]
+            ],
+            # Open bar from the streaming candle builder (None when it is not running)
+            'live_candle': get_live_candle(symbol, interval_seconds),
         }
         
         return JsonResponse(data)
@@ -289,11 +249,10 @@ class MarketRegimeView(View):
         symbol = request.GET.get('symbol', 'BTC/USD')
         interval_seconds = int(request.GET.get('interval', '86400'))  # Default to 1D
         
-        # Get latest market regime
-        latest_regime = MarketRegime.objects.filter(
-            symbol=symbol,
-            interval=interval_seconds
-        ).order_by('-timestamp').first()
+        # Latest market regime and the higher timeframe regime for context - one lookup
+        higher_interval = {3600: 14400, 14400: 86400, 86400: 604800, 604800: 604800}.get(interval_seconds, interval_seconds)
+        regimes = latest_rows('regime', [(symbol, interval_seconds), (symbol, higher_interval)])
+        latest_regime = regimes.get((symbol, interval_seconds))
         
         if not latest_regime:
             return JsonResponse({
@@ -302,14 +261,7 @@ class MarketRegimeView(View):
                 'interval': interval_seconds
             }, status=404)
         
-        # Get higher timeframe regime for context
-        higher_interval = {3600: 14400, 14400: 86400, 86400: 604800, 604800: 604800}.get(interval_seconds, interval_seconds)
-        higher_regime = None
-        if higher_interval != interval_seconds:
-            higher_regime = MarketRegime.objects.filter(
-                symbol=symbol,
-                interval=higher_interval
-            ).order_by('-timestamp').first()
+        higher_regime = regimes.get((symbol, higher_interval)) if higher_interval != interval_seconds else None
         
         data = {
             'symbol': symbol,
@@ -344,21 +296,27 @@ class TradingSignalsView(View):
         interval_seconds = request.GET.get('interval', None)  # Optional filter by interval
         status = request.GET.get('status', 'active')  # Default to active signals
         limit = int(request.GET.get('limit', '50'))  # Limit number of results
-        
-        # Build query
-        query = TradingSignal.objects.all()
-        
-        if symbol:
-            query = query.filter(symbol=symbol)
-        
-        if interval_seconds:
-            query = query.filter(interval=int(interval_seconds))
-        
-        if status:
-            query = query.filter(status=status)
-        
-        # Order by timestamp (latest first) and limit
-        signals = query.order_by('-timestamp')[:limit]
+        latest = request.GET.get('latest') in ('1', 'true')  # Only the newest active signal per (symbol, interval)
+        
+        if latest:
+            # Served from the latest state table (api.latest_state)
+            signals = latest_active_signals(symbol, interval_seconds)[:limit]
+            status = 'active'
+        else:
+            # Build query
+            query = TradingSignal.objects.all()
+            
+            if symbol:
+                query = query.filter(symbol=symbol)
+            
+            if interval_seconds:
+                query = query.filter(interval=int(interval_seconds))
+            
+            if status:
+                query = query.filter(status=status)
+            
+            # Order by timestamp (latest first) and limit
+            signals = query.order_by('-timestamp')[:limit]
         
         data = {
             'signals': [
@@ -389,12 +347,13 @@ class TradingSignalsView(View):
                     'confidence_breakdown': signal.confidence_breakdown,
                 } for signal in signals
             ],
-            'count': signals.count(),
+            'count': len(signals),
             'filters': {
                 'symbol': symbol,
                 'interval': interval_seconds,
                 'status': status,
-                'limit': limit
+                'limit': limit,
+                'latest': latest,
             }
         }
         
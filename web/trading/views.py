@@ -3,18 +3,15 @@ from django.views import View
 from django.views.generic import ListView, DetailView, CreateView, DeleteView, FormView, UpdateView
 
 from api.models import SymbolInfo, OhlcPrice, TslaPrice
-from api.wsclient import ws_client
 from datetime import timedelta
 from django.conf import settings
 # from vanilla.settings import SERVER_IP, SERVER_PORT
-import redis
+from api.latest_bars import latest_bars
+from api.redis_client import hgetall_many
 import logging
 logger = logging.getLogger('TradingListView')
 logger.setLevel(logging.INFO)
 
-REDIS_HOST = "redis"  # Use your Redis host
-REDIS_PORT = 6379  # Use your Redis port
-
 # class TradingListView(ListView):
 #     template_name = "trading/trading_home.html"
 
@@ -22,9 +19,6 @@ class TradingListView(View):
     template_name = "trading/trading_home.html"
 
     def get(self, request) :
-        ws_client('start')      # start market websocket client
-        # Retrieve the latest price for each symbol from Redis
-        r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
         symbol_data = {}
         latest_prices = {}
 
@@ -39,32 +33,39 @@ class TradingListView(View):
             "1W":  604800,
         }
  
-        qs = SymbolInfo.objects.filter(trading="Enabled")
+        qs = list(SymbolInfo.objects.filter(trading="Enabled"))
+        # Retrieve the latest price and indicator hashes of all symbols from Redis in one round trip
+        redis_data = hgetall_many(
+            key for instance in qs
+            for key in [f"{instance.name}_Price"] + [f"{instance.name}_I{interval}" for interval in intervals]
+        )
+        # Newest two bars of every (symbol, interval) in one cached lookup
+        ohlc_bars = latest_bars([instance.name for instance in qs], list(durationInteger.values()))
         for instance in qs:
-            ws_client('subscribe','live_trades_' + instance.url_symbol)
             symbol = instance.name
             digits = instance.counter_decimals
             if digits < 2:
                 digits = 2
 
             # for symbol in symbols:
-            price_data = r.hgetall(f"{symbol}_Price")
+            price_data = redis_data[f"{symbol}_Price"]
             if not price_data:
                 # Handle the case when the key is not found in Redis
                 latest_prices[symbol] = "N/A"  # or any default value
             else:
-                decoded_data = {key.decode(): value.decode() for key, value in price_data.items()}
-                latest_prices[symbol] = decoded_data.get("price", "")
+                latest_prices[symbol] = price_data.get("price", "")
 
             # Retrieve OHLC data from the ORM
             symbol_indicators = {}
             for interval in intervals:
-                indicator_data = r.hgetall(f"{symbol}_I{interval}")
+                indicator_data = redis_data[f"{symbol}_I{interval}"]
                 if indicator_data:
-                    ohlc_data = OhlcPrice.objects.filter(symbol=symbol, interval=durationInteger[interval]).order_by('-date')[1:2].first()
+                    # Last closed bar (the newest one is still open)
+                    bars = ohlc_bars[(symbol, durationInteger[interval])]
+                    ohlc_data = bars[1] if len(bars) > 1 else None
                     if ohlc_data:
                         logger.info(ohlc_data)
-                        decoded_data = {key.decode(): value.decode() for key, value in indicator_data.items()}
+                        decoded_data = indicator_data
                         v_volume = float(decoded_data.get("Volume", 0)) if decoded_data.get("Volume", "") != "" else 0
                         f_volume = "{:.{}f}".format(v_volume, digits)
                         v_ma20 = float(decoded_data.get("MA20", 0)) if decoded_data.get("MA20", "") != "" else 0
@@ -99,11 +100,11 @@ class TradingListView(View):
                         v_kdj_j = float(decoded_data.get("KDJ_J", 0)) if decoded_data.get("KDJ_J", "") != "" else 0
                         f_kdj_j = "{:.{}f}".format(v_kdj_j, digits)
 
-                        closetime = ohlc_data.date + timedelta(seconds=durationInteger[interval])
+                        closetime = ohlc_data['date'] + timedelta(seconds=durationInteger[interval])
 
                         symbol_indicators[interval] = {
-                            'ohlc_close': "{:.{}f}".format(ohlc_data.close, digits) + " @"+ closetime.strftime('%m-%d %H%MZ'),
-                            'change': str(float(latest_prices[symbol]) - float(ohlc_data.close)),
+                            'ohlc_close': "{:.{}f}".format(ohlc_data['close'], digits) + " @"+ closetime.strftime('%m-%d %H%MZ'),
+                            'change': str(float(latest_prices[symbol]) - float(ohlc_data['close'])),
                             'volume': f_volume,
                             'ma20': f_ma20,
                             'ma50': f_ma50,